@@ -0,0 +1,122 @@
+# coding: utf-8
+"""
+A load test of :class:`jsl.server.SchemaServer` running on the standard
+library WSGI server.
+
+Defines a number of documents, starts the server in a background thread
+and requests their schemas from a number of client threads, then prints
+the throughput, the latency percentiles and the server statistics::
+
+    python benchmarks/server_load.py --documents 200 --requests 20000 --concurrency 8
+"""
+import argparse
+import json
+import threading
+import time
+
+try:
+    from http.client import HTTPConnection
+except ImportError:  # Python 2
+    from httplib import HTTPConnection
+
+from jsl import Document, StringField, IntField, ArrayField, DocumentField, Var
+from jsl.server import SchemaServer, make_server
+
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+def define_documents(count):
+    class Address(Document):
+        class Options(object):
+            definition_id = 'address'
+        street = StringField(required=True, description='A street.')
+        zip = StringField(pattern=r'^\d{5}$')
+
+    documents = []
+    for i in range(count):
+        attrs = {
+            'id': IntField(required=True, minimum=0),
+            'name': StringField(max_length=100, title='Name'),
+            'secret': Var({'response': None, 'request': StringField()}),
+            'addresses': ArrayField(DocumentField(Address)),
+            '__module__': 'bench',
+        }
+        documents.append(type('Document{0}'.format(i), (Document,), attrs))
+    return documents
+
+
+def run_client(address, paths, requests, accept_encoding, latencies):
+    connection = HTTPConnection(*address)
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    etags = {}
+    for i in range(requests):
+        path = paths[i % len(paths)]
+        if path in etags:
+            headers['If-None-Match'] = etags[path]
+        else:
+            headers.pop('If-None-Match', None)
+        started_at = _timer()
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(_timer() - started_at)
+        if response.status not in (200, 304):
+            raise RuntimeError('{0} {1}'.format(path, response.status))
+        etags[path] = response.getheader('ETag')
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--documents', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--accept-encoding', default='gzip')
+    parser.add_argument('--max-size', type=int, default=64 * 1024 * 1024)
+    parser.add_argument('--no-warm', action='store_true')
+    args = parser.parse_args()
+
+    documents = define_documents(args.documents)
+    started_at = _timer()
+    app = SchemaServer(roles=['request', 'response'], warm=not args.no_warm,
+                       max_size=args.max_size)
+    warm_time = _timer() - started_at
+
+    server = make_server(app, port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    paths = ['/{0}/{1}'.format(document_cls.get_definition_id(), role)
+             for document_cls in documents for role in ('request', 'response')]
+    latencies = []
+    clients = [threading.Thread(target=run_client,
+                                args=(server.server_address[:2], paths,
+                                      args.requests // args.concurrency,
+                                      args.accept_encoding, latencies))
+               for _ in range(args.concurrency)]
+    started_at = _timer()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = _timer() - started_at
+    server.shutdown()
+    server.server_close()
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print('warm-up: {0:.3f}s'.format(warm_time))
+    print('requests: {0} in {1:.3f}s, {2:.0f} req/s'.format(
+        len(latencies), elapsed, len(latencies) / elapsed))
+    print('latency: p50 {0:.2f}ms, p90 {1:.2f}ms, p99 {2:.2f}ms'.format(
+        percentile(0.5), percentile(0.9), percentile(0.99)))
+    print(json.dumps(app.get_stats(), indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -16,7 +16,8 @@ __version__ = '0.2.4'
 __version_info__ = tuple(int(i) for i in __version__.split('.'))
 
 
-from .document import Document, ALL_OF, INLINE, ANY_OF, ONE_OF
+from .document import Document, ALL_OF, INLINE, ANY_OF, ONE_OF, bundle
 from .fields import *
 from .roles import *
-from .exceptions import SchemaGenerationException
+from .exceptions import SchemaGenerationException, ValidationError
+from .providers import Provider
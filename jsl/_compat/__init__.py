@@ -2,6 +2,7 @@
 """
 Compatibility utils for Python 2 & 3.
 """
+import os
 import sys
 
 
@@ -15,8 +16,10 @@ if IS_PY3:
     from urllib.parse import urljoin, urlunsplit, urlsplit
 
     implements_to_string = _identity
+    buffer = None  # memoryview is used instead
 else:
     from urlparse import urljoin, urlunsplit, urlsplit
+    from __builtin__ import buffer
 
     def implements_to_string(cls):
         cls.__unicode__ = cls.__str__
@@ -77,4 +80,28 @@ except ImportError:
     from .ordereddict import OrderedDict
 
 
+def import_module(name):
+    """Imports a module by its absolute name (:mod:`importlib` is missing
+    on Python 2.6)."""
+    __import__(name)
+    return sys.modules[name]
+
+
+try:
+    from os import replace
+except ImportError:  # Python < 3.3
+    def replace(src, dst):
+        """Renames ``src`` to ``dst``, replacing ``dst`` if it exists
+        (not atomically on Windows)."""
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
 from .prepareable import Prepareable
\ No newline at end of file
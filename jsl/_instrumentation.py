@@ -0,0 +1,59 @@
+# coding: utf-8
+"""
+The state of :mod:`jsl.observers` checked by the schema generation code.
+Has no dependencies, so that it can be imported by any module.
+"""
+import types
+
+#: A tuple of active :class:`observers <jsl.observers.Observer>`. The schema
+#: generation code checks it before notifying observers, so that
+#: instrumentation costs next to nothing when no observer is registered.
+observers = ()
+
+#: Whether the generation of every document must run in a frame named after it.
+tag_frames = False
+
+_tagged_callers = {}
+
+
+def _call(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def _get_tagged_caller(tag):
+    caller = _tagged_callers.get(tag)
+    if caller is None:
+        code = _call.__code__
+        if hasattr(code, 'replace'):  # Python 3.8+
+            replacements = {'co_name': tag}
+            if hasattr(code, 'co_qualname'):  # Python 3.11+
+                replacements['co_qualname'] = tag
+            code = code.replace(**replacements)
+        caller = _tagged_callers[tag] = types.FunctionType(code, _call.__globals__, tag)
+    return caller
+
+
+def observe(step, generate, tag=None, **kwargs):
+    """Calls ``generate(**kwargs)`` notifying the active observers
+    of the beginning and the end of ``step``.
+
+    :param str tag:
+        If specified and :data:`tag_frames` is ``True``, ``generate`` is called from
+        a function which code object is named ``tag``, so that profilers
+        (such as :mod:`cProfile`) show the tag instead of a generic function name.
+    """
+    active_observers = observers
+    for observer in active_observers:
+        observer.enter(step)
+    try:
+        if tag is not None and tag_frames:
+            definitions, schema = _get_tagged_caller(tag)(generate, **kwargs)
+        else:
+            definitions, schema = generate(**kwargs)
+    except BaseException:
+        for observer in reversed(active_observers):
+            observer.exit(step, None, None)
+        raise
+    for observer in reversed(active_observers):
+        observer.exit(step, definitions, schema)
+    return definitions, schema
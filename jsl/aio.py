@@ -0,0 +1,216 @@
+# coding: utf-8
+"""
+:mod:`asyncio` support. Requires Python 3.5 or later.
+
+Schemas are cached the same way as by :meth:`.Document.get_schema` with
+``frozen=True`` and :meth:`.Document.get_schema_bytes`. Cached schemas are
+returned without suspending the calling coroutine; schemas that are not cached
+are generated in an executor, so that the event loop is not blocked::
+
+    from jsl import aio
+
+    async def startup():
+        await aio.prewarm([User, Task], roles=['request', 'response'])
+
+    async def handle(request):
+        return await aio.aget_schema_bytes(User, role='response')
+
+Concurrent requests for the same schema are coalesced: it is generated once
+and all the waiting coroutines get the same result.
+"""
+import asyncio
+
+from .context import FULL_PROFILE
+from .roles import DEFAULT_ROLE
+from .serving import (get_representation, negotiate_encoding, _get_representation_key,
+                      _make_response, _METHOD_NOT_ALLOWED, DEFAULT_COMPRESSION_LEVEL)
+
+
+__all__ = ['aget_schema', 'aget_schema_bytes', 'prewarm', 'asgi_response', 'asgi_app']
+
+#: Maps (loop, document class, cache key) to a future of the running generation
+_pending = {}
+
+
+async def _generate(document_cls, key, func, executor):
+    loop = asyncio.get_event_loop()
+    pending_key = (loop, document_cls, key)
+    future = _pending.get(pending_key)
+    if future is None:
+        future = _pending[pending_key] = loop.run_in_executor(executor, func)
+        future.add_done_callback(lambda _: _pending.pop(pending_key, None))
+    # a cancelled waiter must not cancel the generation for the others
+    return await asyncio.shield(future)
+
+
+def _is_cached(document_cls, key):
+    """Returns ``True`` if the schema is cached and none of the providers
+    it depends on has to be reloaded (which must not happen in the loop).
+    """
+    if any(provider.is_expired() for provider in document_cls._get_matchers()[3]):
+        return False
+    document_cls._check_providers()
+    return key in document_cls._cache
+
+
+async def aget_schema(document_cls, role=DEFAULT_ROLE, ordered=False,
+                      deduplicate=False, executor=None, profile=FULL_PROFILE):
+    """Returns the same read-only schema as :meth:`.Document.get_schema`
+    with ``frozen=True``.
+
+    .. versionadded:: 0.3.0
+
+    :param document_cls: A :class:`.Document` subclass.
+    :param executor:
+        An executor to generate the schema in if it is not cached.
+        The default executor of the loop is used if ``None``.
+    :type executor: :class:`concurrent.futures.Executor`
+    :param str profile: The same as for :meth:`.Document.get_schema`.
+    :raises: :class:`.SchemaGenerationException`
+    :rtype: :class:`~jsl.frozen.FrozenDict` or :class:`~jsl.frozen.FrozenOrderedDict`
+    """
+    key = document_cls._get_cache_key(role, ordered, deduplicate, profile=profile)
+    if _is_cached(document_cls, key):
+        return document_cls._get_cache_entry(role, ordered, deduplicate, profile=profile).schema
+    return await _generate(
+        document_cls, key,
+        lambda: document_cls.get_schema(role=role, ordered=ordered, deduplicate=deduplicate,
+                                        frozen=True, profile=profile),
+        executor)
+
+
+async def aget_schema_bytes(document_cls, role=DEFAULT_ROLE, ordered=False,
+                            canonical=True, executor=None, profile=FULL_PROFILE):
+    """Returns the same bytes as :meth:`.Document.get_schema_bytes`.
+
+    .. versionadded:: 0.3.0
+
+    :param document_cls: A :class:`.Document` subclass.
+    :param executor: The same as for :func:`aget_schema`.
+    :raises: :class:`.SchemaGenerationException`
+    :rtype: bytes
+    """
+    if canonical:
+        ordered = False
+    key = document_cls._get_cache_key(role, ordered, False, profile=profile)
+    entry = document_cls._cache.get(key) if _is_cached(document_cls, key) else None
+    if entry is not None and canonical in entry.encoded:
+        return document_cls.get_schema_bytes(role=role, ordered=ordered, canonical=canonical,
+                                             profile=profile)
+    return await _generate(
+        document_cls, key + ('bytes', canonical),
+        lambda: document_cls.get_schema_bytes(role=role, ordered=ordered,
+                                              canonical=canonical, profile=profile),
+        executor)
+
+
+async def asgi_response(document_cls, scope, send, role=DEFAULT_ROLE,
+                        level=DEFAULT_COMPRESSION_LEVEL, profile=FULL_PROFILE,
+                        cache_control=None, executor=None):
+    """Responds to an ASGI HTTP request with the schema of ``document_cls``
+    the same way as :func:`jsl.serving.wsgi_response` does. The schema is
+    generated and compressed in ``executor`` if it is not cached::
+
+        async def app(scope, receive, send):
+            await aio.asgi_response(User, scope, send, role='response')
+
+    .. versionadded:: 0.3.0
+
+    :param scope: An ASGI connection scope.
+    :param send: An ASGI send callable.
+    :param executor: The same as for :func:`aget_schema`.
+    :raises: :class:`.SchemaGenerationException`
+    """
+    method = scope.get('method', 'GET')
+    if method not in ('GET', 'HEAD'):
+        await _send_response(send, _METHOD_NOT_ALLOWED)
+        return
+    headers = _get_headers(scope)
+    encoding = negotiate_encoding(headers.get('accept-encoding'))
+    key = document_cls._get_cache_key(role, False, False, profile=profile)
+    representation_key = _get_representation_key(encoding, level)
+    entry = document_cls._cache.get(key) if _is_cached(document_cls, key) else None
+    representation = None if entry is None else entry.representations.get(representation_key)
+    if representation is None:
+        # schemas that are never cached (see Document.get_schema_bytes)
+        # are generated once per request, outside the loop
+        representation = await _generate(
+            document_cls, key + ('representation',) + representation_key,
+            lambda: get_representation(document_cls, role=role, encoding=encoding,
+                                       level=level, profile=profile),
+            executor)
+    response = _make_response(representation, method, headers.get('if-none-match'),
+                              cache_control)
+    await _send_response(send, response)
+
+
+def _get_headers(scope):
+    return dict((name.decode('latin-1').lower(), value.decode('latin-1'))
+                for name, value in scope.get('headers', ()))
+
+
+async def _send_response(send, response):
+    await send({
+        'type': 'http.response.start',
+        'status': response.status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in response.headers],
+    })
+    await send({'type': 'http.response.body', 'body': response.body})
+
+
+def asgi_app(server, executor=None):
+    """Returns an ASGI application that serves the schemas of
+    a :class:`jsl.server.SchemaServer`::
+
+        application = aio.asgi_app(SchemaServer(roles=['request', 'response']))
+
+    Cached schemas are served without leaving the event loop; schemas
+    that are not cached are generated in ``executor``, and concurrent
+    requests for the same schema are coalesced.
+
+    .. versionadded:: 0.3.0
+
+    :param server: A :class:`jsl.server.SchemaServer`.
+    :param executor: The same as for :func:`aget_schema`.
+    """
+    async def app(scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        headers = _get_headers(scope)
+        args = (scope.get('method', 'GET'), scope['path'],
+                headers.get('accept-encoding'), headers.get('if-none-match'))
+        response = server.handle(*args, cached_only=True)
+        if response is None:
+            response = await _generate(server, args, lambda: server.handle(*args), executor)
+        await _send_response(send, response)
+
+    return app
+
+
+async def prewarm(documents, roles=(DEFAULT_ROLE,), ordered=False, executor=None):
+    """Fills the caches of :meth:`.Document.get_schema_bytes` and
+    :meth:`.Document.get_schema` with ``frozen=True`` for every document
+    of ``documents`` and every role of ``roles``.
+
+    Schemas are generated one by one in ``executor``, and a single
+    schema is generated for the roles of the same
+    :meth:`class <.Document.get_role_class>`, so that the event loop
+    keeps serving other tasks while the caches are filled.
+
+    .. versionadded:: 0.3.0
+
+    :param documents: An iterable of :class:`.Document` subclasses.
+    :param roles: An iterable of roles.
+    :param bool ordered: The same as for :meth:`.Document.get_schema`.
+    :param executor: The same as for :func:`aget_schema`.
+    :raises: :class:`.SchemaGenerationException`
+    """
+    roles = list(roles)
+    for document_cls in documents:
+        for equivalent_roles in document_cls.partition_roles(roles):
+            role = equivalent_roles[0]
+            await aget_schema(document_cls, role=role, ordered=ordered, executor=executor)
+            await aget_schema_bytes(document_cls, role=role, executor=executor)
+            # let other tasks run even if everything was cached
+            await asyncio.sleep(0)
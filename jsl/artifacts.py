@@ -0,0 +1,192 @@
+# coding: utf-8
+"""
+Schema artifacts: files that contain encoded schemas of many documents
+and roles and are shared between processes through :mod:`mmap`.
+
+An artifact is written once (e.g. at deploy time) by :func:`write_artifact`
+and opened by every worker process with :class:`Artifact`. The schemas are
+not copied into the memory of the processes: lookups return :class:`memoryview`
+slices of the mapped file, so all the processes of a host share a single copy
+of the schemas in the page cache::
+
+    from jsl.artifacts import write_artifact, Artifact
+
+    write_artifact('schemas.jsla', [User, Task], roles=['request', 'response'])
+
+    artifact = Artifact('schemas.jsla')
+    body = artifact.get('app.resources.User', role='response')
+
+An artifact consists of a header, the encoded schemas and an index that maps
+definition ids (see :meth:`.Document.get_definition_id`) and roles to offsets
+and lengths of the schemas. Roles of the same :meth:`class <.Document.get_role_class>`
+share the bytes of their schema, as do documents with identical schemas.
+"""
+import binascii
+import errno
+import json
+import mmap
+import os
+import stat
+import struct
+
+from .roles import DEFAULT_ROLE
+from ._compat import IS_PY3, iteritems, buffer, replace
+
+
+__all__ = ['write_artifact', 'Artifact', 'MAGIC', 'VERSION']
+
+MAGIC = b'JSLA'
+"""The first bytes of an artifact."""
+
+VERSION = 1
+"""The version of the artifact format."""
+
+# magic, version, index offset, index length
+_HEADER = struct.Struct('<4sIQQ')
+
+
+def _create_temp_file(directory):
+    """Creates a new file in ``directory`` and returns a tuple of its descriptor
+    and path. Unlike :func:`tempfile.mkstemp`, which creates files readable
+    only by their owner, leaves the permissions to the umask.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        name = '.jsla-{0}'.format(binascii.hexlify(os.urandom(8)).decode('ascii'))
+        temp_path = os.path.join(directory, name)
+        try:
+            return os.open(temp_path, flags, 0o666), temp_path
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+
+def write_artifact(path, documents, roles=(DEFAULT_ROLE,), canonical=True):
+    """Writes the schemas of ``documents`` for ``roles`` to an artifact.
+
+    The schemas are encoded by :meth:`.Document.get_schema_bytes`. The artifact
+    is written to a temporary file which is then renamed to ``path``, so that
+    processes that have the previous version of the artifact open are not affected.
+    The artifact gets the permissions of the file it replaces or, if there is
+    no such file, the default permissions of new files.
+
+    .. versionadded:: 0.3.0
+
+    :param str path: A path to the artifact.
+    :param documents: An iterable of :class:`.Document` subclasses.
+    :param roles: An iterable of roles.
+    :param bool canonical: The same as for :meth:`.Document.get_schema_bytes`.
+    :raises:
+        :class:`ValueError` if two documents have the same definition id;
+        :class:`.SchemaGenerationException`.
+    """
+    roles = list(roles)
+    index = {}
+    chunks = []
+    offsets = {}
+    position = _HEADER.size
+    for document_cls in documents:
+        definition_id = document_cls.get_definition_id()
+        if definition_id in index:
+            raise ValueError('Duplicate definition id: {0!r}'.format(definition_id))
+        document_index = index[definition_id] = {}
+        for equivalent_roles in document_cls.partition_roles(roles):
+            encoded = document_cls.get_schema_bytes(role=equivalent_roles[0],
+                                                    canonical=canonical)
+            if encoded not in offsets:
+                offsets[encoded] = position
+                chunks.append(encoded)
+                position += len(encoded)
+            for role in equivalent_roles:
+                document_index[role] = [offsets[encoded], len(encoded)]
+    encoded_index = json.dumps(index, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = _create_temp_file(directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, position, len(encoded_index)))
+            for chunk in chunks:
+                f.write(chunk)
+            f.write(encoded_index)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            pass  # a new artifact
+        else:
+            os.chmod(temp_path, mode)
+        replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+
+class Artifact(object):
+    """An artifact written by :func:`write_artifact` mapped into memory.
+
+    Can be used as a context manager that closes the artifact on exit.
+
+    .. versionadded:: 0.3.0
+
+    :param str path: A path to the artifact.
+    :raises: :class:`ValueError` if the file is not an artifact or has
+             an unsupported version.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < _HEADER.size:
+                raise ValueError('{0!r} is not a schema artifact'.format(path))
+            magic, version, index_offset, index_length = _HEADER.unpack_from(self._mmap)
+            if magic != MAGIC:
+                raise ValueError('{0!r} is not a schema artifact'.format(path))
+            if version != VERSION:
+                raise ValueError('Unsupported artifact version: {0}'.format(version))
+            index = json.loads(
+                self._mmap[index_offset:index_offset + index_length].decode('utf-8'))
+        except Exception:
+            self._mmap.close()
+            raise
+        self._index = {}
+        for definition_id, document_index in iteritems(index):
+            for role, (offset, length) in iteritems(document_index):
+                self._index[(definition_id, role)] = (offset, offset + length)
+        self._view = memoryview(self._mmap) if IS_PY3 else None
+
+    def get(self, definition_id, role=DEFAULT_ROLE):
+        """Returns the encoded schema of the document identified by ``definition_id``
+        for ``role`` as a :class:`memoryview` of the mapped file
+        (a :class:`buffer` on Python 2).
+
+        :raises: :class:`KeyError` if the artifact contains no such schema.
+        """
+        start, end = self._index[(definition_id, role)]
+        if self._view is None:
+            return buffer(self._mmap, start, end - start)
+        return self._view[start:end]
+
+    def __contains__(self, key):
+        """Checks if the artifact contains a ``(definition_id, role)`` pair."""
+        return key in self._index
+
+    def keys(self):
+        """Returns a list of ``(definition_id, role)`` pairs contained in the artifact."""
+        return list(self._index)
+
+    def close(self):
+        """Unmaps the artifact. Memory views returned by :meth:`get`
+        must be released before.
+
+        :raises: :class:`BufferError` if some of the views are still in use.
+        """
+        if self._view is not None:
+            self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,159 @@
+# coding: utf-8
+"""
+The ``jsl`` command line tool.
+
+Subcommands:
+
+* ``jsl validate`` validates NDJSON against the schema of a document
+  (see :func:`jsl.ndjson.validate_ndjson`);
+* ``jsl codegen`` generates a Python module that builds schemas of
+  a document (see :func:`jsl.codegen.generate_module`);
+* ``jsl serve`` serves the schemas of the documents defined in the given
+  modules over HTTP (see :class:`jsl.server.SchemaServer`).
+"""
+import io
+import json
+import sys
+
+from .context import PROFILES, FULL_PROFILE
+from .ndjson import validate_ndjson, DEFAULT_CHUNK_SIZE
+from .roles import DEFAULT_ROLE
+from .server import make_server, SchemaServer, DEFAULT_MAX_SIZE
+from .serving import DEFAULT_COMPRESSION_LEVEL
+from ._compat import import_module
+
+
+__all__ = ['main']
+
+
+def _import_document(path):
+    import argparse  # missing on Python 2.6
+
+    module_name, _, document_name = path.rpartition('.')
+    if not module_name:
+        raise argparse.ArgumentTypeError(
+            '{0!r} is not a dotted path to a document class'.format(path))
+    try:
+        return getattr(import_module(module_name), document_name)
+    except (ImportError, AttributeError) as e:
+        raise argparse.ArgumentTypeError('Can not import {0!r}: {1}'.format(path, e))
+
+
+def _open_binary(path, mode, opened):
+    if path == '-':
+        stream = sys.stdin if 'r' in mode else sys.stdout
+        return getattr(stream, 'buffer', stream)
+    f = io.open(path, mode)
+    opened.append(f)
+    return f
+
+
+def _validate(args):
+    opened = []
+    try:
+        source = _open_binary(args.input, 'rb', opened)
+        sinks = dict((name, _open_binary(getattr(args, name), 'wb', opened)
+                            if getattr(args, name) else None)
+                     for name in ('valid', 'invalid', 'errors'))
+        summary = validate_ndjson(
+            source, args.document, role=args.role,
+            valid_sink=sinks['valid'], invalid_sink=sinks['invalid'],
+            errors_sink=sinks['errors'], processes=args.processes,
+            chunk_size=args.chunk_size, max_examples=args.max_examples)
+    finally:
+        for f in opened:
+            f.close()
+    sys.stdout.flush()
+    sys.stderr.write(json.dumps(summary.as_dict(), indent=2) + '\n')
+    return 1 if summary.invalid else 0
+
+
+def _codegen(args):
+    from .codegen import main as codegen_main
+    argv = [args.document_path]
+    for role in args.roles or []:
+        argv.extend(['--role', role])
+    if args.ordered:
+        argv.append('--ordered')
+    if args.output:
+        argv.extend(['--output', args.output])
+    codegen_main(argv)
+    return 0
+
+
+def _serve(args):
+    for module_name in args.modules:
+        import_module(module_name)
+    app = SchemaServer(roles=args.roles or [DEFAULT_ROLE], max_size=args.max_size,
+                       level=args.level, profile=args.profile)
+    server = make_server(app, host=args.host, port=args.port)
+    sys.stderr.write('Serving on http://{0}:{1}/\n'.format(*server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def main(argv=None):
+    """Runs the ``jsl`` command line tool. Returns an exit status."""
+    import argparse  # missing on Python 2.6
+
+    parser = argparse.ArgumentParser(prog='jsl')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    validate = subparsers.add_parser(
+        'validate', help='validate NDJSON against the schema of a document',
+        description='Validates NDJSON against the schema of a document. Prints a summary '
+                    'to stderr and exits with status 1 if any line is invalid.')
+    validate.add_argument('document', type=_import_document,
+                          help='a dotted path to a document class, e.g. "app.resources.User"')
+    validate.add_argument('input', help='an NDJSON file ("-" for stdin)')
+    validate.add_argument('--role', default=DEFAULT_ROLE)
+    validate.add_argument('--valid', help='a file to write the valid lines to ("-" for stdout)')
+    validate.add_argument('--invalid', help='a file to write the invalid lines to')
+    validate.add_argument('--errors', help='a file to write the errors of the invalid lines to')
+    validate.add_argument('--processes', type=int,
+                          help='a number of worker processes (the number of CPUs by default)')
+    validate.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                          help='a number of bytes to read at once')
+    validate.add_argument('--max-examples', type=int, default=10,
+                          help='a number of invalid lines to include in the summary')
+    validate.set_defaults(handler=_validate)
+
+    codegen = subparsers.add_parser(
+        'codegen', help='generate a Python module that builds schemas of a document')
+    codegen.add_argument('document_path', metavar='document',
+                         help='a dotted path to a document class, e.g. "app.resources.User"')
+    codegen.add_argument('--role', action='append', dest='roles',
+                         help='a role to generate a schema for (may be repeated)')
+    codegen.add_argument('--ordered', action='store_true')
+    codegen.add_argument('-o', '--output', help='an output file (stdout by default)')
+    codegen.set_defaults(handler=_codegen)
+
+    serve = subparsers.add_parser(
+        'serve', help='serve the schemas of documents over HTTP',
+        description='Serves the schemas of the documents defined in the given modules '
+                    'at /<definition id>/<role>.')
+    serve.add_argument('modules', nargs='+', metavar='module',
+                       help='a module to import documents from, e.g. "app.resources"')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    serve.add_argument('--role', action='append', dest='roles',
+                       help='a role to serve the schemas for (may be repeated)')
+    serve.add_argument('--max-size', type=int, default=DEFAULT_MAX_SIZE,
+                       help='a maximum number of bytes of cached schemas')
+    serve.add_argument('--level', type=int, default=DEFAULT_COMPRESSION_LEVEL,
+                       help='a compression level from 0 to 9')
+    serve.add_argument('--profile', choices=PROFILES, default=FULL_PROFILE)
+    serve.set_defaults(handler=_serve)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+# coding: utf-8
+"""
+Generation of Python modules that build schemas without evaluating the DSL.
+
+:func:`generate_module` renders the schemas of a document for a list of roles
+as Python source code. Every :meth:`class of roles <.Document.get_role_class>`
+gets a function whose body is a single dictionary display, so calling it
+costs as much as evaluating a literal. Callable ``enum`` s and ``default`` s
+are the only parts left dynamic: they are called every time the schema
+is built, just as they are called by :meth:`.Document.get_schema`::
+
+    from jsl.codegen import generate_module
+
+    with open('app/schemas/user.py', 'w') as f:
+        f.write(generate_module(User, roles=['request', 'response']))
+
+    from app.schemas import user
+    schema = user.get_schema('response')
+
+The generated module can also be built from the command line::
+
+    python -m jsl.codegen app.resources.User --role request --role response -o app/schemas/user.py
+
+For roles it was not generated for, the generated ``get_schema`` falls back
+to :meth:`.Document.get_schema`. The module must be regenerated whenever
+the document changes.
+"""
+import math
+import numbers
+import sys
+
+from .fields.base import DeferredCall, deferring_calls
+from .roles import DEFAULT_ROLE
+from ._compat import iteritems, string_types, OrderedDict, import_module
+
+
+__all__ = ['generate_module']
+
+_HELPERS = '''
+def _enum(func):
+    enum = func()
+    return [('enum', list(enum))] if enum else []
+
+
+def _default(func):
+    default = func()
+    if default is None:
+        return []
+    return [('default', None if default is Null else default)]
+'''
+
+
+def _get_qualified_name(obj):
+    return getattr(obj, '__qualname__', obj.__name__)
+
+
+def _find(module_name, qualified_name):
+    try:
+        obj = import_module(module_name)
+        for part in qualified_name.split('.'):
+            obj = getattr(obj, part)
+    except (ImportError, AttributeError):
+        return None
+    return obj
+
+
+class _Renderer(object):
+    def __init__(self):
+        self.modules = OrderedDict()
+        self.uses_ordered_dict = False
+        self.uses_helpers = False
+
+    def get_reference(self, obj):
+        module_name = getattr(obj, '__module__', None)
+        qualified_name = _get_qualified_name(obj)
+        if module_name is None or _find(module_name, qualified_name) is not obj:
+            raise ValueError(
+                '{0!r} can not be referenced from the generated module. Callable enums '
+                'and defaults must be module-level functions or class attributes.'.format(obj))
+        if module_name not in self.modules:
+            self.modules[module_name] = '_m{0}'.format(len(self.modules))
+        return '{0}.{1}'.format(self.modules[module_name], qualified_name)
+
+    def render(self, value, indent):
+        if isinstance(value, dict):
+            return self._render_dict(value, indent)
+        elif isinstance(value, (list, tuple)):
+            if not value:
+                return '[]'
+            inner = ' ' * (indent + 4)
+            return '[\n{0}\n{1}]'.format(
+                '\n'.join('{0}{1},'.format(inner, self.render(item, indent + 4)) for item in value),
+                ' ' * indent)
+        elif isinstance(value, float) and (math.isinf(value) or math.isnan(value)):
+            # repr gives "inf" and "nan", which are not Python literals
+            return "float('{0!r}')".format(value)
+        elif value is None or isinstance(value, (numbers.Real,) + string_types):
+            return repr(value)
+        raise ValueError('{0!r} is not JSON-representable'.format(value))
+
+    def _render_dict(self, value, indent):
+        inner = ' ' * (indent + 4)
+        is_ordered = isinstance(value, OrderedDict)
+        has_deferred_calls = any(isinstance(item, DeferredCall) for item in value.values())
+        # values of the pairs are indented one level deeper than dictionary items
+        item_indent = indent + 8 if is_ordered or has_deferred_calls else indent + 4
+        items = []
+        for key, item in iteritems(value):
+            if isinstance(item, DeferredCall):
+                items.append((None, '_{0}({1})'.format(item.keyword, self.get_reference(item.func))))
+            else:
+                items.append((repr(key), self.render(item, item_indent)))
+        self.uses_ordered_dict = self.uses_ordered_dict or is_ordered
+        if not has_deferred_calls and not is_ordered:
+            if not items:
+                return '{}'
+            return '{{\n{0}\n{1}}}'.format(
+                '\n'.join('{0}{1}: {2},'.format(inner, k, v) for k, v in items), ' ' * indent)
+
+        # pairs are concatenated with the pairs returned by _enum and _default,
+        # which are empty if the corresponding call returns nothing
+        self.uses_helpers = self.uses_helpers or has_deferred_calls
+        chunks = []
+        pairs = []
+        for key, rendered in items:
+            if key is None:
+                if pairs:
+                    chunks.append(pairs)
+                    pairs = []
+                chunks.append(rendered)
+            else:
+                pairs.append('({0}, {1})'.format(key, rendered))
+        if pairs or not chunks:
+            chunks.append(pairs)
+        rendered_chunks = []
+        for chunk in chunks:
+            if isinstance(chunk, list):
+                rendered_chunks.append('[\n{0}\n{1}]'.format(
+                    '\n'.join('{0}    {1},'.format(inner, pair) for pair in chunk), inner)
+                    if chunk else '[]')
+            else:
+                rendered_chunks.append(chunk)
+        return '{0}(\n{1}{2}\n{3})'.format(
+            'OrderedDict' if is_ordered else 'dict',
+            inner, (' +\n' + inner).join(rendered_chunks), ' ' * indent)
+
+
+def generate_module(document_cls, roles=(DEFAULT_ROLE,), ordered=False):
+    """Returns the source code of a Python module that builds schemas of
+    ``document_cls`` for ``roles``. The module provides a function
+    ``get_schema(role='default')`` that returns the same schema as
+    :meth:`.Document.get_schema` does (or the same as with
+    ``ordered=True`` if ``ordered`` is ``True``).
+
+    One building function is generated per :meth:`class of roles <.Document.get_role_class>`.
+
+    .. versionadded:: 0.3.0
+
+    :param document_cls: A :class:`.Document` subclass.
+    :param roles: An iterable of roles.
+    :param bool ordered: The same as for :meth:`.Document.get_schema`.
+    :raises:
+        :class:`ValueError` if a callable ``enum`` or ``default``
+        can not be imported by its module and qualified name (e.g. a lambda);
+        :class:`.SchemaGenerationException`.
+    :rtype: str
+    """
+    document_name = _get_qualified_name(document_cls)
+    if _find(document_cls.__module__, document_name) is not document_cls:
+        raise ValueError('{0!r} can not be imported by its module '
+                         'and qualified name'.format(document_cls))
+    renderer = _Renderer()
+    functions = []
+    role_functions = []
+    for equivalent_roles in document_cls.partition_roles(roles):
+        with deferring_calls():
+            schema = document_cls.get_schema(role=equivalent_roles[0], ordered=ordered)
+        function_name = '_build_{0}'.format(len(functions))
+        functions.append('def {0}():\n    return {1}\n'.format(
+            function_name, renderer.render(schema, indent=4)))
+        role_functions.extend((role, function_name) for role in equivalent_roles)
+
+    lines = [
+        '# coding: utf-8',
+        '# Generated by jsl.codegen from {0}.{1}. Do not edit.'.format(
+            document_cls.__module__, document_name),
+    ]
+    if renderer.uses_ordered_dict:
+        lines.append('from jsl._compat import OrderedDict')
+    if renderer.uses_helpers:
+        lines.append('from jsl.fields import Null')
+    lines.extend('import {0} as {1}'.format(module_name, alias)
+                 for module_name, alias in iteritems(renderer.modules))
+    lines.append('')
+    if renderer.uses_helpers:
+        lines.append(_HELPERS)
+    for function in functions:
+        lines.extend(['', function])
+    lines.extend([
+        '',
+        '_BUILDERS = {',
+    ] + ['    {0!r}: {1},'.format(role, name) for role, name in role_functions] + [
+        '}',
+        '',
+        '',
+        'def get_schema(role={0!r}):'.format(DEFAULT_ROLE),
+        '    builder = _BUILDERS.get(role)',
+        '    if builder is None:',
+        '        from {0} import {1}'.format(document_cls.__module__, document_name.split('.')[0]),
+        '        return {0}.get_schema(role=role, ordered={1!r})'.format(document_name, ordered),
+        '    return builder()',
+        '',
+    ])
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    import argparse  # missing on Python 2.6
+
+    parser = argparse.ArgumentParser(
+        prog='python -m jsl.codegen',
+        description='Generates a Python module that builds schemas of a JSL document.')
+    parser.add_argument('document', help='a dotted path to a document class, '
+                                         'e.g. "app.resources.User"')
+    parser.add_argument('--role', action='append', dest='roles',
+                        help='a role to generate a schema for (may be repeated)')
+    parser.add_argument('--ordered', action='store_true')
+    parser.add_argument('-o', '--output', help='an output file (stdout by default)')
+    args = parser.parse_args(argv)
+
+    module_name, _, document_name = args.document.rpartition('.')
+    document_cls = getattr(import_module(module_name), document_name)
+    source = generate_module(document_cls, roles=args.roles or [DEFAULT_ROLE],
+                             ordered=args.ordered)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(source)
+    else:
+        sys.stdout.write(source)
+
+
+if __name__ == '__main__':
+    main()
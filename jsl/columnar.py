@@ -0,0 +1,359 @@
+# coding: utf-8
+"""
+Validation of columnar data. Requires `NumPy`_.
+
+A document whose fields are primitive (strings, numbers, booleans and nulls),
+possibly nested by :class:`.DocumentField` s, is mapped onto columns: one column
+per primitive field, named by the dotted path of the field (e.g. ``"address.zip"``).
+:func:`validate_columns` checks the constraints of every column with vectorized
+NumPy operations on the whole column and never creates per-row Python objects::
+
+    from jsl.columnar import validate_columns
+
+    result = validate_columns(User, batch, nulls={'address.zip': zip_nulls})
+    if not result.is_valid:
+        bad_rows = result.get_invalid_rows()
+
+The columns are 1-D arrays (e.g. the fields of a NumPy structured array or the
+buffers of an Arrow record batch converted by ``to_numpy(zero_copy_only=False)``).
+Null values are described by boolean null masks which drive ``required`` checks;
+masked arrays are also accepted. The result holds a bitmap packed by
+:func:`numpy.packbits` per failed constraint.
+
+``pattern`` is checked once per distinct value of the column. The ``"format"``
+keyword is not checked.
+
+.. _NumPy: http://www.numpy.org
+"""
+import numbers
+from collections import namedtuple
+
+from .fields.util import compile_regex
+from .roles import DEFAULT_ROLE
+from .validation import _unescape_pointer_token
+from ._compat import iteritems, string_types, OrderedDict
+
+
+__all__ = ['Column', 'ColumnarResult', 'get_columns', 'validate_columns']
+
+_OBJECT_KEYWORDS = frozenset([
+    'type', 'properties', 'required', 'additionalProperties',
+    'id', 'title', 'description', 'default',
+])
+_COLUMN_KEYWORDS = frozenset([
+    'type', 'enum', 'minLength', 'maxLength', 'pattern', 'format',
+    'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum', 'multipleOf',
+    'id', 'title', 'description', 'default',
+])
+_COLUMN_TYPES = frozenset(['string', 'integer', 'number', 'boolean', 'null'])
+
+#: Maps JSON types to NumPy dtype kinds of the columns that can hold them
+_TYPE_KINDS = {
+    'string': 'US',
+    'integer': 'iuf',
+    'number': 'iuf',
+    'boolean': 'b',
+    'null': '',
+}
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('jsl.columnar requires NumPy')
+    return numpy
+
+
+Column = namedtuple('Column', ['name', 'schema', 'required', 'parents'])
+"""A column of a document.
+
+.. attribute:: name
+
+    A dotted path of the field, e.g. ``"address.zip"``.
+
+.. attribute:: schema
+
+    The schema of the field.
+
+.. attribute:: required
+
+    Whether the field is required in its parent object.
+
+.. attribute:: parents
+
+    A tuple of dotted paths of the enclosing optional objects, e.g. ``("address",)``.
+"""
+
+
+def _resolve(root, schema, ref_stack):
+    while '$ref' in schema:
+        _, _, pointer = schema['$ref'].partition('#')
+        if pointer in ref_stack:
+            raise ValueError('Recursive schemas can not be mapped onto columns')
+        ref_stack = ref_stack + (pointer,)
+        schema = root
+        for token in pointer.split('/')[1:]:
+            schema = schema[_unescape_pointer_token(token)]
+    return schema, ref_stack
+
+
+def _iter_columns(root, schema, prefix, parents, ref_stack):
+    for key, subschema in iteritems(schema.get('properties', {})):
+        name = prefix + key
+        required = key in schema.get('required', ())
+        subschema, subschema_ref_stack = _resolve(root, subschema, ref_stack)
+        if subschema.get('type') == 'object':
+            unsupported = set(subschema) - _OBJECT_KEYWORDS
+            if unsupported:
+                raise ValueError(u'{0!r} can not be mapped onto columns: unsupported '
+                                 u'keywords {1}'.format(name, sorted(unsupported)))
+            for column in _iter_columns(root, subschema, name + '.',
+                                        parents if required else parents + (name,),
+                                        subschema_ref_stack):
+                yield column
+            continue
+        types = subschema.get('type', ())
+        types = [types] if isinstance(types, string_types) else types
+        unsupported = (set(subschema) - _COLUMN_KEYWORDS) | (set(types) - _COLUMN_TYPES)
+        if unsupported:
+            raise ValueError(u'{0!r} can not be mapped onto a column: unsupported '
+                             u'keywords or types {1}'.format(name, sorted(unsupported)))
+        yield Column(name, subschema, required, parents)
+
+
+def get_columns(document_cls, role=DEFAULT_ROLE):
+    """Returns a list of :class:`Column` s of ``document_cls`` in the order of
+    the fields. Columns are cached per :meth:`role class <.Document.get_role_class>`.
+
+    .. versionadded:: 0.3.0
+
+    :param document_cls: A :class:`.Document` subclass.
+    :param str role: A role.
+    :raises:
+        :class:`ValueError` if the document has fields other than primitive fields
+        and document fields (or is recursive);
+        :class:`.SchemaGenerationException`.
+    """
+    document_cls._check_providers()
+    key = ('columns', document_cls.get_role_class(role))
+    columns = document_cls._cache.get(key)
+    if columns is None:
+        root = document_cls.get_schema(role=role)
+        schema, ref_stack = _resolve(root, root, ())
+        columns = list(_iter_columns(root, schema, '', (), ref_stack))
+        # see Document.get_schema_bytes
+        if not document_cls._get_matchers()[2]:
+            document_cls._cache[key] = columns
+    return columns
+
+
+class ColumnarResult(object):
+    """A result of :func:`validate_columns`.
+
+    .. versionadded:: 0.3.0
+    """
+
+    def __init__(self, length, bitmaps):
+        #: A number of rows.
+        self.length = length
+        #: An ordered dictionary that maps ``(column name, keyword)`` pairs of the
+        #: failed constraints to bitmaps of the failed rows packed by
+        #: :func:`numpy.packbits` with ``bitorder='little'``.
+        self.bitmaps = bitmaps
+
+    @property
+    def is_valid(self):
+        """Whether all the rows are valid."""
+        return not self.bitmaps
+
+    def get_failures(self, name, keyword):
+        """Returns a boolean array of the rows that fail the constraint ``keyword``
+        of the column ``name``.
+        """
+        np = _import_numpy()
+        bitmap = self.bitmaps.get((name, keyword))
+        if bitmap is None:
+            return np.zeros(self.length, dtype=bool)
+        return np.unpackbits(bitmap, count=self.length, bitorder='little').view(bool)
+
+    def get_invalid_rows(self):
+        """Returns a boolean array of the rows that fail any constraint."""
+        np = _import_numpy()
+        if not self.bitmaps:
+            return np.zeros(self.length, dtype=bool)
+        bitmap = np.bitwise_or.reduce(list(self.bitmaps.values()))
+        return np.unpackbits(bitmap, count=self.length, bitorder='little').view(bool)
+
+    def get_counts(self):
+        """Returns an ordered dictionary that maps ``(column name, keyword)``
+        pairs of the failed constraints to the numbers of failed rows.
+        """
+        np = _import_numpy()
+        return OrderedDict(
+            (key, int(np.unpackbits(bitmap, count=self.length, bitorder='little').sum()))
+            for key, bitmap in iteritems(self.bitmaps))
+
+
+def _check_types(np, values, types):
+    """Returns a boolean array of the values that are not of any of ``types``."""
+    kind = values.dtype.kind
+    failed = np.ones(len(values), dtype=bool)
+    for type_ in types:
+        if kind not in _TYPE_KINDS[type_]:
+            continue
+        if type_ == 'integer' and kind == 'f':
+            with np.errstate(invalid='ignore'):
+                failed &= ~(np.isfinite(values) & (np.floor(values) == values))
+        else:
+            return np.zeros(len(values), dtype=bool)
+    return failed
+
+
+def _filter_enum(kind, enum):
+    if kind in 'US':
+        return [v for v in enum if isinstance(v, string_types)]
+    if kind == 'b':
+        return [v for v in enum if isinstance(v, bool)]
+    return [v for v in enum if isinstance(v, numbers.Real) and not isinstance(v, bool)]
+
+
+def _iter_failures(np, schema, values):
+    """Yields pairs of keywords and boolean arrays of the values
+    failing the corresponding constraints.
+    """
+    kind = values.dtype.kind
+    if 'type' in schema:
+        types = schema['type']
+        yield 'type', _check_types(np, values, [types] if isinstance(types, string_types)
+                                   else types)
+    if 'enum' in schema:
+        yield 'enum', ~np.isin(values, _filter_enum(kind, schema['enum']))
+
+    if kind in 'US':
+        if 'minLength' in schema or 'maxLength' in schema:
+            lengths = np.char.str_len(values)
+            if 'minLength' in schema:
+                yield 'minLength', lengths < schema['minLength']
+            if 'maxLength' in schema:
+                yield 'maxLength', lengths > schema['maxLength']
+        if 'pattern' in schema:
+            regex = compile_regex(schema['pattern'])
+            distinct, inverse = np.unique(values, return_inverse=True)
+            matches = np.array([regex.search(value) is not None for value in distinct.tolist()],
+                               dtype=bool)
+            yield 'pattern', ~matches[inverse.reshape(-1)]
+
+    if kind in 'iuf':
+        if 'minimum' in schema:
+            minimum = schema['minimum']
+            yield 'minimum', (values <= minimum if schema.get('exclusiveMinimum')
+                              else values < minimum)
+        if 'maximum' in schema:
+            maximum = schema['maximum']
+            yield 'maximum', (values >= maximum if schema.get('exclusiveMaximum')
+                              else values > maximum)
+        if 'multipleOf' in schema:
+            multiple_of = schema['multipleOf']
+            if kind == 'f' or isinstance(multiple_of, float):
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    quotient = values / multiple_of
+                    yield 'multipleOf', np.trunc(quotient) != quotient
+            else:
+                yield 'multipleOf', values % multiple_of != 0
+
+
+def _get_values_and_nulls(np, columns, nulls, name, length):
+    values = columns.get(name)
+    null_mask = nulls.get(name)
+    if values is None:
+        return None, np.ones(length, dtype=bool)
+    if np.ma.isMaskedArray(values):
+        if null_mask is None:
+            null_mask = np.ma.getmaskarray(values)
+        values = np.ma.getdata(values)
+    values = np.asarray(values)
+    if values.ndim != 1 or len(values) != length:
+        raise ValueError(u'Column {0!r} is not a 1-D array of length {1}'.format(name, length))
+    if values.dtype.kind == 'S':
+        values = np.char.decode(values, 'utf-8')
+    if values.dtype.kind == 'O':
+        raise ValueError(u'Column {0!r} has the object dtype; columns of Python '
+                         u'objects are not supported'.format(name))
+    if null_mask is None:
+        null_mask = np.zeros(length, dtype=bool)
+    return values, np.asarray(null_mask, dtype=bool)
+
+
+def validate_columns(document_cls, columns, role=DEFAULT_ROLE, nulls=None):
+    """Validates columnar data against the schema of ``document_cls``.
+
+    A column that is missing from ``columns`` is null in every row. The rows of
+    an optional nested document are null if the null mask of its dotted path
+    says so or, if there is no such mask, if all of its columns are null;
+    required fields of a null nested document are not checked.
+
+    .. versionadded:: 0.3.0
+
+    :param document_cls: A :class:`.Document` subclass.
+    :param columns:
+        A mapping of column names (see :func:`get_columns`) to 1-D arrays of the same
+        length, or a NumPy structured array whose field names are column names.
+    :param str role: A role.
+    :param nulls:
+        A mapping of column names and dotted paths of nested documents
+        to boolean arrays that are true in null rows.
+    :raises:
+        :class:`ValueError` if the document can not be mapped onto columns
+        or the columns are of unsupported shapes or dtypes;
+        :class:`ImportError` if NumPy is not installed;
+        :class:`.SchemaGenerationException`.
+    :rtype: :class:`ColumnarResult`
+    """
+    np = _import_numpy()
+    nulls = nulls or {}
+    if getattr(getattr(columns, 'dtype', None), 'names', None):
+        columns = dict((name, columns[name]) for name in columns.dtype.names)
+    lengths = set(len(values) for values in columns.values())
+    if len(lengths) > 1:
+        raise ValueError('Columns are of different lengths')
+    length = lengths.pop() if lengths else 0
+
+    document_columns = get_columns(document_cls, role=role)
+    data = OrderedDict(
+        (column.name, _get_values_and_nulls(np, columns, nulls, column.name, length))
+        for column in document_columns)
+
+    parent_presence = {}
+
+    def get_presence(parent):
+        if parent not in parent_presence:
+            if parent in nulls:
+                presence = ~np.asarray(nulls[parent], dtype=bool)
+            else:
+                presence = np.zeros(length, dtype=bool)
+                for name, (_, null_mask) in iteritems(data):
+                    if name.startswith(parent + '.'):
+                        presence |= ~null_mask
+            parent_presence[parent] = presence
+        return parent_presence[parent]
+
+    bitmaps = OrderedDict()
+
+    def add(name, keyword, failed):
+        if failed.any():
+            bitmaps[(name, keyword)] = np.packbits(failed, bitorder='little')
+
+    for column in document_columns:
+        values, null_mask = data[column.name]
+        presence = np.ones(length, dtype=bool)
+        for parent in column.parents:
+            presence &= get_presence(parent)
+        if column.required:
+            add(column.name, 'required', presence & null_mask)
+        if values is None:
+            continue
+        present = presence & ~null_mask
+        for keyword, failed in _iter_failures(np, column.schema, values):
+            add(column.name, keyword, present & failed)
+    return ColumnarResult(length, bitmaps)
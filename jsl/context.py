@@ -0,0 +1,169 @@
+# coding: utf-8
+"""
+The state of a schema generation shared by all the fields and documents
+being generated: a single sink the definitions are collected into.
+
+The outermost call of ``get_definitions_and_schema`` creates a
+:class:`GenerationContext` and makes it current for the thread; the nested
+calls add the definitions they produce to it instead of returning them to
+their callers, so that every definition is stored once, whatever the depth
+of the schema.
+
+The context also carries the generation profile: :data:`FULL_PROFILE`
+produces complete schemas, while :data:`RUNTIME_PROFILE` leaves out the
+annotation keywords (``"title"``, ``"description"`` and ``"default"``)
+that are not needed to validate instances.
+"""
+import contextlib
+import threading
+
+from . import _instrumentation
+from .exceptions import SchemaGenerationException
+from ._compat import iteritems, OrderedDict
+
+
+__all__ = ['GenerationContext', 'get_context', 'get_profile', 'new_context',
+           'finalize_definitions', 'FULL_PROFILE', 'RUNTIME_PROFILE']
+
+FULL_PROFILE = 'full'
+"""A profile of complete schemas."""
+
+RUNTIME_PROFILE = 'runtime'
+"""A profile of schemas without annotation keywords."""
+
+PROFILES = (FULL_PROFILE, RUNTIME_PROFILE)
+
+_state = threading.local()
+
+_missing = object()
+
+
+class GenerationContext(object):
+    """A sink of definitions produced during a schema generation.
+
+    :param str profile: A generation profile (one of :data:`PROFILES`).
+    :raises: :class:`ValueError` if the profile is unknown.
+    """
+
+    def __init__(self, profile=FULL_PROFILE):
+        if profile not in PROFILES:
+            raise ValueError(u'Unknown profile: {0!r}'.format(profile))
+        #: The generation profile.
+        self.profile = profile
+        #: Whether annotation keywords are generated.
+        self.annotations = profile != RUNTIME_PROFILE
+        #: A dictionary that maps definition ids to schemas.
+        self.definitions = {}
+        self._added = []
+
+    def add(self, definition_id, schema):
+        """Adds a definition.
+
+        :raises:
+            :class:`.SchemaGenerationException` if there already is
+            a different definition with the same id.
+        """
+        existing = self.definitions.get(definition_id, _missing)
+        if existing is _missing:
+            self.definitions[definition_id] = schema
+            self._added.append(definition_id)
+        elif existing is not schema and existing != schema:
+            raise SchemaGenerationException(
+                u'Conflicting definitions with the same id: {0!r}'.format(definition_id))
+
+    def update(self, definitions):
+        """Adds all the definitions of a dictionary (see :meth:`add`)."""
+        for definition_id, schema in iteritems(definitions):
+            self.add(definition_id, schema)
+
+    def _mark(self):
+        return len(self._added)
+
+    def _get_added_since(self, mark):
+        return dict((definition_id, self.definitions[definition_id])
+                    for definition_id in self._added[mark:])
+
+
+def get_context():
+    """Returns the current :class:`GenerationContext` of the thread
+    or ``None`` if no schema is being generated.
+    """
+    return getattr(_state, 'context', None)
+
+
+def get_profile():
+    """Returns the profile of the current context or :data:`FULL_PROFILE`
+    if no schema is being generated.
+    """
+    context = get_context()
+    return FULL_PROFILE if context is None else context.profile
+
+
+@contextlib.contextmanager
+def new_context(profile=FULL_PROFILE):
+    """A context manager that makes a new :class:`GenerationContext`
+    with the given ``profile`` current within its block and returns it.
+    """
+    context = GenerationContext(profile=profile)
+    previous = get_context()
+    _state.context = context
+    try:
+        yield context
+    finally:
+        _state.context = previous
+
+
+def finalize_definitions(definitions, ordered):
+    """Returns the definitions collected by a context as they are or, if ``ordered``
+    is ``True``, as an :class:`~collections.OrderedDict` sorted by definition id.
+
+    Definitions are sorted once, when the outermost generation finishes:
+    the context itself is a plain dictionary.
+    """
+    if ordered:
+        return OrderedDict(sorted(iteritems(definitions)))
+    return definitions
+
+
+def collect(generate, profile=FULL_PROFILE, **kwargs):
+    """Calls ``generate(**kwargs)``, which returns a tuple of definitions and
+    a schema, in a new context with the given ``profile``. Returns a tuple of
+    all the definitions collected by the context and the schema.
+    """
+    with new_context(profile=profile) as context:
+        definitions, schema = generate(**kwargs)
+        context.update(definitions)
+    return context.definitions, schema
+
+
+def generate_definitions_and_schema(step, generate, tag=None, **kwargs):
+    """Calls ``generate(**kwargs)`` in the current context, notifying observers
+    of ``step`` (see :func:`jsl._instrumentation.observe`).
+
+    If there is no current context, the call is made in a new one and all
+    the collected definitions are returned along with the schema (sorted if
+    ``kwargs['ordered']`` is true, see :func:`finalize_definitions`). Otherwise,
+    the definitions returned by ``generate`` (those that it has not added
+    to the context itself) are returned, and observers are given the
+    definitions produced by the call.
+    """
+    if get_context() is None:
+        with new_context() as context:
+            definitions, schema = _generate_in_context(step, generate, tag=tag, **kwargs)
+            context.update(definitions)
+        return finalize_definitions(context.definitions, kwargs.get('ordered', False)), schema
+    return _generate_in_context(step, generate, tag=tag, **kwargs)
+
+
+def _generate_in_context(step, generate, tag=None, **kwargs):
+    if not _instrumentation.observers:
+        return generate(**kwargs)
+    context = get_context()
+
+    def generate_and_report(**kwargs):
+        mark = context._mark()
+        definitions, schema = generate(**kwargs)
+        context.update(definitions)
+        return context._get_added_since(mark), schema
+
+    return _instrumentation.observe(step, generate_and_report, tag=tag, **kwargs)
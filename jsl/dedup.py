@@ -0,0 +1,191 @@
+# coding: utf-8
+"""
+Deduplication of identical subschemas.
+
+Identical subschemas are detected by their structure (a subschema is
+interned bottom-up, so that two subschemas get the same key if and only
+if they are equal as JSON values) and hoisted into the ``"definitions"``
+section. Their occurrences are replaced with ``{"$ref": ...}``.
+"""
+import hashlib
+
+from .resolutionscope import EMPTY_SCOPE
+from .encoding import encode_schema
+from ._compat import iteritems, string_types, OrderedDict
+
+
+__all__ = ['deduplicate']
+
+DEFINITION_ID_PREFIX = 'deduplicated.'
+"""A prefix of definition ids generated for hoisted subschemas."""
+
+_SCHEMA_KEYWORDS = frozenset(['items', 'additionalItems', 'additionalProperties', 'not'])
+_SCHEMA_LIST_KEYWORDS = frozenset(['items', 'allOf', 'anyOf', 'oneOf'])
+_SCHEMA_MAP_KEYWORDS = frozenset(['properties', 'patternProperties', 'definitions', 'dependencies'])
+
+
+def _iter_subschema_slots(schema):
+    """Yields pairs of (container, key) such that ``container[key]``
+    is a subschema of ``schema``.
+    """
+    for keyword, value in iteritems(schema):
+        if keyword in _SCHEMA_KEYWORDS and isinstance(value, dict):
+            yield schema, keyword
+        elif keyword in _SCHEMA_LIST_KEYWORDS and isinstance(value, list):
+            for i, item in enumerate(value):
+                if isinstance(item, dict):
+                    yield value, i
+        elif keyword in _SCHEMA_MAP_KEYWORDS and isinstance(value, dict):
+            for key, item in iteritems(value):
+                if isinstance(item, dict):
+                    yield value, key
+
+
+class _Interner(object):
+    def __init__(self):
+        self._keys = {}
+        self._value_keys = {}
+        #: Maps an id of a schema node to its key
+        self.node_keys = {}
+        #: Maps a key to the number of nodes in the subtree
+        self.sizes = {}
+        #: Keys of the subtrees that contain the ``"id"`` keyword
+        self.tainted = set()
+        #: Maps a key to the number of its occurrences in a schema position
+        self.counts = {}
+
+    def _intern(self, structure, size):
+        key = self._keys.get(structure)
+        if key is None:
+            key = self._keys[structure] = len(self._keys)
+            self.sizes[key] = size
+        return key
+
+    def intern_value(self, value):
+        if isinstance(value, (dict, list, tuple)):
+            key = self._value_keys.get(id(value))
+            if key is None:
+                key = self._value_keys[id(value)] = self._intern_container(value)
+        elif isinstance(value, string_types):
+            key = self._intern(('str', value), 1)
+        else:
+            key = self._intern((type(value).__name__, value), 1)
+        return key
+
+    def _intern_container(self, value):
+        if isinstance(value, dict):
+            items = []
+            size = 1
+            for k, v in iteritems(value):
+                v_key = self.intern_value(v)
+                items.append((k, v_key))
+                size += self.sizes[v_key]
+            key = self._intern(('dict', tuple(sorted(items))), size)
+        elif isinstance(value, (list, tuple)):
+            item_keys = tuple(self.intern_value(v) for v in value)
+            size = 1 + sum(self.sizes[k] for k in item_keys)
+            key = self._intern(('list', item_keys), size)
+        return key
+
+    def intern_schema(self, schema):
+        key = self.intern_value(schema)
+        self._mark_schemas(schema)
+        return key
+
+    def _mark_schemas(self, schema):
+        key = self.intern_value(schema)
+        self.node_keys[id(schema)] = key
+        tainted = 'id' in schema
+        for container, slot in _iter_subschema_slots(schema):
+            if self._mark_schemas(container[slot]):
+                tainted = True
+        if tainted:
+            self.tainted.add(key)
+        return tainted
+
+
+def _count(interner, schema, eligible, seen):
+    for container, slot in _iter_subschema_slots(schema):
+        subschema = container[slot]
+        key = interner.node_keys.get(id(subschema))
+        if key is None or key in interner.tainted:
+            continue
+        interner.counts[key] = interner.counts.get(key, 0) + 1
+        if key in eligible:
+            if key in seen:
+                continue
+            seen.add(key)
+        _count(interner, subschema, eligible, seen)
+
+
+def deduplicate(definitions, schema, res_scope=EMPTY_SCOPE, ordered=False, min_size=5):
+    """Hoists subschemas that occur more than once into ``definitions``
+    and replaces their occurrences with references created by
+    :meth:`.ResolutionScope.create_ref`.
+
+    If a repeated subschema is equal to one of the existing definitions,
+    the existing definition is referenced. Otherwise, it is added to
+    ``definitions`` under an id that starts with :data:`DEFINITION_ID_PREFIX`.
+    Subschemas that contain the ``"id"`` keyword are neither hoisted nor
+    processed, since it would change their resolution scope.
+
+    ``definitions`` and ``schema`` are modified in place.
+
+    .. versionadded:: 0.3.0
+
+    :param dict definitions: Definitions (as returned by ``get_definitions_and_schema``).
+    :param dict schema: A schema (as returned by ``get_definitions_and_schema``).
+    :param res_scope: A resolution scope of ``schema``.
+    :type res_scope: :class:`~.ResolutionScope`
+    :param bool ordered: If ``True``, the resulting definitions are sorted by id.
+    :param int min_size:
+        A minimum number of JSON values in a subschema for it to be hoisted.
+    :rtype: (dict or OrderedDict, dict or OrderedDict)
+    """
+    interner = _Interner()
+    interner.intern_schema(schema)
+    definition_ids = {}
+    for definition_id, definition in sorted(iteritems(definitions)):
+        key = interner.intern_schema(definition)
+        definition_ids.setdefault(key, definition_id)
+    # subschemas of the definitions with the "id" keyword are left untouched,
+    # since they belong to another resolution scope
+    roots = [schema] + [d for d in definitions.values() if 'id' not in d]
+
+    eligible = set()
+    for root in roots:
+        _count(interner, root, frozenset(), set())
+    for key, count in iteritems(interner.counts):
+        if (key not in interner.tainted and interner.sizes[key] >= min_size and
+                (count > 1 or key in definition_ids)):
+            eligible.add(key)
+
+    interner.counts = {}
+    seen = set()
+    for root in roots:
+        _count(interner, root, eligible, seen)
+    hoisted = set(key for key in eligible
+                  if interner.counts.get(key, 0) > 1 or key in definition_ids)
+
+    def rewrite(node):
+        for container, slot in list(_iter_subschema_slots(node)):
+            subschema = container[slot]
+            key = interner.node_keys.get(id(subschema))
+            if key is None or key in interner.tainted:
+                continue
+            if key in hoisted:
+                if key not in definition_ids:
+                    digest = hashlib.sha1(encode_schema(subschema)).hexdigest()[:12]
+                    definition_id = definition_ids[key] = DEFINITION_ID_PREFIX + digest
+                    definitions[definition_id] = subschema
+                    rewrite(subschema)
+                container[slot] = res_scope.create_ref(definition_ids[key])
+            else:
+                rewrite(subschema)
+
+    for root in roots:
+        rewrite(root)
+
+    if ordered:
+        definitions = OrderedDict(sorted(iteritems(definitions)))
+    return definitions, schema
@@ -1,12 +1,93 @@
 # coding: utf-8
+import collections
 import inspect
 
-from . import registry
-from .exceptions import processing, DocumentStep
+from . import registry, dedup, _instrumentation
+from .exceptions import processing, DocumentStep, ItemStep
 from .fields import BaseField, DocumentField, DictField
+from .fields.base import is_deferring_calls
 from .roles import DEFAULT_ROLE, Var, Scope, all_, construct_matcher, Resolvable, Resolution
 from .resolutionscope import ResolutionScope, EMPTY_SCOPE
-from ._compat import iteritems, iterkeys, with_metaclass, OrderedDict, Prepareable
+from .encoding import encode_schema
+from .context import (get_context, get_profile, new_context, collect, finalize_definitions,
+                      generate_definitions_and_schema, FULL_PROFILE)
+from .frozen import freeze, thaw, FrozenDict
+from .providers import Provider
+from ._compat import iteritems, iterkeys, itervalues, with_metaclass, OrderedDict, Prepareable
+
+
+def _is_callable(value):
+    return callable(value) and not isinstance(value, (Resolvable, Provider))
+
+
+def _is_callable_value(value):
+    if isinstance(value, Var):
+        return (_is_callable(value.default) or
+                any(_is_callable(v) for v in value.iter_possible_values()))
+    return _is_callable(value)
+
+
+def _collect_matchers(document_cls):
+    """Returns a tuple of four elements: a list of matchers reachable from
+    ``document_cls``, a flag which is ``True`` if there are
+    :class:`resolvables <.Resolvable>` other than :class:`.Var` s whose dependency
+    on a role can't be analyzed, a flag which is ``True`` if there are
+    fields with callable ``enum`` or ``default`` and a list of reachable
+    :class:`providers <.Provider>`.
+    """
+    matchers = []
+    providers = []
+    seen_ids = set()
+    state = {'opaque': False, 'dynamic': False}
+
+    def add_matcher(matcher):
+        if id(matcher) not in seen_ids:
+            seen_ids.add(id(matcher))
+            matchers.append(matcher)
+
+    def visit_document(document):
+        if id(document) in seen_ids:
+            return
+        seen_ids.add(id(document))
+        add_matcher(document._options.roles_to_propagate)
+        visit_value(document._options.definition_id)
+        visit_value(document._backend)
+        for parent_document in document._parent_documents:
+            visit_document(parent_document)
+
+    def visit_value(value):
+        if isinstance(value, BaseField):
+            if id(value) in seen_ids:
+                return
+            seen_ids.add(id(value))
+            if (_is_callable_value(getattr(value, '_enum', None)) or
+                    _is_callable_value(getattr(value, '_default', None))):
+                state['dynamic'] = True
+            for attr_value in itervalues(vars(value)):
+                visit_value(attr_value)
+            if isinstance(value, DocumentField):
+                visit_document(value.document_cls)
+        elif isinstance(value, Var):
+            for matcher, var_value in value.values:
+                add_matcher(matcher)
+                visit_value(var_value)
+            add_matcher(value.propagate)
+            visit_value(value.default)
+        elif isinstance(value, Resolvable):
+            state['opaque'] = True
+        elif isinstance(value, Provider):
+            if id(value) not in seen_ids:
+                seen_ids.add(id(value))
+                providers.append(value)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                visit_value(item)
+        elif isinstance(value, dict):
+            for item in itervalues(value):
+                visit_value(item)
+
+    visit_document(document_cls)
+    return matchers, state['opaque'], state['dynamic'], providers
 
 
 def _set_owner_to_document_fields(cls):
@@ -22,6 +103,9 @@ ALL_OF = 'all_of'
 ANY_OF = 'any_of'
 ONE_OF = 'one_of'
 
+# a maximum number of roles which classes are cached per document
+_ROLE_CLASSES_CACHE_MAX_SIZE = 1024
+
 _INHERITANCE_MODES = {
     INLINE: 'allOf',  # used in the case that an inline class inherits from document bases
     ALL_OF: 'allOf',
@@ -86,10 +170,76 @@ class Options(object):
         self.inheritance_mode = inheritance_mode
 
 
+class _CacheEntry(object):
+    """A cached frozen schema along with its encoded forms."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.encoded = {}
+        #: Maps (encoding, compression level) pairs to :class:`jsl.serving.Representation` s
+        self.representations = {}
+
+    def get_encoded(self, canonical):
+        encoded = self.encoded.get(canonical)
+        if encoded is None:
+            encoded = self.encoded[canonical] = encode_schema(self.schema, canonical=canonical)
+        return encoded
+
+
+DocumentMetadata = collections.namedtuple(
+    'DocumentMetadata', ['properties', 'required', 'pattern_properties', 'additional_properties'])
+"""
+Metadata of a document resolved for a role, a :class:`~collections.namedtuple`
+returned by :meth:`.Document.get_metadata`.
+
+.. attribute:: properties
+
+    A :class:`~jsl.frozen.FrozenOrderedDict` that maps property keys (which are
+    the field names unless overridden by the ``name`` argument) to the names of the
+    document attributes, in the order of the fields.
+
+.. attribute:: required
+
+    A :class:`frozenset` of the keys of the required properties.
+
+.. attribute:: pattern_properties
+
+    A :class:`~jsl.frozen.FrozenDict` that maps the regular expressions of
+    :attr:`.Options.pattern_properties` to compiled regular expression objects.
+
+.. attribute:: additional_properties
+
+    The resolved value of :attr:`.Options.additional_properties`: a boolean,
+    a :class:`.BaseField` or ``None``.
+"""
+
+
 class DocumentBackend(DictField):
+    #: A document the backend belongs to
+    document_cls = None
+
     def _get_property_key(self, prop, field):
         return prop if field.name is None else field.name
 
+    def _process_properties(self, attr, properties, res_scope, ordered=False,
+                            ref_documents=None, role=DEFAULT_ROLE):
+        if attr != 'properties' or self.document_cls is None:
+            return super(DocumentBackend, self)._process_properties(
+                attr, properties, res_scope, ordered=ordered,
+                ref_documents=ref_documents, role=role)
+        resolutions, fields, _ = self.document_cls._get_resolved_fields(role)
+        keys, required = self.document_cls._get_properties(role)
+        context = get_context()
+        schema = OrderedDict() if ordered else {}
+        for (name, field), key in zip(fields, keys):
+            with processing(ItemStep(name, role=role)):
+                field_definitions, field_schema = field.get_definitions_and_schema(
+                    role=resolutions[name].role, res_scope=res_scope,
+                    ordered=ordered, ref_documents=ref_documents)
+                schema[key] = field_schema
+                context.update(field_definitions)
+        return list(required), schema
+
     def resolve_and_iter_properties(self, role=DEFAULT_ROLE):
         for name, field in iteritems(self.properties):
             field = field.resolve(role).value
@@ -131,6 +281,7 @@ class DocumentMeta(with_metaclass(Prepareable, type)):
         attrs['_fields'] = fields
         attrs['_parent_documents'] = sorted(parent_documents, key=lambda d: d.get_definition_id())
         attrs['_options'] = options
+        attrs['_cache'] = {}
         attrs['_backend'] = DocumentBackend(
             properties=fields,
             pattern_properties=options.pattern_properties,
@@ -145,6 +296,7 @@ class DocumentMeta(with_metaclass(Prepareable, type)):
         )
 
         klass = type.__new__(mcs, name, bases, attrs)
+        klass._backend.document_cls = klass
         registry.put_document(klass.__name__, klass, module=klass.__module__)
         _set_owner_to_document_fields(klass)
         return klass
@@ -248,6 +400,8 @@ class Document(with_metaclass(DocumentMeta)):
 
         :param str role: A current role.
         """
+        for observer in _instrumentation.observers:
+            observer.recursion_checked(cls)
         for field in cls.resolve_and_walk(through_document_fields=True,
                                           role=role, visited_documents=set([cls])):
             if isinstance(field, DocumentField):
@@ -265,17 +419,108 @@ class Document(with_metaclass(DocumentMeta)):
             definition_id = definition_id.resolve(role).value
         return definition_id or '{0}.{1}'.format(cls.__module__, cls.__name__)
 
+    @classmethod
+    def get_role_class(cls, role=DEFAULT_ROLE):
+        """Returns a hashable key of the equivalence class of ``role``.
+
+        Two roles are equivalent if all the matchers reachable from the document
+        (matchers and ``propagate`` matchers of :class:`variables <.Var>` and
+        ``roles_to_propagate`` of the nested documents) return the same values
+        for them. Equivalent roles always produce the same schema, which
+        allows caching schemas per role class instead of per role.
+
+        If the document contains a :class:`.Resolvable` which is not a
+        :class:`.Var`, every role forms a class of its own.
+
+        Matchers are collected once and cached, as are the classes of
+        a bounded number of the most recently used roles (see :meth:`clear_cache`).
+
+        .. versionadded:: 0.3.0
+
+        :param str role: A role.
+        """
+        key = ('role_classes',)
+        role_classes = cls._cache.get(key)
+        if role_classes is None:
+            role_classes = cls._cache.setdefault(key, OrderedDict())
+        try:
+            # moves the role to the end of the LRU order
+            role_class = role_classes.pop(role)
+        except KeyError:
+            matchers, opaque, _, _ = cls._get_matchers()
+            role_class = tuple(bool(matcher(role)) for matcher in matchers)
+            if opaque:
+                role_class = (role, role_class)
+            # roles usually come from outside (e.g. from URLs)
+            while len(role_classes) >= _ROLE_CLASSES_CACHE_MAX_SIZE:
+                try:
+                    role_classes.popitem(last=False)
+                except KeyError:  # emptied by another thread
+                    break
+        role_classes[role] = role_class
+        return role_class
+
+    @classmethod
+    def _get_matchers(cls):
+        key = ('matchers',)
+        if key not in cls._cache:
+            cls._cache[key] = _collect_matchers(cls)
+        return cls._cache[key]
+
+    @classmethod
+    def _check_providers(cls):
+        """Refreshes the expired :class:`providers <.Provider>` the document
+        depends on and clears the cache if the value of any of them has changed
+        since the cached schemas were generated.
+        """
+        providers = cls._get_matchers()[3]
+        if not providers:
+            return
+        for provider in providers:
+            if provider.is_expired():
+                provider.refresh()
+        key = ('providers',)
+        generations = tuple(provider.generation for provider in providers)
+        recorded_generations = cls._cache.get(key)
+        if recorded_generations != generations:
+            if recorded_generations is not None:
+                cls.clear_cache()
+            cls._cache[key] = generations
+
+    @classmethod
+    def partition_roles(cls, roles):
+        """Splits ``roles`` into lists of equivalent roles
+        (see :meth:`get_role_class`).
+
+        .. versionadded:: 0.3.0
+
+        :param roles: An iterable of roles.
+        :rtype: list of lists
+        """
+        partition = OrderedDict()
+        for role in roles:
+            partition.setdefault(cls.get_role_class(role), []).append(role)
+        return list(itervalues(partition))
+
     @classmethod
     def resolve_field(cls, field, role=DEFAULT_ROLE):
         """Resolves a field with the name ``field`` using ``role``.
 
+        The resolutions of all the fields are computed once per
+        :meth:`role class <get_role_class>` and cached (see :meth:`clear_cache`).
+
+        .. versionchanged:: 0.3.0
+            Resolutions are cached.
+
         :raises: :class:`AttributeError`
         """
-        properties = cls._backend.properties
-        if field in properties:
-            return properties[field].resolve(role)
-        else:
+        table_role, resolutions, _, propagated = cls._get_fields_table(role)
+        resolution = resolutions.get(field)
+        if resolution is None:
             return Resolution(None, role)
+        if role != table_role and field in propagated:
+            return Resolution(resolution.value, role)
+        return resolution
 
     @classmethod
     def resolve_and_iter_fields(cls, role=DEFAULT_ROLE):
@@ -286,9 +531,102 @@ class Document(with_metaclass(DocumentMeta)):
             The method has been changed to iterate only over fields that attached as attributes,
             and yield tuples instead of plain :class:`.BaseField`.
 
+        .. versionchanged:: 0.3.0
+            Resolutions are cached (see :meth:`resolve_field`).
+
         :rtype: iterable of (str,  :class:`.BaseField`)
         """
-        return cls._backend.resolve_and_iter_properties(role=role)
+        return iter(cls._get_fields_table(role)[2])
+
+    @classmethod
+    def _get_fields_table(cls, role):
+        """Returns a tuple of four elements: a role the table has been computed
+        for, a dictionary that maps names of the fields to their resolutions,
+        a tuple of (name, field) pairs of the fields resolved to :class:`.BaseField` s
+        and a set of names of the fields which resolutions take the role from
+        the caller. The table is cached per :meth:`role class <get_role_class>`.
+        """
+        key = ('fields', cls.get_role_class(role))
+        table = cls._cache.get(key)
+        if table is None:
+            resolutions = {}
+            fields = []
+            propagated = set()
+            for name, field in iteritems(cls._backend.properties):
+                resolution = resolutions[name] = field.resolve(role)
+                if isinstance(resolution.value, BaseField):
+                    fields.append((name, resolution.value))
+                if isinstance(field, Var):
+                    if field.propagate(role):
+                        propagated.add(name)
+                elif resolution.role == role:
+                    propagated.add(name)
+            table = cls._cache[key] = (role, resolutions, tuple(fields), frozenset(propagated))
+        return table
+
+    @classmethod
+    def _get_resolved_fields(cls, role):
+        """Returns a tuple of three elements: a dictionary that maps names of the
+        fields to their resolutions, a tuple of (name, field) pairs of the fields
+        resolved to :class:`.BaseField` s and a resolution of a missing field.
+        """
+        table_role, resolutions, fields, propagated = cls._get_fields_table(role)
+        if role != table_role:
+            # equivalent roles resolve to the same values, but the roles
+            # the values are resolved for are to be replaced
+            resolutions = dict(
+                (name, Resolution(resolution.value, role) if name in propagated else resolution)
+                for name, resolution in iteritems(resolutions))
+        return resolutions, fields, Resolution(None, role)
+
+    @classmethod
+    def _get_properties(cls, role):
+        """Returns a tuple of two elements: a tuple of the property keys
+        of the fields resolved to :class:`.BaseField` s and a tuple of the
+        keys of the required ones, both in the order of the fields.
+        """
+        key = ('properties', cls.get_role_class(role))
+        properties = cls._cache.get(key)
+        if properties is None:
+            resolutions, fields, _ = cls._get_resolved_fields(role)
+            keys = []
+            required = []
+            for name, field in fields:
+                field_key = cls._backend._get_property_key(name, field)
+                keys.append(field_key)
+                if field.resolve_attr('required', resolutions[name].role).value:
+                    required.append(field_key)
+            properties = cls._cache[key] = (tuple(keys), tuple(required))
+        return properties
+
+    @classmethod
+    def get_metadata(cls, role=DEFAULT_ROLE):
+        """Returns :class:`metadata <.DocumentMetadata>` of the document
+        resolved using ``role``: the property keys, the required keys, the compiled
+        pattern properties and the additional properties policy.
+
+        Metadata are computed once per :meth:`role class <get_role_class>` and
+        cached (see :meth:`clear_cache`), so that the code that needs them does
+        not have to walk the fields.
+
+        .. versionadded:: 0.3.0
+
+        :raises: :class:`ValueError` if a pattern property is not a valid regular expression
+        :rtype: :class:`.DocumentMetadata`
+        """
+        key = ('metadata', cls.get_role_class(role))
+        metadata = cls._cache.get(key)
+        if metadata is None:
+            resolutions, fields, _ = cls._get_resolved_fields(role)
+            keys, required = cls._get_properties(role)
+            metadata = cls._cache[key] = DocumentMetadata(
+                properties=freeze(OrderedDict(zip(keys, (name for name, _ in fields)))),
+                required=frozenset(required),
+                pattern_properties=FrozenDict(cls._backend.get_compiled_pattern_properties(role)),
+                additional_properties=cls._backend.resolve_attr(
+                    'additional_properties', role).value,
+            )
+        return metadata
 
     @classmethod
     def resolve_and_walk(cls, role=DEFAULT_ROLE, through_document_fields=False,
@@ -330,7 +668,8 @@ class Document(with_metaclass(DocumentMeta)):
         return fields
 
     @classmethod
-    def get_schema(cls, role=DEFAULT_ROLE, ordered=False):
+    def get_schema(cls, role=DEFAULT_ROLE, ordered=False, deduplicate=False, frozen=False,
+                   profile=FULL_PROFILE):
         """Returns a JSON schema (draft v4) of the document.
 
         :param str role:  A role.
@@ -339,13 +678,45 @@ class Document(with_metaclass(DocumentMeta)):
             listed in the order they are added to the class. Schema properties are
             also ordered in a sensible and consistent way, making the schema more
             human-readable.
+        :param bool deduplicate:
+            If ``True``, subschemas that occur more than once are moved to the
+            ``"definitions"`` section and referenced from their original places
+            (see :func:`jsl.dedup.deduplicate`).
+
+            .. versionadded:: 0.3.0
+        :param bool frozen:
+            If ``True``, returns a read-only schema (see :mod:`jsl.frozen`).
+            The schema is cached per :meth:`role class <get_role_class>` (see
+            :meth:`clear_cache`), so the same object is returned by subsequent calls
+            and can be shared without copying (unless the document contains
+            callable ``enum`` s or ``default`` s other than :class:`providers <.Provider>`,
+            in which case the schema is generated every time).
+            Use :func:`jsl.frozen.thaw` to get a mutable copy of it.
+
+            .. versionadded:: 0.3.0
+        :param str profile:
+            A generation profile. If ``'runtime'``, the annotation keywords
+            (``"title"``, ``"description"`` and ``"default"``) are not generated,
+            which makes the schema smaller and faster to generate; it is cached
+            separately from the full one (see :mod:`jsl.context`).
+
+            .. versionadded:: 0.3.0
         :raises: :class:`.SchemaGenerationException`
         :rtype: dict or OrderedDict
         """
-        definitions, schema = cls.get_definitions_and_schema(
-            role=role, ordered=ordered,
-            res_scope=ResolutionScope(base=cls._options.id, current=cls._options.id)
-        )
+        if frozen:
+            return cls._get_cache_entry(role, ordered, deduplicate, profile=profile).schema
+        res_scope = ResolutionScope(base=cls._options.id, current=cls._options.id)
+        # a new context, in case the schema is requested while another one is being generated
+        definitions, schema = collect(
+            cls.get_definitions_and_schema, profile=profile,
+            role=role, ordered=ordered, res_scope=res_scope)
+        if deduplicate:
+            # sorts the definitions itself if ordered
+            definitions, schema = dedup.deduplicate(
+                definitions, schema, res_scope=res_scope, ordered=ordered)
+        else:
+            definitions = finalize_definitions(definitions, ordered)
         rv = OrderedDict() if ordered else {}
         if cls._options.id:
             rv['id'] = cls._options.id
@@ -356,6 +727,108 @@ class Document(with_metaclass(DocumentMeta)):
         rv.update(schema)
         return rv
 
+    @classmethod
+    def get_schema_bytes(cls, role=DEFAULT_ROLE, ordered=False, canonical=True,
+                         profile=FULL_PROFILE):
+        """Returns a JSON schema of the document encoded into UTF-8 JSON bytes
+        with compact separators. The result is cached, so the schema is generated
+        and encoded only once per set of arguments and :meth:`role class <get_role_class>`
+        (see :meth:`clear_cache`). Schemas of the documents that contain callable
+        ``enum`` s or ``default`` s other than :class:`providers <.Provider>` are not
+        cached.
+
+        Uses `orjson`_ if it is installed and the standard :mod:`json` module otherwise.
+
+        .. versionadded:: 0.3.0
+
+        :param str role: A role.
+        :param bool ordered:
+            The same as for :meth:`get_schema`. Has no effect if ``canonical`` is ``True``.
+        :param bool canonical:
+            If ``True``, object keys are sorted.
+        :param str profile:
+            The same as for :meth:`get_schema`.
+        :raises: :class:`.SchemaGenerationException`
+        :rtype: bytes
+
+        .. _orjson: https://github.com/ijl/orjson
+        """
+        if canonical:
+            ordered = False
+        return cls._get_cache_entry(role, ordered, False, profile=profile).get_encoded(canonical)
+
+    @classmethod
+    def get_subschema(cls, pointer, role=DEFAULT_ROLE, ordered=False, profile=FULL_PROFILE):
+        """Returns the part of the schema of the document identified by
+        a JSON ``pointer`` (e.g. ``"#/properties/address/properties/zip"``)
+        along with the definitions it refers to. Only the fields along the
+        pointer are visited and only the requested part is generated.
+        See :func:`jsl.subschema.get_subschema`.
+
+        .. versionadded:: 0.3.0
+
+        :raises:
+            :class:`ValueError` if ``pointer`` does not point to a part of the schema;
+            :class:`.SchemaGenerationException`
+        """
+        from . import subschema
+        return subschema.get_subschema(cls, pointer, role=role, ordered=ordered,
+                                       profile=profile)
+
+    @classmethod
+    def clear_cache(cls):
+        """Clears the cache used by :meth:`get_schema_bytes`,
+        :meth:`get_schema` with ``frozen=True``, :meth:`get_role_class`,
+        :meth:`resolve_field`, :meth:`resolve_and_iter_fields`, :meth:`get_metadata`
+        and :meth:`get_subschema`.
+
+        Must be called if the document (or any document it refers to) has been
+        changed after its schema had been cached. Changes of the values of
+        :class:`providers <.Provider>` are detected automatically.
+
+        .. versionadded:: 0.3.0
+        """
+        cls._cache.clear()
+
+    @classmethod
+    def aget_schema(cls, role=DEFAULT_ROLE, ordered=False, deduplicate=False, executor=None,
+                    profile=FULL_PROFILE):
+        """A coroutine that returns the same read-only schema as :meth:`get_schema`
+        with ``frozen=True``, generating it in ``executor`` if it is not cached.
+        See :func:`jsl.aio.aget_schema`.
+
+        Requires Python 3.5 or later.
+
+        .. versionadded:: 0.3.0
+        """
+        from . import aio
+        return aio.aget_schema(cls, role=role, ordered=ordered, deduplicate=deduplicate,
+                               executor=executor, profile=profile)
+
+    @classmethod
+    def _get_cache_key(cls, role, ordered, deduplicate, profile=FULL_PROFILE):
+        return ('schema', cls.get_role_class(role), ordered, deduplicate, profile)
+
+    @classmethod
+    def _get_cache_entry(cls, role, ordered, deduplicate, profile=FULL_PROFILE):
+        cls._check_providers()
+        key = cls._get_cache_key(role, ordered, deduplicate, profile=profile)
+        entry = cls._cache.get(key)
+        if entry is None:
+            for observer in _instrumentation.observers:
+                observer.cache_missed(cls, key)
+            schema = cls.get_schema(role=role, ordered=ordered, deduplicate=deduplicate,
+                                    profile=profile)
+            entry = _CacheEntry(freeze(schema))
+            # callable enums and defaults (other than providers) are called
+            # every time a schema is generated, so the schema is not cached
+            if not cls._get_matchers()[2]:
+                cls._cache[key] = entry
+        else:
+            for observer in _instrumentation.observers:
+                observer.cache_hit(cls, key)
+        return entry
+
     @classmethod
     def get_definitions_and_schema(cls, role=DEFAULT_ROLE, res_scope=EMPTY_SCOPE,
                                    ordered=False, ref_documents=None):
@@ -380,6 +853,44 @@ class Document(with_metaclass(DocumentMeta)):
         :raises: :class:`~.SchemaGenerationException`
         :rtype: (dict or OrderedDict)
         """
+        return generate_definitions_and_schema(
+            DocumentStep(cls, role=role), cls._generate_definitions_and_schema,
+            tag='jsl:{0}.{1}'.format(cls.__module__, cls.__name__),
+            role=role, res_scope=res_scope, ordered=ordered, ref_documents=ref_documents)
+
+    @classmethod
+    def _get_parent_fragment(cls, role, res_scope, ordered, ref_documents):
+        """Returns the definitions and schema of the document as a parent
+        of another document. The result is cached per role class, profile,
+        resolution scope and set of ``ref_documents``, so that the children of the
+        document share it. A mutable copy of the cached result is returned.
+
+        Documents with callable ``enum`` s or ``default`` s are not cached.
+        """
+        if cls._get_matchers()[2] or is_deferring_calls():
+            return cls.get_definitions_and_schema(
+                role=role, res_scope=res_scope, ordered=ordered, ref_documents=ref_documents)
+        cls._check_providers()
+        profile = get_profile()
+        key = ('fragment', cls.get_role_class(role), profile,
+               (res_scope.base, res_scope.current, res_scope.output),
+               ordered, frozenset(ref_documents) if ref_documents else None)
+        fragment = cls._cache.get(key)
+        if fragment is None:
+            for observer in _instrumentation.observers:
+                observer.cache_missed(cls, key)
+            # the fragment is generated in its own context to collect its definitions
+            fragment = cls._cache[key] = freeze(collect(
+                cls.get_definitions_and_schema, profile=profile,
+                role=role, res_scope=res_scope, ordered=ordered, ref_documents=ref_documents))
+        else:
+            for observer in _instrumentation.observers:
+                observer.cache_hit(cls, key)
+        definitions, schema = fragment
+        return thaw(definitions), thaw(schema)
+
+    @classmethod
+    def _generate_definitions_and_schema(cls, role, res_scope, ordered, ref_documents):
         is_recursive = cls.is_recursive(role=role)
 
         if is_recursive:
@@ -391,28 +902,128 @@ class Document(with_metaclass(DocumentMeta)):
             definitions, schema = cls._backend.get_definitions_and_schema(
                 role=role, res_scope=res_scope, ordered=ordered, ref_documents=ref_documents)
 
+        context = get_context()
+        context.update(definitions)
+
         if cls._parent_documents:
             mode = _INHERITANCE_MODES[cls._options.inheritance_mode]
             contents = []
             for parent_document in cls._parent_documents:
-                parent_definitions, parent_schema = parent_document.get_definitions_and_schema(
+                parent_definitions, parent_schema = parent_document._get_parent_fragment(
                     role=role, res_scope=res_scope, ordered=ordered, ref_documents=ref_documents)
                 parent_definition_id = parent_document.get_definition_id()
-                definitions.update(parent_definitions)
-                definitions[parent_definition_id] = parent_schema
+                context.update(parent_definitions)
+                context.add(parent_definition_id, parent_schema)
                 contents.append(res_scope.create_ref(parent_definition_id))
             contents.append(schema)
             schema = {mode: contents}
 
         if is_recursive:
             definition_id = cls.get_definition_id()
-            definitions[definition_id] = schema
+            context.add(definition_id, schema)
             schema = res_scope.create_ref(definition_id)
 
-        if ordered:
-            definitions = OrderedDict(sorted(definitions.items()))
+        return {}, schema
+
+
+def get_definitions_and_schemas(documents, role=DEFAULT_ROLE, res_scope=EMPTY_SCOPE,
+                                ordered=False, ref_documents=None):
+    """Returns a tuple of two elements: the definitions referenced from the
+    schemas of ``documents`` merged into a single dictionary and a list of the schemas.
+
+    Parents of the documents (see :ref:`inheritance <inheritance>`) and other
+    documents referenced from more than one of ``documents`` are generated
+    once and appear once in the shared definitions.
+
+    .. versionadded:: 0.3.0
 
-        return definitions, schema
+    :param documents: A list of :class:`.Document` subclasses.
+    :param str role: A role.
+    :param res_scope: The current resolution scope.
+    :type res_scope: :class:`~.ResolutionScope`
+    :param bool ordered: The same as for :meth:`.Document.get_schema`.
+    :param set ref_documents:
+        The same as for :meth:`.Document.get_definitions_and_schema`.
+    :raises: :class:`.SchemaGenerationException`
+    :rtype: (dict or OrderedDict, list)
+    """
+    schemas = []
+    with new_context() as context:
+        for document_cls in documents:
+            document_definitions, schema = document_cls.get_definitions_and_schema(
+                role=role, res_scope=res_scope, ordered=ordered, ref_documents=ref_documents)
+            context.update(document_definitions)
+            schemas.append(schema)
+    return finalize_definitions(context.definitions, ordered), schemas
+
+
+def _iter_referenced_documents(document_cls, role):
+    for parent_document in document_cls._parent_documents:
+        yield parent_document
+    for field in document_cls.resolve_and_walk(role=role):
+        if isinstance(field, DocumentField):
+            yield field.document_cls
+
+
+def bundle(documents=None, role=DEFAULT_ROLE, ordered=False,
+           schema_uri='http://json-schema.org/draft-04/schema#'):
+    """Returns a schema that consists of a single ``"definitions"`` section
+    containing the schemas of ``documents`` and of all the documents they refer
+    to, including parents.
+
+    Every document is generated exactly once: documents in the bundle refer
+    to each other by ``{"$ref": "#/definitions/<definition id>"}`` (see
+    :meth:`.Document.get_definition_id`) instead of being inlined.
+
+    All the documents are generated for ``role``, including the nested
+    documents whose parents do not :class:`propagate <.Options>` it.
+
+    .. versionadded:: 0.3.0
+
+    :param documents:
+        An iterable of :class:`.Document` subclasses. If ``None``, all
+        the registered documents are bundled.
+    :param str role: A role.
+    :param bool ordered: The same as for :meth:`.Document.get_schema`.
+    :param str schema_uri: A value of the ``"$schema"`` keyword.
+    :raises:
+        :class:`ValueError` if two documents have the same definition id;
+        :class:`.SchemaGenerationException`
+    :rtype: dict or OrderedDict
+    """
+    if documents is None:
+        documents = registry.iter_documents()
+    bundled_documents = []
+    seen = set()
+    queue = list(documents)
+    while queue:
+        document_cls = queue.pop(0)
+        if document_cls in seen:
+            continue
+        seen.add(document_cls)
+        bundled_documents.append(document_cls)
+        queue.extend(_iter_referenced_documents(document_cls, role))
+
+    ref_documents = frozenset(seen)
+    definition_owners = {}
+    with new_context() as context:
+        for document_cls in bundled_documents:
+            definition_id = document_cls.get_definition_id(role=role)
+            if definition_owners.setdefault(definition_id, document_cls) is not document_cls:
+                raise ValueError('Documents {0!r} and {1!r} have the same definition id: '
+                                 '{2!r}'.format(definition_owners[definition_id], document_cls,
+                                               definition_id))
+            document_definitions, schema = document_cls.get_definitions_and_schema(
+                role=role, ordered=ordered, ref_documents=ref_documents)
+            context.update(document_definitions)
+            if schema != EMPTY_SCOPE.create_ref(definition_id):
+                context.add(definition_id, schema)
+
+    rv = OrderedDict() if ordered else {}
+    if schema_uri is not None:
+        rv['$schema'] = schema_uri
+    rv['definitions'] = finalize_definitions(context.definitions, ordered)
+    return rv
 
 
 # Remove Document itself from registry
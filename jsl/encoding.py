@@ -0,0 +1,35 @@
+# coding: utf-8
+"""
+Helpers for encoding JSON schemas into bytes.
+
+If `orjson`_ is installed, it is used as a fast encoder. Otherwise
+the standard :mod:`json` module is used.
+
+.. _orjson: https://github.com/ijl/orjson
+"""
+import json
+
+from ._compat import orjson, text_type
+
+
+def encode_schema(schema, canonical=True):
+    """Encodes ``schema`` into UTF-8 JSON using compact separators.
+
+    :param schema: A JSON schema.
+    :type schema: dict or OrderedDict
+    :param bool canonical:
+        If ``True``, object keys are sorted, so the same schema is always
+        encoded into the same bytes regardless of the dictionary order.
+    :rtype: bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(schema, option=orjson.OPT_SORT_KEYS if canonical else 0)
+        except TypeError:
+            # orjson.JSONEncodeError is a subclass of TypeError; fall back to
+            # the standard library which is more permissive (e.g., integer keys)
+            pass
+    rv = json.dumps(schema, sort_keys=canonical, separators=(',', ':'), ensure_ascii=False)
+    if isinstance(rv, text_type):
+        rv = rv.encode('utf-8')
+    return rv
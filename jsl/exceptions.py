@@ -149,3 +149,49 @@ class SchemaGenerationException(Exception):
         if steps:
             rv += u'\nSteps: {0}'.format(steps)
         return rv
+
+
+@implements_to_string
+class ValidationError(Exception):
+    """
+    Describes an instance that does not conform to a schema
+    (see :mod:`jsl.validation`).
+
+    .. versionadded:: 0.3.0
+
+    :param str message: A message.
+    :param tuple path: A path to the invalid part of the instance.
+    :param str keyword: A schema keyword that failed.
+    """
+
+    def __init__(self, message, path=(), keyword=None):
+        super(ValidationError, self).__init__(message)
+        self.message = message
+        """A message."""
+        self.path = tuple(path)
+        """A tuple of object keys and array indices leading to the invalid value."""
+        self.keyword = keyword
+        """A schema keyword that failed (e.g. ``"required"``)."""
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return ((self.message, self.path, self.keyword) ==
+                    (other.message, other.path, other.keyword))
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, self.__class__):
+            return not self.__eq__(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.message, self.path, self.keyword))
+
+    def __repr__(self):
+        return '{0}({1!r}, path={2!r}, keyword={3!r})'.format(
+            self.__class__.__name__, self.message, self.path, self.keyword)
+
+    def __str__(self):
+        if not self.path:
+            return self.message
+        return u'{0}: {1}'.format(u'/'.join(text_type(p) for p in self.path), self.message)
@@ -1,4 +1,9 @@
 # coding: utf-8
+import contextlib
+import threading
+
+from ..context import (get_context, collect, finalize_definitions,
+                       generate_definitions_and_schema, FULL_PROFILE)
 from ..exceptions import processing, FieldStep
 from ..resolutionscope import EMPTY_SCOPE
 from ..roles import Resolvable, Resolution, DEFAULT_ROLE
@@ -34,6 +39,49 @@ NullSentinel.__new__ = staticmethod(_failing_new)
 del _failing_new
 
 
+_deferral = threading.local()
+
+
+class DeferredCall(object):
+    """A placeholder that is put into a schema instead of the value of
+    a callable ``enum`` or ``default`` when calls are :func:`deferred <deferring_calls>`.
+
+    .. attribute:: func
+
+        The callable.
+
+    .. attribute:: keyword
+
+        ``"enum"`` or ``"default"``.
+    """
+
+    def __init__(self, func, keyword):
+        self.func = func
+        self.keyword = keyword
+
+    def __repr__(self):
+        return '<DeferredCall {0}={1!r}>'.format(self.keyword, self.func)
+
+
+@contextlib.contextmanager
+def deferring_calls():
+    """A context manager within which the schemas generated in the current
+    thread contain :class:`DeferredCall` s instead of the values of
+    callable ``enum`` s and ``default`` s.
+    """
+    previous = getattr(_deferral, 'active', False)
+    _deferral.active = True
+    try:
+        yield
+    finally:
+        _deferral.active = previous
+
+
+def is_deferring_calls():
+    """Returns ``True`` if called within :func:`deferring_calls`."""
+    return getattr(_deferral, 'active', False)
+
+
 class BaseField(Resolvable):
     """A base class for fields of :class:`documents <.Document>`.
     Instances of this class may be added to a document to define its properties.
@@ -96,8 +144,16 @@ class BaseField(Resolvable):
             pointing to it will be resolved to a reference: ``{"$ref": "#/definitions/..."}``.
             Note: resulting definitions will not contain schema for this document.
         :raises: :class:`.SchemaGenerationException`
-        :rtype: (dict, dict or OrderedDict)
+        :rtype: (dict or OrderedDict, dict or OrderedDict)
+
+        .. versionchanged:: 0.3.0
+            If ``ordered`` is ``True``, the definitions are sorted by id.
         """
+        return generate_definitions_and_schema(
+            FieldStep(self, role=role), self._generate_definitions_and_schema,
+            role=role, res_scope=res_scope, ordered=ordered, ref_documents=ref_documents)
+
+    def _generate_definitions_and_schema(self, role, res_scope, ordered, ref_documents):
         with processing(FieldStep(self, role=role)):
             definitions, schema = self._get_definitions_and_schema(
                 role=role, res_scope=res_scope, ordered=ordered, ref_documents=ref_documents)
@@ -155,7 +211,7 @@ class BaseField(Resolvable):
                                                  visited_documents=visited_documents):
                 yield field_
 
-    def get_schema(self, ordered=False, role=DEFAULT_ROLE):
+    def get_schema(self, ordered=False, role=DEFAULT_ROLE, profile=FULL_PROFILE):
         """Returns a JSON schema (draft v4) of the field.
 
         :param str role:  A role.
@@ -164,10 +220,18 @@ class BaseField(Resolvable):
             listed in the order they are added to the class. Schema properties are
             also ordered in a sensible and consistent way, making the schema more
             human-readable.
+        :param str profile:
+            A generation profile. If ``'runtime'``, the annotation keywords
+            (``"title"``, ``"description"`` and ``"default"``) are not generated
+            (see :mod:`jsl.context`).
+
+            .. versionadded:: 0.3.0
         :raises: :class:`.SchemaGenerationException`
         :rtype: dict or OrderedDict
         """
-        definitions, schema = self.get_definitions_and_schema(ordered=ordered, role=role)
+        definitions, schema = collect(self.get_definitions_and_schema, profile=profile,
+                                      ordered=ordered, role=role)
+        definitions = finalize_definitions(definitions, ordered)
         if definitions:
             schema['definitions'] = definitions
         return schema
@@ -229,6 +293,8 @@ class BaseSchemaField(BaseField):
         """Returns a list to be used as a value of the ``"enum"`` schema keyword."""
         enum = self.resolve_attr('_enum', role).value
         if callable(enum):
+            if is_deferring_calls():
+                return DeferredCall(enum, 'enum')
             enum = enum()
         return enum
 
@@ -236,6 +302,8 @@ class BaseSchemaField(BaseField):
         """Returns a value of the ``"default"`` schema keyword."""
         default = self.resolve_attr('_default', role).value
         if callable(default):
+            if is_deferring_calls():
+                return DeferredCall(default, 'default')
             default = default()
         return default
 
@@ -246,18 +314,22 @@ class BaseSchemaField(BaseField):
     def _update_schema_with_common_fields(self, schema, id='', role=DEFAULT_ROLE):
         if id:
             schema['id'] = id
-        title = self.resolve_attr('title', role).value
-        if title is not None:
-            schema['title'] = title
-        description = self.resolve_attr('description', role).value
-        if description is not None:
-            schema['description'] = description
+        context = get_context()
+        annotations = context is None or context.annotations
+        if annotations:
+            title = self.resolve_attr('title', role).value
+            if title is not None:
+                schema['title'] = title
+            description = self.resolve_attr('description', role).value
+            if description is not None:
+                schema['description'] = description
         enum = self.get_enum(role=role)
         if enum:
-            schema['enum'] = list(enum)
-        default = self.get_default(role=role)
-        if default is not None:
-            if default is Null:
-                default = None
-            schema['default'] = default
+            schema['enum'] = enum if isinstance(enum, DeferredCall) else list(enum)
+        if annotations:
+            default = self.get_default(role=role)
+            if default is not None:
+                if default is Null:
+                    default = None
+                schema['default'] = default
         return schema
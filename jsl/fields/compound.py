@@ -4,10 +4,11 @@ import itertools
 from .. import registry
 from ..roles import DEFAULT_ROLE, Resolvable
 from ..resolutionscope import EMPTY_SCOPE
+from ..context import get_context
 from ..exceptions import SchemaGenerationException, processing, AttributeStep, ItemStep
 from .._compat import iteritems, iterkeys, itervalues, string_types, OrderedDict
 from .base import BaseSchemaField, BaseField
-from .util import validate_regex
+from .util import compile_regex
 
 
 __all__ = [
@@ -59,7 +60,7 @@ class ArrayField(BaseSchemaField):
         id, res_scope = res_scope.alter(self.id)
         schema = (OrderedDict if ordered else dict)(type='array')
         schema = self._update_schema_with_common_fields(schema, id=id, role=role)
-        nested_definitions = {}
+        context = get_context()
 
         items, items_role = self.resolve_attr('items', role)
         if items is not None:
@@ -76,7 +77,7 @@ class ArrayField(BaseSchemaField):
                             item_definitions, item_schema = item.get_definitions_and_schema(
                                 role=item_role, res_scope=res_scope,
                                 ordered=ordered, ref_documents=ref_documents)
-                            nested_definitions.update(item_definitions)
+                            context.update(item_definitions)
                             items_schema.append(item_schema)
                     if not items_schema:
                         raise SchemaGenerationException(u'Items tuple is empty')
@@ -84,7 +85,7 @@ class ArrayField(BaseSchemaField):
                     items_definitions, items_schema = items.get_definitions_and_schema(
                         role=items_role, res_scope=res_scope, ordered=ordered,
                         ref_documents=ref_documents)
-                    nested_definitions.update(items_definitions)
+                    context.update(items_definitions)
                 else:
                     raise SchemaGenerationException(
                         u'{0} is not a BaseField, a list or a tuple'.format(items))
@@ -100,7 +101,7 @@ class ArrayField(BaseSchemaField):
                         role=additional_items_role, res_scope=res_scope,
                         ordered=ordered, ref_documents=ref_documents)
                     schema['additionalItems'] = items_schema
-                    nested_definitions.update(items_definitions)
+                    context.update(items_definitions)
                 else:
                     raise SchemaGenerationException(
                         u'{0} is not a BaseField or a boolean'.format(additional_items))
@@ -114,7 +115,7 @@ class ArrayField(BaseSchemaField):
         unique_items = self.resolve_attr('unique_items', role).value
         if unique_items is not None:
             schema['uniqueItems'] = unique_items
-        return nested_definitions, schema
+        return {}, schema
 
     def iter_fields(self):
         rv = []
@@ -179,8 +180,28 @@ class DictField(BaseSchemaField):
         self.additional_properties = additional_properties  #:
         self.min_properties = min_properties  #:
         self.max_properties = max_properties  #:
+        self._compiled_pattern_properties = {}
         super(DictField, self).__init__(**kwargs)
 
+    def _compile_pattern_property(self, key):
+        if key not in self._compiled_pattern_properties:
+            self._compiled_pattern_properties[key] = compile_regex(key)
+        return self._compiled_pattern_properties[key]
+
+    def get_compiled_pattern_properties(self, role=DEFAULT_ROLE):
+        """Returns a dictionary mapping the keys of :attr:`pattern_properties`
+        resolved using ``role`` to compiled regular expression objects.
+
+        .. versionadded:: 0.3.0
+
+        :raises: ValueError
+        """
+        pattern_properties = self.resolve_attr('pattern_properties', role).value
+        if not pattern_properties:
+            return {}
+        return dict((key, self._compile_pattern_property(key))
+                    for key in iterkeys(pattern_properties))
+
     def _process_properties(self, attr, properties, res_scope, ordered=False,
                             ref_documents=None, role=DEFAULT_ROLE):
         if attr == 'properties':
@@ -188,8 +209,9 @@ class DictField(BaseSchemaField):
         elif attr == 'pattern_properties':
             key_getter = self._get_pattern_property_key
         else:
-            raise ValueError('attr must be either "properties" or "pattern_properties"')  # pragma: no cover
-        nested_definitions = {}
+            raise ValueError(  # pragma: no cover
+                'attr must be either "properties" or "pattern_properties"')
+        context = get_context()
         schema = OrderedDict() if ordered else {}
         required = []
         for prop, field in iteritems(properties):
@@ -206,8 +228,8 @@ class DictField(BaseSchemaField):
                 if field.resolve_attr('required', field_role).value:
                     required.append(key)
                 schema[key] = field_schema
-                nested_definitions.update(field_definitions)
-        return nested_definitions, required, schema
+                context.update(field_definitions)
+        return required, schema
 
     def _get_property_key(self, prop, field):
         return prop
@@ -215,26 +237,24 @@ class DictField(BaseSchemaField):
     def _get_pattern_property_key(self, prop, field):
         return prop
 
-    def _update_schema_with_processed_properties(self, schema, nested_definitions,
-                                                 role=DEFAULT_ROLE, res_scope=EMPTY_SCOPE,
-                                                 ordered=False, ref_documents=None):
+    def _update_schema_with_processed_properties(self, schema, role=DEFAULT_ROLE,
+                                                 res_scope=EMPTY_SCOPE, ordered=False,
+                                                 ref_documents=None):
         with processing(AttributeStep('properties', role=role)):
             properties, properties_role = self.resolve_attr('properties', role)
             if properties is not None:
                 if not isinstance(properties, dict):
                     raise SchemaGenerationException(u'{0} is not a dict'.format(properties))
-                properties_definitions, properties_required, properties_schema = \
-                    self._process_properties('properties', properties, res_scope,
-                                             ordered=ordered, ref_documents=ref_documents,
-                                             role=properties_role)
+                properties_required, properties_schema = self._process_properties(
+                    'properties', properties, res_scope, ordered=ordered,
+                    ref_documents=ref_documents, role=properties_role)
                 schema['properties'] = properties_schema
                 if properties_required:
                     schema['required'] = properties_required
-                nested_definitions.update(properties_definitions)
 
-    def _update_schema_with_processed_pattern_properties(self, schema, nested_definitions,
-                                                         role=DEFAULT_ROLE, res_scope=EMPTY_SCOPE,
-                                                         ordered=False, ref_documents=None):
+    def _update_schema_with_processed_pattern_properties(self, schema, role=DEFAULT_ROLE,
+                                                         res_scope=EMPTY_SCOPE, ordered=False,
+                                                         ref_documents=None):
         with processing(AttributeStep('pattern_properties', role=role)):
             pattern_properties, pattern_properties_role = \
                 self.resolve_attr('pattern_properties', role)
@@ -243,19 +263,18 @@ class DictField(BaseSchemaField):
                     raise SchemaGenerationException(u'{0} is not a dict'.format(pattern_properties))
                 for key in iterkeys(pattern_properties):
                     try:
-                        validate_regex(key)
+                        self._compile_pattern_property(key)
                     except ValueError as e:
                         raise SchemaGenerationException(u'Invalid regexp: {0}'.format(e))
-                properties_definitions, _, properties_schema = self._process_properties(
+                _, properties_schema = self._process_properties(
                     'pattern_properties', pattern_properties, res_scope,
                     ordered=ordered, ref_documents=ref_documents,
                     role=pattern_properties_role)
                 schema['patternProperties'] = properties_schema
-                nested_definitions.update(properties_definitions)
 
-    def _update_schema_with_processed_additional_properties(self, schema, nested_definitions,
-                                                            role=DEFAULT_ROLE, res_scope=EMPTY_SCOPE,
-                                                            ordered=False, ref_documents=None):
+    def _update_schema_with_processed_additional_properties(self, schema, role=DEFAULT_ROLE,
+                                                            res_scope=EMPTY_SCOPE, ordered=False,
+                                                            ref_documents=None):
         with processing(AttributeStep('additional_properties', role=role)):
             additional_properties, additional_properties_role = \
                 self.resolve_attr('additional_properties', role)
@@ -268,7 +287,7 @@ class DictField(BaseSchemaField):
                             role=additional_properties_role, res_scope=res_scope,
                             ordered=ordered, ref_documents=ref_documents)
                     schema['additionalProperties'] = additional_properties_schema
-                    nested_definitions.update(additional_properties_definitions)
+                    get_context().update(additional_properties_definitions)
                 else:
                     raise SchemaGenerationException(
                         u'{0} is not a BaseField or a boolean'.format(additional_properties))
@@ -278,14 +297,13 @@ class DictField(BaseSchemaField):
         id, res_scope = res_scope.alter(self.id)
         schema = (OrderedDict if ordered else dict)(type='object')
         schema = self._update_schema_with_common_fields(schema, id=id, role=role)
-        nested_definitions = {}
 
         for f in (
                 self._update_schema_with_processed_properties,
                 self._update_schema_with_processed_pattern_properties,
                 self._update_schema_with_processed_additional_properties,
         ):
-            f(schema, nested_definitions, role=role, res_scope=res_scope,
+            f(schema, role=role, res_scope=res_scope,
               ordered=ordered, ref_documents=ref_documents)
 
         min_properties = self.resolve_attr('min_properties', role).value
@@ -295,7 +313,7 @@ class DictField(BaseSchemaField):
         if max_properties is not None:
             schema['maxProperties'] = max_properties
 
-        return nested_definitions, schema
+        return {}, schema
 
     def iter_fields(self):
         def _extract_resolvables(dict_or_resolvable):
@@ -346,7 +364,7 @@ class BaseOfField(BaseSchemaField):
         id, res_scope = res_scope.alter(self.id)
         schema = OrderedDict() if ordered else {}
         schema = self._update_schema_with_common_fields(schema, id=id)
-        nested_definitions = {}
+        context = get_context()
 
         one_of = []
         with processing(AttributeStep('fields', role=role)):
@@ -365,12 +383,12 @@ class BaseOfField(BaseSchemaField):
                     field_definitions, field_schema = field.get_definitions_and_schema(
                         role=field_role, res_scope=res_scope,
                         ordered=ordered, ref_documents=ref_documents)
-                    nested_definitions.update(field_definitions)
+                    context.update(field_definitions)
                     one_of.append(field_schema)
             if not one_of:
                 raise SchemaGenerationException(u'Fields list is empty')
         schema[self._KEYWORD] = one_of
-        return nested_definitions, schema
+        return {}, schema
 
     def iter_fields(self):
         resolvables = []
@@ -528,8 +546,10 @@ class DocumentField(BaseField):
             document_definitions, document_schema = document_cls.get_definitions_and_schema(
                 role=new_role, res_scope=res_scope, ordered=ordered, ref_documents=ref_documents)
             if self.as_ref and not document_cls.is_recursive(role=new_role):
-                document_definitions[definition_id] = document_schema
-                return document_definitions, res_scope.create_ref(definition_id)
+                context = get_context()
+                context.update(document_definitions)
+                context.add(definition_id, document_schema)
+                return {}, res_scope.create_ref(definition_id)
             else:
                 return document_definitions, document_schema
 
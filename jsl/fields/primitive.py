@@ -3,7 +3,7 @@ from ..roles import DEFAULT_ROLE
 from ..resolutionscope import EMPTY_SCOPE
 from .._compat import OrderedDict
 from .base import BaseSchemaField
-from .util import validate, validate_regex
+from .util import validate, validate_regex, compile_regex
 
 
 __all__ = [
@@ -43,14 +43,31 @@ class StringField(BaseSchemaField):
     _FORMAT = None
 
     def __init__(self, pattern=None, format=None, min_length=None, max_length=None, **kwargs):
+        self._compiled_patterns = {}
         if pattern is not None:
-            validate(pattern, validate_regex)
+            validate(pattern, self._compile_pattern)
         self.pattern = pattern  #:
         self.format = format or self._FORMAT  #:
         self.min_length = min_length  #:
         self.max_length = max_length  #:
         super(StringField, self).__init__(**kwargs)
 
+    def _compile_pattern(self, pattern):
+        self._compiled_patterns[pattern] = validate_regex(pattern)
+
+    def get_compiled_pattern(self, role=DEFAULT_ROLE):
+        """Returns a compiled regular expression object for the :attr:`pattern`
+        resolved using ``role`` or ``None`` if there is no pattern.
+
+        .. versionadded:: 0.3.0
+        """
+        pattern = self.resolve_attr('pattern', role).value
+        if not pattern:
+            return None
+        if pattern not in self._compiled_patterns:
+            self._compiled_patterns[pattern] = compile_regex(pattern)
+        return self._compiled_patterns[pattern]
+
     def _get_definitions_and_schema(self, role=DEFAULT_ROLE, res_scope=EMPTY_SCOPE,
                                     ordered=False, ref_documents=None):
         id, res_scope = res_scope.alter(self.id)
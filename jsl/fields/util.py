@@ -5,15 +5,42 @@ import sre_constants
 from ..roles import Resolvable
 
 
-def validate_regex(regex):
+_REGEX_CACHE_MAX_SIZE = 512
+_regex_cache = {}
+
+
+def compile_regex(regex):
     """
-    :param str regex: A regular expression to validate.
+    Compiles ``regex`` using a cache shared by all the fields.
+
+    The cache is bounded by :data:`_REGEX_CACHE_MAX_SIZE` entries
+    and is cleared entirely once the limit is reached.
+
+    :param str regex: A regular expression to compile.
     :raises: ValueError
+    :returns: a compiled regular expression object
     """
     try:
-        re.compile(regex)
+        return _regex_cache[regex]
+    except KeyError:
+        pass
+    try:
+        compiled_regex = re.compile(regex)
     except sre_constants.error as e:
         raise ValueError('Invalid regular expression: {0}'.format(e))
+    if len(_regex_cache) >= _REGEX_CACHE_MAX_SIZE:
+        _regex_cache.clear()
+    _regex_cache[regex] = compiled_regex
+    return compiled_regex
+
+
+def validate_regex(regex):
+    """
+    :param str regex: A regular expression to validate.
+    :raises: ValueError
+    :returns: a compiled regular expression object
+    """
+    return compile_regex(regex)
 
 
 def validate(value_or_var, validator):
@@ -21,4 +48,4 @@ def validate(value_or_var, validator):
         for value in value_or_var.iter_possible_values():
             validator(value)
     else:
-        validator(value_or_var)
\ No newline at end of file
+        validator(value_or_var)
@@ -0,0 +1,87 @@
+# coding: utf-8
+"""
+Read-only schemas.
+
+A frozen schema consists of :class:`FrozenDict` (or :class:`FrozenOrderedDict`)
+and :class:`tuple` instances instead of dictionaries and lists. It can be shared
+between threads and requests without defensive copying, serialized by :mod:`json`
+as it is and turned back into a mutable schema by :func:`thaw`.
+"""
+from ._compat import iteritems, OrderedDict
+
+
+__all__ = ['FrozenDict', 'FrozenOrderedDict', 'freeze', 'thaw']
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError('{0} is immutable'.format(self.__class__.__name__))
+
+
+class FrozenDict(dict):
+    """A read-only :class:`dict`."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def __repr__(self):
+        return '{0}({1})'.format(self.__class__.__name__, dict.__repr__(self))
+
+
+def _create_frozen_ordered_dict(items):
+    rv = FrozenOrderedDict()
+    for key, value in items:
+        OrderedDict.__setitem__(rv, key, value)
+    return rv
+
+
+class FrozenOrderedDict(OrderedDict):
+    """A read-only :class:`~collections.OrderedDict`."""
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = move_to_end = _immutable
+
+    def __reduce__(self):
+        return _create_frozen_ordered_dict, (list(iteritems(self)),)
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(self.__class__.__name__, list(iteritems(self)))
+
+
+def freeze(value):
+    """Returns a read-only copy of a JSON-like ``value``: dictionaries
+    are replaced with :class:`FrozenDict` s (ordered ones with
+    :class:`FrozenOrderedDict` s) and lists with tuples.
+
+    Frozen dictionaries are returned as they are.
+
+    .. versionadded:: 0.3.0
+    """
+    if isinstance(value, (FrozenDict, FrozenOrderedDict)):
+        return value
+    elif isinstance(value, OrderedDict):
+        return _create_frozen_ordered_dict((k, freeze(v)) for k, v in iteritems(value))
+    elif isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in iteritems(value))
+    elif isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """Returns a mutable copy of a JSON-like ``value``: dictionaries
+    (frozen or not) are replaced with :class:`dict` s (ordered ones
+    with :class:`~collections.OrderedDict` s) and tuples with lists.
+
+    .. versionadded:: 0.3.0
+    """
+    if isinstance(value, OrderedDict):
+        return OrderedDict((k, thaw(v)) for k, v in iteritems(value))
+    elif isinstance(value, dict):
+        return dict((k, thaw(v)) for k, v in iteritems(value))
+    elif isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
@@ -0,0 +1,217 @@
+# coding: utf-8
+"""
+Bulk validation of newline-delimited JSON.
+
+:func:`validate_ndjson` reads NDJSON in large chunks of whole lines, validates
+the lines of every chunk against a :func:`compiled validator <jsl.validation.get_validator>`
+of a document in a pool of worker processes and writes the valid and the invalid
+lines to separate sinks, preserving their order::
+
+    from jsl.ndjson import validate_ndjson
+
+    with open('events.ndjson', 'rb') as source, \\
+            open('valid.ndjson', 'wb') as valid, open('invalid.ndjson', 'wb') as invalid:
+        summary = validate_ndjson(source, Event, valid_sink=valid, invalid_sink=invalid)
+
+It is also available from the command line (see ``jsl validate --help``)::
+
+    jsl validate app.events.Event events.ndjson --valid valid.ndjson --invalid invalid.ndjson
+
+Every worker compiles the validator once, and a bounded number of chunks are
+in flight at any time, so the memory usage does not depend on the input size.
+The document class must be importable by the workers (i.e. defined at the
+module level).
+"""
+import json
+import multiprocessing
+
+from .roles import DEFAULT_ROLE
+from .validation import get_validator
+from ._compat import iteritems, OrderedDict
+
+
+__all__ = ['validate_ndjson', 'Summary']
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+"""A default number of bytes to read at once."""
+
+_worker_state = {}
+
+
+def _iter_chunks(source, chunk_size):
+    """Yields pairs of (number of the first line, bytes of whole lines)."""
+    line_number = 1
+    rest = b''
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            break
+        data = rest + data
+        end = data.rfind(b'\n') + 1
+        if not end:
+            rest = data
+            continue
+        chunk, rest = data[:end], data[end:]
+        yield line_number, chunk
+        line_number += chunk.count(b'\n')
+    if rest:
+        yield line_number, rest
+
+
+def _init_worker(document_cls, role):
+    _worker_state['validator'] = get_validator(document_cls, role=role)
+
+
+def _validate_chunk(args):
+    """Validates the lines of a chunk. Returns a tuple of the valid lines,
+    the invalid lines and a list of (line number, errors) pairs where errors
+    are (path, keyword, message) tuples.
+    """
+    line_number, chunk = args
+    validator = _worker_state['validator']
+    valid = []
+    invalid = []
+    errors = []
+    lines = chunk.split(b'\n')
+    if not lines[-1]:
+        lines.pop()
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        line += b'\n'
+        try:
+            instance = json.loads(line.decode('utf-8'))
+        except ValueError as e:
+            line_errors = [((), None, u'Invalid JSON: {0}'.format(e))]
+        else:
+            line_errors = [(e.path, e.keyword, e.message)
+                           for e in validator.iter_errors(instance)]
+        if line_errors:
+            invalid.append(line)
+            errors.append((line_number + i, line_errors))
+        else:
+            valid.append(line)
+    return b''.join(valid), b''.join(invalid), errors
+
+
+class Summary(object):
+    """A result of :func:`validate_ndjson`.
+
+    .. versionadded:: 0.3.0
+    """
+
+    def __init__(self, max_examples=10):
+        #: A number of valid lines.
+        self.valid = 0
+        #: A number of invalid lines.
+        self.invalid = 0
+        #: Maps (path, keyword) pairs to the numbers of errors.
+        self.error_counts = {}
+        #: The first invalid lines: a list of (line number, errors) pairs.
+        self.examples = []
+        self._max_examples = max_examples
+
+    def _add(self, valid_count, errors):
+        self.valid += valid_count
+        self.invalid += len(errors)
+        for line_number, line_errors in errors:
+            for path, keyword, _ in line_errors:
+                key = (u'/'.join(str(p) for p in path), keyword)
+                self.error_counts[key] = self.error_counts.get(key, 0) + 1
+            if len(self.examples) < self._max_examples:
+                self.examples.append((line_number, line_errors))
+
+    def as_dict(self):
+        """Returns a JSON-serializable dictionary."""
+        return OrderedDict([
+            ('valid', self.valid),
+            ('invalid', self.invalid),
+            ('errors', [
+                OrderedDict([('path', path), ('keyword', keyword), ('count', count)])
+                for (path, keyword), count in sorted(
+                    iteritems(self.error_counts), key=lambda item: -item[1])
+            ]),
+            ('examples', [
+                OrderedDict([('line', line_number), ('errors', [
+                    OrderedDict([('path', list(path)), ('keyword', keyword),
+                                 ('message', message)])
+                    for path, keyword, message in line_errors
+                ])])
+                for line_number, line_errors in self.examples
+            ]),
+        ])
+
+
+def _write_errors(errors_sink, errors):
+    for line_number, line_errors in errors:
+        record = OrderedDict([('line', line_number), ('errors', [
+            OrderedDict([('path', list(path)), ('keyword', keyword), ('message', message)])
+            for path, keyword, message in line_errors
+        ])])
+        errors_sink.write(json.dumps(record).encode('utf-8') + b'\n')
+
+
+def validate_ndjson(source, document_cls, role=DEFAULT_ROLE, valid_sink=None,
+                    invalid_sink=None, errors_sink=None, processes=None,
+                    chunk_size=DEFAULT_CHUNK_SIZE, max_examples=10):
+    """Validates NDJSON read from ``source`` against the schema of ``document_cls``.
+
+    Empty lines are skipped. Lines that are not valid JSON are invalid.
+
+    .. versionadded:: 0.3.0
+
+    :param source: A binary file object to read UTF-8 encoded NDJSON from.
+    :param document_cls: A :class:`.Document` subclass.
+    :param str role: A role.
+    :param valid_sink: A binary file object to write the valid lines to.
+    :param invalid_sink: A binary file object to write the invalid lines to.
+    :param errors_sink:
+        A binary file object to write an NDJSON record with the line number
+        and the errors of every invalid line to.
+    :param int processes:
+        A number of worker processes. Defaults to the number of CPUs.
+        If ``1``, the lines are validated in the calling process.
+    :param int chunk_size: A number of bytes to read at once.
+    :param int max_examples: A maximum number of invalid lines to keep in the summary.
+    :raises: :class:`.SchemaGenerationException`
+    :rtype: :class:`Summary`
+    """
+    summary = Summary(max_examples=max_examples)
+
+    def handle(result):
+        valid, invalid, errors = result
+        if valid_sink is not None and valid:
+            valid_sink.write(valid)
+        if invalid_sink is not None and invalid:
+            invalid_sink.write(invalid)
+        if errors_sink is not None:
+            _write_errors(errors_sink, errors)
+        summary._add(valid.count(b'\n'), errors)
+
+    chunks = _iter_chunks(source, chunk_size)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes == 1:
+        _init_worker(document_cls, role)
+        for chunk in chunks:
+            handle(_validate_chunk(chunk))
+        return summary
+
+    # compile the validator in the parent first, so that schema generation
+    # errors are raised here and not in the workers
+    get_validator(document_cls, role=role)
+    pool = multiprocessing.Pool(processes, initializer=_init_worker,
+                                initargs=(document_cls, role))
+    try:
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.apply_async(_validate_chunk, (chunk,)))
+            # keep a bounded number of chunks in flight
+            while len(pending) >= 2 * processes:
+                handle(pending.pop(0).get())
+        for result in pending:
+            handle(result.get())
+    finally:
+        pool.terminate()
+        pool.join()
+    return summary
@@ -0,0 +1,264 @@
+# coding: utf-8
+"""
+Observers of schema generation.
+
+An observer is notified at the same points where the generation code reports
+its :class:`steps <.Step>`: when a :class:`.Document` or a :class:`.BaseField`
+begins and finishes generating its schema. It is also notified of
+:class:`variable <.Var>` resolutions, :meth:`recursion checks <.Document.is_recursive>`
+and lookups in the schema cache of :meth:`.Document.get_schema_bytes`::
+
+    from jsl.observers import AggregatingObserver, register
+
+    metrics = AggregatingObserver()
+    register(metrics)
+    ...
+    export(metrics.snapshot())
+
+When no observer is registered, the generation code only checks that
+the tuple of observers is empty.
+
+Observers are called from the thread that generates a schema, so they
+must be thread-safe if schemas are generated concurrently.
+"""
+import bisect
+import contextlib
+import threading
+import time
+
+from . import _instrumentation
+from .exceptions import DocumentStep, FieldStep
+
+
+__all__ = [
+    'Observer', 'AggregatingObserver', 'FrameTagger',
+    'register', 'unregister', 'observing', 'iter_observers',
+]
+
+_timer = getattr(time, 'perf_counter', time.time)
+_lock = threading.Lock()
+
+
+def _update_state(observers):
+    _instrumentation.observers = tuple(observers)
+    _instrumentation.tag_frames = any(o.tag_frames for o in observers)
+
+
+def register(observer):
+    """Registers ``observer``.
+
+    :type observer: :class:`Observer`
+    """
+    with _lock:
+        _update_state(_instrumentation.observers + (observer,))
+
+
+def unregister(observer):
+    """Unregisters ``observer``.
+
+    :type observer: :class:`Observer`
+    :raises: :class:`ValueError` if ``observer`` is not registered
+    """
+    with _lock:
+        observers = list(_instrumentation.observers)
+        observers.remove(observer)
+        _update_state(observers)
+
+
+def iter_observers():
+    """Iterates over the registered observers."""
+    return iter(_instrumentation.observers)
+
+
+@contextlib.contextmanager
+def observing(*observers):
+    """A context manager that registers ``observers`` for the duration
+    of its nested code block.
+    """
+    for observer in observers:
+        register(observer)
+    try:
+        yield
+    finally:
+        for observer in observers:
+            unregister(observer)
+
+
+class Observer(object):
+    """A base class for observers. All the methods do nothing."""
+
+    tag_frames = False
+    """
+    If ``True`` for any of the registered observers, the schema of every
+    document is generated in a frame named ``jsl:<module>.<class name>``.
+    See :class:`FrameTagger`.
+    """
+
+    def enter(self, step):
+        """Called when a :class:`~.DocumentStep` or a :class:`~.FieldStep` begins.
+
+        :type step: :class:`.Step`
+        """
+
+    def exit(self, step, definitions, schema):
+        """Called when ``step`` is finished.
+        ``definitions`` and ``schema`` are ``None`` if the step has failed.
+
+        :type step: :class:`.Step`
+        """
+
+    def var_resolved(self, var):
+        """Called when ``var`` is resolved.
+
+        :type var: :class:`.Var`
+        """
+
+    def recursion_checked(self, document_cls):
+        """Called when :meth:`.Document.is_recursive` is invoked."""
+
+    def cache_hit(self, document_cls, key):
+        """Called when the schema of ``document_cls`` is found in its cache."""
+
+    def cache_missed(self, document_cls, key):
+        """Called when the schema of ``document_cls`` is not found in its cache."""
+
+
+class FrameTagger(Observer):
+    """Makes the schema of every document be generated in a frame named
+    ``jsl:<module>.<class name>``, so that :mod:`cProfile` statistics show
+    the time spent on each document::
+
+        with observing(FrameTagger()):
+            cProfile.run('User.get_schema()', sort='cumulative')
+
+    Frames are renamed on Python 3.8 and later.
+    """
+    tag_frames = True
+
+
+class AggregatingObserver(Observer):
+    """Aggregates generation metrics: latency histograms per document,
+    numbers of visited nodes, variable resolutions, recursion checks and
+    schema cache hits and misses. All the methods are thread-safe.
+
+    :param buckets:
+        Upper bounds (in seconds) of the latency histogram buckets.
+        The last implicit bucket is unbounded.
+    :type buckets: sorted list of numbers
+    """
+
+    DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                       0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+    """Default latency histogram buckets."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Resets the collected metrics."""
+        with self._lock:
+            self._documents = {}
+            self._counters = {
+                'documents_visited': 0,
+                'fields_visited': 0,
+                'var_resolutions': 0,
+                'recursion_checks': 0,
+                'cache_hits': 0,
+                'cache_misses': 0,
+            }
+
+    def _get_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _get_document_metrics(self, document_cls):
+        name = '{0}.{1}'.format(document_cls.__module__, document_cls.__name__)
+        metrics = self._documents.get(name)
+        if metrics is None:
+            metrics = self._documents[name] = {
+                'count': 0,
+                'errors': 0,
+                'sum': 0.0,
+                'buckets': [0] * (len(self.buckets) + 1),
+                'cache_hits': 0,
+                'cache_misses': 0,
+            }
+        return metrics
+
+    def _increment(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def enter(self, step):
+        if isinstance(step, DocumentStep):
+            self._increment('documents_visited')
+            self._get_stack().append(_timer())
+        elif isinstance(step, FieldStep):
+            self._increment('fields_visited')
+
+    def exit(self, step, definitions, schema):
+        if not isinstance(step, DocumentStep):
+            return
+        elapsed = _timer() - self._get_stack().pop()
+        with self._lock:
+            metrics = self._get_document_metrics(step.entity)
+            if schema is None:
+                metrics['errors'] += 1
+            metrics['count'] += 1
+            metrics['sum'] += elapsed
+            metrics['buckets'][bisect.bisect_left(self.buckets, elapsed)] += 1
+
+    def var_resolved(self, var):
+        self._increment('var_resolutions')
+
+    def recursion_checked(self, document_cls):
+        self._increment('recursion_checks')
+
+    def cache_hit(self, document_cls, key):
+        with self._lock:
+            self._counters['cache_hits'] += 1
+            self._get_document_metrics(document_cls)['cache_hits'] += 1
+
+    def cache_missed(self, document_cls, key):
+        with self._lock:
+            self._counters['cache_misses'] += 1
+            self._get_document_metrics(document_cls)['cache_misses'] += 1
+
+    def snapshot(self):
+        """Returns a JSON-serializable copy of the collected metrics::
+
+            {
+                "buckets": [0.0001, ...],
+                "counters": {"fields_visited": 120, "cache_hits": 10, ...},
+                "cache_hit_rate": 0.9,
+                "documents": {
+                    "app.resources.User": {
+                        "count": 3, "errors": 0, "sum": 0.0042,
+                        "buckets": [0, 1, 2, ...],
+                        "cache_hits": 10, "cache_misses": 1
+                    },
+                    ...
+                }
+            }
+
+        ``documents.*.buckets`` are non-cumulative counts of generations whose
+        latency is less than or equal to the corresponding bound of ``buckets``
+        (the last one counts the rest).
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            documents = dict(
+                (name, dict(metrics, buckets=list(metrics['buckets'])))
+                for name, metrics in self._documents.items())
+        lookups = counters['cache_hits'] + counters['cache_misses']
+        return {
+            'buckets': list(self.buckets),
+            'counters': counters,
+            'cache_hit_rate': float(counters['cache_hits']) / lookups if lookups else None,
+            'documents': documents,
+        }
@@ -0,0 +1,279 @@
+# coding: utf-8
+"""
+Profiling of schema generation.
+
+Runs :meth:`.Document.get_definitions_and_schema` and reports how much
+time, schema nodes and output bytes each document and each document field
+account for, along with the number of :class:`variable <.Var>` resolutions
+and :meth:`recursion checks <.Document.is_recursive>`::
+
+    from jsl.profile import profile
+
+    report = profile(User, role='response')
+    print(report.format_table(sort_by='bytes'))
+    print(json.dumps(report.as_dict()))
+
+It can also be run from the command line::
+
+    python -m jsl.profile app.resources.User --role response --sort-by bytes
+
+All the numbers are inclusive, i.e. the numbers of a document include
+the numbers of the documents nested in it. Nodes and bytes are counted
+for both the schema and the definitions it produced.
+
+The profiler is an :class:`observer <jsl.observers.Observer>`, so it must not
+be used while schemas are being generated in other threads.
+"""
+import json
+import sys
+import time
+
+from .observers import Observer, observing
+from .encoding import encode_schema
+from .exceptions import DocumentStep, FieldStep
+from .fields import BaseField
+from .resolutionscope import ResolutionScope
+from .roles import DEFAULT_ROLE, Resolvable
+from ._compat import iteritems, itervalues, OrderedDict, import_module
+
+
+__all__ = ['profile', 'Profiler', 'Report', 'COLUMNS']
+
+COLUMNS = ('name', 'role', 'calls', 'time', 'nodes', 'bytes',
+           'var_resolutions', 'recursion_checks')
+"""Columns of the report rows."""
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+def count_nodes(value):
+    """Returns the number of JSON values in ``value``, including ``value`` itself."""
+    if isinstance(value, dict):
+        return 1 + sum(count_nodes(v) for v in itervalues(value))
+    elif isinstance(value, (list, tuple)):
+        return 1 + sum(count_nodes(v) for v in value)
+    return 1
+
+
+def _get_document_name(document_cls):
+    return '{0}.{1}'.format(document_cls.__module__, document_cls.__name__)
+
+
+class _Stats(object):
+    def __init__(self, name, role):
+        self.name = name
+        self.role = role
+        self.calls = 0
+        self.time = 0.0
+        self.nodes = 0
+        self.bytes = 0
+        self.var_resolutions = 0
+        self.recursion_checks = 0
+        self.results = []
+
+    def finalize(self):
+        for definitions, schema in self.results:
+            self.nodes += count_nodes(schema)
+            self.bytes += len(encode_schema(schema))
+            if definitions:
+                self.nodes += count_nodes(definitions)
+                self.bytes += len(encode_schema(definitions))
+        self.results = []
+
+    def as_dict(self):
+        return OrderedDict((column, getattr(self, column)) for column in COLUMNS)
+
+
+class Profiler(Observer):
+    """An :class:`~jsl.observers.Observer` that collects statistics
+    for :func:`profile`.
+    """
+
+    def __init__(self):
+        self._documents = OrderedDict()
+        self._fields = OrderedDict()
+        self._field_names = {}
+        self._stack = []
+
+    def _get_stats(self, stats, name, role):
+        key = (name, role)
+        if key not in stats:
+            stats[key] = _Stats(name, role)
+        return stats[key]
+
+    def _get_field_name(self, document_cls, field):
+        if document_cls not in self._field_names:
+            names = {}
+            for name, value in iteritems(document_cls._backend.properties):
+                values = value.iter_possible_values() if isinstance(value, Resolvable) else []
+                for possible_value in values:
+                    if isinstance(possible_value, BaseField):
+                        names[id(possible_value)] = (
+                            name if possible_value.name is None else possible_value.name)
+            self._field_names[document_cls] = names
+        return self._field_names[document_cls].get(id(field))
+
+    def _iter_open_stats(self):
+        seen = set()
+        for _, _, stats in self._stack:
+            if stats is not None and id(stats) not in seen:
+                seen.add(id(stats))
+                yield stats
+
+    def enter(self, step):
+        stats = None
+        if isinstance(step, DocumentStep):
+            stats = self._get_stats(self._documents, _get_document_name(step.entity), step.role)
+        elif isinstance(step, FieldStep) and len(self._stack) >= 2:
+            parent_step = self._stack[-1][0]
+            document_step = self._stack[-2][0]
+            if (isinstance(document_step, DocumentStep) and
+                    parent_step.entity is document_step.entity._backend):
+                name = self._get_field_name(document_step.entity, step.entity)
+                if name is not None:
+                    name = '{0}.{1}'.format(_get_document_name(document_step.entity), name)
+                    stats = self._get_stats(self._fields, name, step.role)
+        self._stack.append((step, _timer(), stats))
+
+    def exit(self, step, definitions, schema):
+        _, started_at, stats = self._stack.pop()
+        if stats is not None and schema is not None:
+            stats.calls += 1
+            stats.time += _timer() - started_at
+            stats.results.append((definitions, schema))
+
+    def var_resolved(self, var):
+        for stats in self._iter_open_stats():
+            stats.var_resolutions += 1
+
+    def recursion_checked(self, document_cls):
+        for stats in self._iter_open_stats():
+            stats.recursion_checks += 1
+
+    def get_report(self, total):
+        """Returns a :class:`Report`.
+
+        :param dict total: Overall statistics.
+        """
+        for stats in list(itervalues(self._documents)) + list(itervalues(self._fields)):
+            stats.finalize()
+        return Report(
+            documents=[s.as_dict() for s in itervalues(self._documents)],
+            fields=[s.as_dict() for s in itervalues(self._fields)],
+            total=total
+        )
+
+
+class Report(object):
+    """A result of :func:`profile`.
+
+    Time is measured in seconds, size in bytes of compact UTF-8 JSON.
+    """
+
+    def __init__(self, documents, fields, total):
+        #: A list of dictionaries describing documents (see :data:`COLUMNS`).
+        self.documents = documents
+        #: A list of dictionaries describing the top-level fields of documents.
+        self.fields = fields
+        #: A dictionary with the overall generation time, number of nodes and bytes.
+        self.total = total
+
+    def as_dict(self):
+        """Returns a JSON-serializable dictionary."""
+        return OrderedDict([
+            ('total', self.total),
+            ('documents', self.documents),
+            ('fields', self.fields),
+        ])
+
+    def format_table(self, kind='documents', sort_by='time', limit=None):
+        """Returns a plain text table.
+
+        :param str kind: ``"documents"`` or ``"fields"``.
+        :param str sort_by:
+            A column to sort rows by (in descending order, except for ``"name"``
+            and ``"role"``).
+        :param int limit: A maximum number of rows.
+        :rtype: str
+        """
+        if kind not in ('documents', 'fields'):
+            raise ValueError('kind must be either "documents" or "fields"')
+        if sort_by not in COLUMNS:
+            raise ValueError('Unknown column: {0!r}. Must be one of the following: '
+                             '{1!r}'.format(sort_by, list(COLUMNS)))
+        rows = sorted(getattr(self, kind), key=lambda row: row[sort_by],
+                      reverse=sort_by not in ('name', 'role'))
+        if limit is not None:
+            rows = rows[:limit]
+        lines = [COLUMNS]
+        for row in rows:
+            line = []
+            for column in COLUMNS:
+                value = row[column]
+                if column == 'time':
+                    value = '{0:.3f}ms'.format(value * 1000)
+                line.append(str(value))
+            lines.append(line)
+        widths = [max(len(line[i]) for line in lines) for i in range(len(COLUMNS))]
+        return '\n'.join(
+            '  '.join(value.ljust(width) if i < 2 else value.rjust(width)
+                      for i, (value, width) in enumerate(zip(line, widths))).rstrip()
+            for line in lines
+        )
+
+
+def profile(document_cls, role=DEFAULT_ROLE, ordered=False):
+    """Generates a schema of ``document_cls`` and collects statistics.
+
+    :param document_cls: A :class:`.Document` subclass.
+    :param str role: A role.
+    :param bool ordered: The same as for :meth:`.Document.get_schema`.
+    :raises: :class:`.SchemaGenerationException`
+    :rtype: :class:`Report`
+    """
+    profiler = Profiler()
+    res_scope = ResolutionScope(base=document_cls._options.id,
+                                current=document_cls._options.id)
+    with observing(profiler):
+        started_at = _timer()
+        definitions, schema = document_cls.get_definitions_and_schema(
+            role=role, res_scope=res_scope, ordered=ordered)
+        elapsed = _timer() - started_at
+    return profiler.get_report(total=OrderedDict([
+        ('time', elapsed),
+        ('nodes', count_nodes(schema) + count_nodes(definitions)),
+        ('bytes', len(encode_schema(schema)) + len(encode_schema(definitions))),
+        ('definitions', len(definitions)),
+    ]))
+
+
+def main(argv=None):
+    import argparse  # missing on Python 2.6
+
+    parser = argparse.ArgumentParser(
+        prog='python -m jsl.profile',
+        description='Reports schema generation costs of a JSL document.')
+    parser.add_argument('document', help='a dotted path to a document class, '
+                                         'e.g. "app.resources.User"')
+    parser.add_argument('--role', default=DEFAULT_ROLE)
+    parser.add_argument('--ordered', action='store_true')
+    parser.add_argument('--sort-by', default='time', choices=COLUMNS)
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--json', action='store_true', help='output a JSON report')
+    args = parser.parse_args(argv)
+
+    module_name, _, document_name = args.document.rpartition('.')
+    document_cls = getattr(import_module(module_name), document_name)
+    report = profile(document_cls, role=args.role, ordered=args.ordered)
+    if args.json:
+        sys.stdout.write(json.dumps(report.as_dict(), indent=2) + '\n')
+    else:
+        for kind in ('documents', 'fields'):
+            sys.stdout.write(report.format_table(kind=kind, sort_by=args.sort_by,
+                                                 limit=args.limit) + '\n\n')
+        sys.stdout.write('Total: {0:.3f}ms, {1} nodes, {2} bytes\n'.format(
+            report.total['time'] * 1000, report.total['nodes'], report.total['bytes']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# coding: utf-8
+"""
+Providers of dynamic ``enum`` s and ``default`` s.
+
+A callable ``enum`` or ``default`` is called every time a schema is generated,
+and schemas containing it can't be cached safely. A :class:`Provider` wraps
+a loading function and caches its result for ``ttl`` seconds (optionally
+revalidating it with a cheap ``version`` function when it expires)::
+
+    def load_countries():
+        with open('countries.json') as f:
+            return json.load(f)
+
+    countries = Provider(load_countries, ttl=60,
+                         version=lambda: os.path.getmtime('countries.json'))
+
+    class Address(Document):
+        country = StringField(enum=countries)
+
+Documents keep track of the providers their schemas depend on: cached
+schemas (see :meth:`.Document.get_schema_bytes`) are dropped as soon as
+the value of any of the providers changes, so they never get stale, and
+the loading function runs at most once per ``ttl``.
+
+:func:`refresh` reloads many expired providers at once, e.g. from
+a background job, so that requests do not have to wait for them.
+"""
+import threading
+import time
+import weakref
+
+
+__all__ = ['Provider', 'refresh']
+
+_timer = getattr(time, 'monotonic', time.time)
+
+_missing = object()
+
+_providers = weakref.WeakSet()
+
+
+class Provider(object):
+    """A callable that returns the cached result of ``load``.
+
+    .. versionadded:: 0.3.0
+
+    :param load: A function without arguments that returns the value.
+    :param ttl:
+        A number of seconds after which the value expires. If ``None``,
+        the value expires only when it is :meth:`invalidated <invalidate>`
+        (or, if ``version`` is specified, every time it is requested).
+    :type ttl: int or float
+    :param version:
+        A function without arguments that returns a token of the current version
+        of the value (e.g. a modification time of a file). If specified, an expired
+        value is reloaded only if the token has changed.
+    """
+
+    def __init__(self, load, ttl=None, version=None):
+        self.load = load  #:
+        self.ttl = ttl  #:
+        self.version = version  #:
+        #: A number that is incremented every time the value changes.
+        self.generation = 0
+        self._value = _missing
+        self._version_token = None
+        self._expires_at = None
+        self._invalidated = True
+        self._lock = threading.Lock()
+        _providers.add(self)
+
+    def __call__(self):
+        if self.is_expired():
+            self.refresh()
+        return self._value
+
+    def __repr__(self):
+        return '<Provider {0!r} ttl={1!r}>'.format(self.load, self.ttl)
+
+    def is_expired(self):
+        """Returns ``True`` if the value must be reloaded (or revalidated)."""
+        if self._invalidated:
+            return True
+        if self._expires_at is None:
+            return self.version is not None
+        return _timer() >= self._expires_at
+
+    def invalidate(self):
+        """Makes the provider reload the value the next time it is requested,
+        whatever the version is.
+        """
+        self._invalidated = True
+
+    def refresh(self, force=False):
+        """Reloads the value if it has expired (or if ``force`` is ``True``).
+
+        Documents that depend on the provider drop their cached schemas
+        when they notice that the value has changed.
+
+        :returns: ``True`` if the value has changed.
+        """
+        with self._lock:
+            # another thread may have refreshed the value while we were waiting
+            if not force and not self.is_expired():
+                return False
+            token = self.version() if self.version is not None else None
+            if (not force and not self._invalidated and self.version is not None and
+                    token == self._version_token):
+                self._touch()
+                return False
+            value = self.load()
+            self._version_token = token
+            self._touch()
+            if self._value is _missing or value != self._value:
+                self._value = value
+                self.generation += 1
+                return True
+            return False
+
+    def _touch(self):
+        self._invalidated = False
+        self._expires_at = None if self.ttl is None else _timer() + self.ttl
+
+
+def refresh(providers=None, force=False):
+    """Refreshes the expired ``providers`` (all the existing providers if ``None``)
+    one after another.
+
+    .. versionadded:: 0.3.0
+
+    :param providers: An iterable of :class:`Provider` s.
+    :param bool force: The same as for :meth:`Provider.refresh`.
+    :returns: A list of the providers which values have changed.
+    """
+    if providers is None:
+        providers = list(_providers)
+    return [provider for provider in providers if provider.refresh(force=force)]
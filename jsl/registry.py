@@ -3,6 +3,12 @@ from ._compat import itervalues
 
 
 _documents_registry = {}
+_version = 0
+
+
+def _changed():
+    global _version
+    _version += 1
 
 
 def get_document(name, module=None):
@@ -15,17 +21,25 @@ def put_document(name, document_cls, module=None):
     if module:
         name = '{0}.{1}'.format(module, name)
     _documents_registry[name] = document_cls
+    _changed()
 
 
 def remove_document(name, module=None):
     if module:
         name = '{0}.{1}'.format(module, name)
     del _documents_registry[name]
+    _changed()
 
 
 def iter_documents():
     return itervalues(_documents_registry)
 
 
+def get_version():
+    """Returns a number that changes every time the registry is changed."""
+    return _version
+
+
 def clear():
-    _documents_registry.clear()
\ No newline at end of file
+    _documents_registry.clear()
+    _changed()
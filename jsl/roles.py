@@ -1,10 +1,15 @@
 # coding: utf-8
 import collections
+import re
 
+from . import _instrumentation
 from ._compat import OrderedDict, iteritems, string_types
 
 
-__all__ = ['all_', 'not_', 'Var', 'Scope', 'DEFAULT_ROLE']
+__all__ = [
+    'all_', 'not_', 'and_', 'or_', 'in_', 'prefix', 'glob', 'regex', 'Matcher',
+    'Var', 'Scope', 'DEFAULT_ROLE',
+]
 
 DEFAULT_ROLE = 'default'
 """A default role."""
@@ -19,24 +24,306 @@ def all_(role):
     return True
 
 
+class Matcher(object):
+    """
+    A base class for declarative matchers.
+
+    A declarative matcher is described by a regular expression that matches
+    the whole role. It can be combined with other matchers using
+    ``&``, ``|`` and ``~`` operators (see :func:`and_`, :func:`or_` and
+    :func:`not_`) and it allows :class:`.Var` to resolve all of its matchers
+    with a single regular expression match.
+
+    Roles that are not strings are matched by :meth:`match_object`.
+
+    .. versionadded:: 0.3.0
+    """
+
+    pattern = None
+    """A regular expression that matches the whole role or ``None``
+    if the matcher contains opaque callables."""
+
+    _regex = None
+
+    def __call__(self, role):
+        if self.pattern is None or not isinstance(role, string_types):
+            return self.match_object(role)
+        regex = self._regex
+        if regex is None:
+            regex = self._regex = re.compile(r'(?:{0})\Z'.format(self.pattern), re.DOTALL)
+        return regex.match(role) is not None
+
+    def match_object(self, role):  # pragma: no cover
+        """Matches ``role`` without using :attr:`pattern`.
+
+        :rtype: bool
+        """
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return and_(self, other)
+
+    def __rand__(self, other):
+        return and_(other, self)
+
+    def __or__(self, other):
+        return or_(self, other)
+
+    def __ror__(self, other):
+        return or_(other, self)
+
+    def __invert__(self):
+        return not_(self)
+
+    def __repr__(self):
+        return '<{0} {1!r}>'.format(self.__class__.__name__, self.pattern)
+
+
+class _In(Matcher):
+    def __init__(self, roles):
+        self.roles = frozenset(roles)
+        strings = sorted(r for r in self.roles if isinstance(r, string_types))
+        self.pattern = '|'.join(re.escape(r) for r in strings) or '(?!)'
+
+    def match_object(self, role):
+        try:
+            return role in self.roles
+        except TypeError:
+            return False
+
+
+class _Prefix(Matcher):
+    def __init__(self, prefixes):
+        self.prefixes = tuple(prefixes)
+        self.pattern = '(?:{0}).*'.format(
+            '|'.join(re.escape(p) for p in self.prefixes) or '(?!)')
+
+    def match_object(self, role):
+        return False
+
+
+class _Regex(Matcher):
+    def __init__(self, patterns):
+        self.pattern = '|'.join('(?:{0})'.format(p) for p in patterns) or '(?!)'
+
+    def match_object(self, role):
+        return False
+
+
+class _Not(Matcher):
+    def __init__(self, matcher):
+        self.matcher = matcher
+        if matcher.pattern is not None:
+            self.pattern = r'(?!(?:{0})\Z).*'.format(matcher.pattern)
+
+    def match_object(self, role):
+        return not self.matcher(role)
+
+
+class _And(Matcher):
+    def __init__(self, matchers):
+        self.matchers = tuple(matchers)
+        patterns = [_get_pattern(m) for m in self.matchers]
+        if None not in patterns:
+            self.pattern = ''.join(r'(?=(?:{0})\Z)'.format(p) for p in patterns) + '.*'
+
+    def match_object(self, role):
+        return all(m(role) for m in self.matchers)
+
+
+class _Or(Matcher):
+    def __init__(self, matchers):
+        self.matchers = tuple(matchers)
+        patterns = [_get_pattern(m) for m in self.matchers]
+        if None not in patterns:
+            self.pattern = '|'.join('(?:{0})'.format(p) for p in patterns) or '(?!)'
+
+    def match_object(self, role):
+        return any(m(role) for m in self.matchers)
+
+
+def _get_pattern(matcher):
+    if matcher is all_:
+        return '.*'
+    return getattr(matcher, 'pattern', None) if isinstance(matcher, Matcher) else None
+
+
+def _translate_glob(pattern):
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == '*':
+            parts.append('.*')
+        elif c == '?':
+            parts.append('.')
+        elif c == '[':
+            j = i
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                parts.append('\\[')
+            else:
+                chars = pattern[i:j].replace('\\', '\\\\')
+                i = j + 1
+                if chars[0] == '!':
+                    chars = '^' + chars[1:]
+                elif chars[0] == '^':
+                    chars = '\\' + chars
+                parts.append('[{0}]'.format(chars))
+        else:
+            parts.append(re.escape(c))
+    return ''.join(parts)
+
+
+def in_(*roles):
+    """
+    Returns a matcher that returns ``True`` for the roles listed as arguments.
+
+    .. versionadded:: 0.3.0
+
+    :rtype: :class:`.Matcher`
+    """
+    return _In(roles)
+
+
+def prefix(*prefixes):
+    """
+    Returns a matcher that returns ``True`` for the roles that start with
+    any of the arguments. For example, ``prefix('api.v2.')`` matches
+    ``"api.v2.response"`` and ``"api.v2.response.admin"``.
+
+    .. versionadded:: 0.3.0
+
+    :rtype: :class:`.Matcher`
+    """
+    return _Prefix(prefixes)
+
+
+def glob(*patterns):
+    """
+    Returns a matcher that returns ``True`` for the roles that match any
+    of the shell-style patterns (see :mod:`fnmatch`), e.g. ``glob('api.*.admin')``.
+
+    .. versionadded:: 0.3.0
+
+    :rtype: :class:`.Matcher`
+    """
+    return _Regex([_translate_glob(p) for p in patterns])
+
+
+def _find_global_flags(pattern):
+    """Returns a global inline flags group (e.g. ``"(?i)"``) of ``pattern``
+    or ``None`` if there is no such group.
+    """
+    i, n = 0, len(pattern)
+    in_class = False
+    while i < n:
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if in_class:
+            if c == ']':
+                in_class = False
+        elif c == '[':
+            in_class = True
+            # "]" is a literal right after "[" or "[^"
+            if pattern[i + 1:i + 2] == '^':
+                i += 1
+            if pattern[i + 1:i + 2] == ']':
+                i += 1
+        elif pattern.startswith('(?', i):
+            j = i + 2
+            while j < n and pattern[j] in 'aiLmsux':
+                j += 1
+            if j > i + 2 and pattern[j:j + 1] == ')':
+                return pattern[i:j + 1]
+        i += 1
+    return None
+
+
+def regex(*patterns):
+    """
+    Returns a matcher that returns ``True`` for the roles that are entirely
+    matched by any of the regular expressions.
+    Patterns must not contain numbered backreferences and inline flags
+    such as ``(?i)``, as they are embedded into other regular expressions.
+
+    .. versionadded:: 0.3.0
+
+    :raises: :class:`ValueError` if a pattern is not a valid regular expression
+    :rtype: :class:`.Matcher`
+    """
+    for pattern in patterns:
+        flags = _find_global_flags(pattern)
+        if flags is not None:
+            raise ValueError(
+                u'Invalid regular expression: inline flags are not supported, '
+                u'list the alternatives explicitly instead (e.g. "[Aa]dmin" instead '
+                u'of "(?i)admin"): {0!r} contains {1!r}'.format(pattern, flags))
+        try:
+            re.compile(r'(?:{0})\Z'.format(pattern))
+        except re.error as e:
+            raise ValueError('Invalid regular expression: {0}'.format(e))
+    return _Regex(patterns)
+
+
 def not_(*roles):
     """
     Returns a matcher that returns ``True`` for all roles
     except those are listed as arguments.
 
-    :rtype: callable
+    .. versionchanged:: 0.3.0
+        Arguments can also be matchers, in which case the roles matched
+        by any of them are excluded.
+
+    :rtype: :class:`.Matcher`
+    """
+    if any(callable(role) for role in roles):
+        return _Not(or_(*roles))
+    return _Not(_In(roles))
+
+
+def and_(*matchers):
+    """
+    Returns a matcher that returns ``True`` for the roles matched by all of
+    the arguments. Arguments are processed the same way as :class:`.Var` matchers.
+
+    .. versionadded:: 0.3.0
+
+    :rtype: :class:`.Matcher`
+    """
+    return _And(construct_matcher(m) for m in matchers)
+
+
+def or_(*matchers):
     """
-    return lambda role: role not in roles
+    Returns a matcher that returns ``True`` for the roles matched by any of
+    the arguments. Arguments are processed the same way as :class:`.Var` matchers.
+
+    .. versionadded:: 0.3.0
+
+    :rtype: :class:`.Matcher`
+    """
+    return _Or(construct_matcher(m) for m in matchers)
+
+
+_RESOLUTIONS_CACHE_MAX_SIZE = 1024
 
 
 def construct_matcher(matcher):
     if callable(matcher):
         return matcher
     elif isinstance(matcher, string_types):
-        return lambda r: r == matcher
+        return _In([matcher])
     elif isinstance(matcher, collections.Iterable):
-        choices = frozenset(matcher)
-        return lambda r: r in choices
+        return _In(matcher)
     else:
         raise ValueError(
             'Unknown matcher type {} ({!r}). Only callables, '
@@ -88,8 +375,12 @@ class Var(Resolvable):
         Matchers are callables returning boolean values. Strings and
         iterables are also accepted and processed as follows:
 
-        * A string ``s`` will be replaced with a lambda ``lambda r: r == s``;
-        * An iterable ``i`` will be replaced with a lambda ``lambda r: r in i``.
+        * A string ``s`` will be replaced with ``in_(s)``;
+        * An iterable ``i`` will be replaced with ``in_(*i)``.
+
+        If all the matchers (including ``propagate``) are :class:`declarative <.Matcher>`
+        or :data:`all_`, they are combined into a single regular expression and
+        the resolutions of string roles are cached.
     :type values: dict or list of pairs
 
     :param default:
@@ -111,6 +402,8 @@ class Var(Resolvable):
                 self._values.append((matcher, value))
         self.default = default
         self._propagate = construct_matcher(propagate)
+        self._compiled = None
+        self._resolutions = {}
 
     @property
     def values(self):
@@ -144,6 +437,17 @@ class Var(Resolvable):
             the role is either a given ``role`` (if :attr:`propagate`` matcher
             returns ``True``) or :data:`.DEFAULT_ROLE` (otherwise).
         """
+        for observer in _instrumentation.observers:
+            observer.var_resolved(self)
+        if isinstance(role, string_types) and self._get_compiled():
+            try:
+                index, propagate = self._resolutions[role]
+            except KeyError:
+                index, propagate = self._resolutions[role] = self._match_compiled(role)
+                if len(self._resolutions) > _RESOLUTIONS_CACHE_MAX_SIZE:
+                    self._resolutions.clear()
+            value = self.default if index is None else self._values[index][1]
+            return Resolution(value, role if propagate else DEFAULT_ROLE)
         for matcher, matcher_value in self._values:
             if matcher(role):
                 value = matcher_value
@@ -153,6 +457,34 @@ class Var(Resolvable):
         new_role = role if self._propagate(role) else DEFAULT_ROLE
         return Resolution(value, new_role)
 
+    def _get_compiled(self):
+        """Combines the patterns of the matchers into a single regular expression
+        in which every matcher is a capturing group. The index of the last closed
+        group is the index of the first matching matcher.
+
+        Returns ``False`` if some of the matchers are not :class:`declarative <.Matcher>`.
+        """
+        if self._compiled is None:
+            patterns = [_get_pattern(matcher) for matcher, _ in self._values]
+            if None in patterns or _get_pattern(self._propagate) is None:
+                self._compiled = False
+            else:
+                group_indexes = {}
+                group = 1
+                for i, pattern in enumerate(patterns):
+                    group_indexes[group] = i
+                    group += 1 + re.compile(pattern, re.DOTALL).groups
+                regex = re.compile(r'(?:{0})\Z'.format(
+                    '|'.join('({0})'.format(p) for p in patterns) or '(?!)'), re.DOTALL)
+                self._compiled = (regex, group_indexes)
+        return self._compiled
+
+    def _match_compiled(self, role):
+        regex, group_indexes = self._compiled
+        match = regex.match(role)
+        index = group_indexes[match.lastindex] if match is not None else None
+        return index, bool(self._propagate(role))
+
 
 class Scope(object):
     """
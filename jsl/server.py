@@ -0,0 +1,273 @@
+# coding: utf-8
+"""
+A WSGI application that serves the schemas of all the registered documents.
+
+:class:`SchemaServer` exposes every document of the registry (every
+:class:`.Document` subclass that has been imported) at a stable URL made of
+its :meth:`definition id <.Document.get_definition_id>` and, optionally, one
+of the roles the server has been created for::
+
+    GET /app.resources.User              the schema for the default role
+    GET /app.resources.User/response     the schema for the "response" role
+    GET /_stats                          cache and generation statistics
+
+Schemas are served by :func:`jsl.serving.get_response`, with content coding
+negotiation and conditional GET support, from the schema caches of the
+documents. The server keeps track of the cached schemas it has served and
+drops the least recently used ones once their encoded variants take more
+than ``max_size`` bytes::
+
+    import app.resources
+    from jsl.server import SchemaServer
+
+    application = SchemaServer(roles=['request', 'response'])
+
+The same application is available from the command line (see ``jsl serve --help``)
+and as an ASGI application (see :func:`jsl.aio.asgi_app`).
+"""
+import json
+import threading
+import time
+
+from . import registry
+from .context import FULL_PROFILE
+from .roles import DEFAULT_ROLE, Resolvable
+from .serving import (get_response, negotiate_encoding, Response, _get_representation_key,
+                      _STATUSES, IDENTITY, GZIP, DEFAULT_COMPRESSION_LEVEL)
+from ._compat import iteritems, OrderedDict
+
+
+__all__ = ['SchemaServer', 'make_server', 'DEFAULT_MAX_SIZE']
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+"""A default number of bytes of the encoded schemas kept by a server."""
+
+STATS_PATH = '/_stats'
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+def _json_response(status, data, method='GET'):
+    body = json.dumps(data, sort_keys=True).encode('utf-8')
+    headers = [('Content-Type', 'application/json'), ('Cache-Control', 'no-store'),
+               ('Content-Length', str(len(body)))]
+    return Response(status, headers, body if method == 'GET' else b'')
+
+
+def _get_entry_size(entry):
+    if entry is None:
+        return 0
+    return sum(len(representation.body)
+               for representation in entry.representations.values())
+
+
+class SchemaServer(object):
+    """A WSGI application that serves the schemas of the registered documents.
+
+    .. versionadded:: 0.3.0
+
+    :param roles:
+        Roles to serve the schemas for (besides the default role) and to
+        :meth:`warm` the caches for when the server is created. Requests
+        for the other roles are responded to with ``404 Not Found``.
+    :param bool warm: If ``False``, the caches are not warmed.
+    :param int max_size:
+        A maximum number of bytes of the encoded schemas (and their compressed
+        variants) to keep in the caches.
+    :param int level: The same as for :func:`jsl.serving.get_response`.
+    :param str profile: The same as for :meth:`.Document.get_schema`.
+    :param str cache_control: The same as for :func:`jsl.serving.get_response`.
+    """
+
+    def __init__(self, roles=(DEFAULT_ROLE,), warm=True, max_size=DEFAULT_MAX_SIZE,
+                 level=DEFAULT_COMPRESSION_LEVEL, profile=FULL_PROFILE, cache_control=None):
+        self.roles = tuple(roles)  #:
+        self._served_roles = frozenset(self.roles) | frozenset([DEFAULT_ROLE])
+        self.max_size = max_size  #:
+        self.level = level  #:
+        self.profile = profile  #:
+        self.cache_control = cache_control  #:
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_version = None
+        # maps (document class, schema cache key) pairs to sizes, least recently used first
+        self._entries = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._generations = 0
+        self._generation_time = 0.0
+        self._max_generation_time = 0.0
+        if warm:
+            self.warm()
+
+    def __call__(self, environ, start_response):
+        response = self.handle(
+            environ.get('REQUEST_METHOD', 'GET'), environ.get('PATH_INFO', '/'),
+            accept_encoding=environ.get('HTTP_ACCEPT_ENCODING'),
+            if_none_match=environ.get('HTTP_IF_NONE_MATCH'))
+        start_response(_STATUSES[response.status], response.headers)
+        return [response.body]
+
+    def _get_index(self):
+        """Returns a tuple of a dictionary that maps definition ids to documents
+        and a list of documents which definition ids depend on roles.
+        """
+        version = registry.get_version()
+        if self._index is None or self._index_version != version:
+            static = {}
+            dynamic = []
+            for document_cls in list(registry.iter_documents()):
+                if isinstance(document_cls._options.definition_id, Resolvable):
+                    dynamic.append(document_cls)
+                else:
+                    static[document_cls.get_definition_id()] = document_cls
+            self._index, self._index_version = (static, dynamic), version
+        return self._index
+
+    def find_document(self, definition_id, role=DEFAULT_ROLE):
+        """Returns a registered document with the definition id ``definition_id``
+        for ``role`` or ``None`` if there is no such document.
+        """
+        static, dynamic = self._get_index()
+        document_cls = static.get(definition_id)
+        if document_cls is not None:
+            return document_cls
+        for document_cls in dynamic:
+            if document_cls.get_definition_id(role=role) == definition_id:
+                return document_cls
+        return None
+
+    def warm(self, encodings=(IDENTITY, GZIP)):
+        """Generates and caches the schemas of all the registered documents
+        for :attr:`roles` (once per :meth:`role class <.Document.get_role_class>`)
+        in ``encodings``.
+        """
+        for document_cls in list(registry.iter_documents()):
+            for equivalent_roles in document_cls.partition_roles(self.roles):
+                for encoding in encodings:
+                    self._get_response(document_cls, equivalent_roles[0], 'HEAD', encoding)
+
+    def handle(self, method, path, accept_encoding=None, if_none_match=None,
+               cached_only=False):
+        """Returns a :class:`jsl.serving.Response` to a request.
+
+        :param str method: A request method.
+        :param str path: A request path.
+        :param str accept_encoding: A value of the ``Accept-Encoding`` request header.
+        :param str if_none_match: A value of the ``If-None-Match`` request header.
+        :param bool cached_only:
+            If ``True`` and the response requires generating or compressing
+            a schema, ``None`` is returned instead.
+        :raises: :class:`.SchemaGenerationException`
+        """
+        if method not in ('GET', 'HEAD'):
+            return Response(405, [('Allow', 'GET, HEAD'), ('Content-Length', '0')], b'')
+        if path == STATS_PATH:
+            return _json_response(200, self.get_stats(), method=method)
+        parts = path.strip('/').split('/')
+        if len(parts) > 2 or not parts[0]:
+            return _json_response(404, {'error': 'Not found'}, method=method)
+        definition_id = parts[0]
+        role = parts[1] if len(parts) == 2 else DEFAULT_ROLE
+        if role not in self._served_roles:
+            # roles come from URLs and every one of them would take cache entries
+            return _json_response(404, {'error': 'Not found'}, method=method)
+        document_cls = self.find_document(definition_id, role=role)
+        if document_cls is None:
+            return _json_response(404, {'error': 'Not found'}, method=method)
+        encoding = negotiate_encoding(accept_encoding)
+        return self._get_response(document_cls, role, method, encoding,
+                                  if_none_match=if_none_match, cached_only=cached_only)
+
+    def _get_response(self, document_cls, role, method, encoding, if_none_match=None,
+                      cached_only=False):
+        if cached_only and any(provider.is_expired()
+                               for provider in document_cls._get_matchers()[3]):
+            # reloading a provider may block
+            return None
+        document_cls._check_providers()
+        key = document_cls._get_cache_key(role, False, False, profile=self.profile)
+        entry = document_cls._cache.get(key)
+        is_hit = (entry is not None and
+                  _get_representation_key(encoding, self.level) in entry.representations)
+        if not is_hit and cached_only:
+            return None
+        started_at = _timer()
+        response = get_response(
+            document_cls, role=role, method=method, accept_encoding=encoding,
+            if_none_match=if_none_match, level=self.level, profile=self.profile,
+            cache_control=self.cache_control)
+        elapsed = _timer() - started_at
+        with self._lock:
+            if is_hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+                self._generations += 1
+                self._generation_time += elapsed
+                self._max_generation_time = max(self._max_generation_time, elapsed)
+            self._touch(document_cls, key)
+        return response
+
+    def _touch(self, document_cls, key):
+        entry_key = (document_cls, key)
+        self._size -= self._entries.pop(entry_key, 0)
+        size = self._entries[entry_key] = _get_entry_size(document_cls._cache.get(key))
+        self._size += size
+        while self._size > self.max_size and len(self._entries) > 1:
+            (evicted_cls, evicted_key), evicted_size = next(iteritems(self._entries))
+            del self._entries[(evicted_cls, evicted_key)]
+            evicted_cls._cache.pop(evicted_key, None)
+            self._size -= evicted_size
+            self._evictions += 1
+
+    def get_stats(self):
+        """Returns a JSON-serializable dictionary of the cache statistics
+        and the generation latencies.
+        """
+        with self._lock:
+            requests = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': float(self._hits) / requests if requests else None,
+                'entries': len(self._entries),
+                'size': self._size,
+                'max_size': self.max_size,
+                'evictions': self._evictions,
+                'generation': {
+                    'count': self._generations,
+                    'total_seconds': self._generation_time,
+                    'mean_seconds': (self._generation_time / self._generations
+                                     if self._generations else None),
+                    'max_seconds': self._max_generation_time,
+                },
+            }
+
+
+def make_server(app, host='127.0.0.1', port=8000, quiet=False):
+    """Returns a multithreaded :mod:`wsgiref` server running ``app``.
+    Call ``serve_forever()`` on it to start serving.
+
+    .. versionadded:: 0.3.0
+
+    :param bool quiet: If ``True``, requests are not logged.
+    """
+    from wsgiref import simple_server
+    try:
+        from socketserver import ThreadingMixIn
+    except ImportError:  # Python 2
+        from SocketServer import ThreadingMixIn
+
+    class ThreadingWSGIServer(ThreadingMixIn, simple_server.WSGIServer):
+        daemon_threads = True
+
+    class RequestHandler(simple_server.WSGIRequestHandler):
+        def log_message(self, *args):
+            if not quiet:
+                simple_server.WSGIRequestHandler.log_message(self, *args)
+
+    return simple_server.make_server(host, port, app, server_class=ThreadingWSGIServer,
+                                     handler_class=RequestHandler)
@@ -0,0 +1,261 @@
+# coding: utf-8
+"""
+Serving schemas over HTTP.
+
+The schema cache of a document (see :meth:`.Document.get_schema_bytes`) holds,
+next to the encoded schema, its ``gzip`` and ``deflate`` compressed variants
+and a fingerprint of it. They are computed once, when first requested, and
+dropped together with the schema, so requests are served without compressing
+or hashing anything::
+
+    from jsl.serving import wsgi_response
+
+    def user_schema(environ, start_response):
+        return wsgi_response(User, environ, start_response, role='response')
+
+The helpers negotiate the content coding using the ``Accept-Encoding`` header,
+send the fingerprint as a strong ``ETag`` (one per coding) and respond with
+``304 Not Modified`` if it matches ``If-None-Match``. See :func:`jsl.aio.asgi_response`
+for an ASGI counterpart.
+"""
+import collections
+import hashlib
+import zlib
+
+from .context import FULL_PROFILE
+from .roles import DEFAULT_ROLE
+
+
+__all__ = ['Representation', 'Response', 'get_representation', 'get_response',
+           'negotiate_encoding', 'compress', 'wsgi_response',
+           'IDENTITY', 'GZIP', 'DEFLATE', 'DEFAULT_COMPRESSION_LEVEL']
+
+IDENTITY = 'identity'
+GZIP = 'gzip'
+DEFLATE = 'deflate'
+
+DEFAULT_COMPRESSION_LEVEL = 6
+"""A default :mod:`zlib` compression level."""
+
+# gzip and zlib (which "deflate" stands for in HTTP) containers
+_WBITS = {GZIP: 16 + zlib.MAX_WBITS, DEFLATE: zlib.MAX_WBITS}
+
+# preferred codings go first
+_ENCODINGS = (GZIP, DEFLATE, IDENTITY)
+
+_STATUSES = {
+    200: '200 OK',
+    304: '304 Not Modified',
+    404: '404 Not Found',
+    405: '405 Method Not Allowed',
+}
+
+Representation = collections.namedtuple('Representation', ['body', 'encoding', 'etag'])
+"""
+An encoded schema, a :class:`~collections.namedtuple` returned by
+:func:`get_representation`.
+
+.. attribute:: body
+
+    UTF-8 JSON bytes, compressed using :attr:`encoding`.
+
+.. attribute:: encoding
+
+    A content coding: :data:`IDENTITY`, :data:`GZIP` or :data:`DEFLATE`.
+
+.. attribute:: etag
+
+    A quoted strong entity tag: the fingerprint of the schema (followed by
+    the coding if it is not :data:`IDENTITY`).
+"""
+
+Response = collections.namedtuple('Response', ['status', 'headers', 'body'])
+"""
+A :class:`~collections.namedtuple` returned by :func:`get_response`.
+
+.. attribute:: status
+
+    An integer status code.
+
+.. attribute:: headers
+
+    A list of (name, value) pairs of native strings.
+
+.. attribute:: body
+
+    Bytes.
+"""
+
+_METHOD_NOT_ALLOWED = Response(405, [('Allow', 'GET, HEAD'), ('Content-Length', '0')], b'')
+
+
+def compress(data, encoding, level=DEFAULT_COMPRESSION_LEVEL):
+    """Compresses ``data`` using :mod:`zlib`.
+
+    :param bytes data: Data to compress.
+    :param str encoding: :data:`GZIP` or :data:`DEFLATE`.
+    :param int level: A compression level from 0 to 9.
+    :rtype: bytes
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    return compressor.compress(data) + compressor.flush()
+
+
+def _get_representation_key(encoding, level):
+    return encoding, level if encoding != IDENTITY else None
+
+
+def get_representation(document_cls, role=DEFAULT_ROLE, encoding=IDENTITY,
+                       level=DEFAULT_COMPRESSION_LEVEL, profile=FULL_PROFILE):
+    """Returns the canonically encoded schema of ``document_cls``
+    (see :meth:`.Document.get_schema_bytes`) compressed using ``encoding``.
+
+    The result is cached along with the schema, so the schema is compressed
+    at most once per its version, coding and ``level``.
+
+    .. versionadded:: 0.3.0
+
+    :param document_cls: A :class:`.Document` subclass.
+    :param str role: A role.
+    :param str encoding: :data:`IDENTITY`, :data:`GZIP` or :data:`DEFLATE`.
+    :param int level: A compression level from 0 to 9.
+    :param str profile: The same as for :meth:`.Document.get_schema`.
+    :raises: :class:`.SchemaGenerationException`
+    :rtype: :class:`Representation`
+    """
+    if encoding not in _ENCODINGS:
+        raise ValueError(u'Unknown encoding: {0!r}'.format(encoding))
+    entry = document_cls._get_cache_entry(role, False, False, profile=profile)
+    key = _get_representation_key(encoding, level)
+    representation = entry.representations.get(key)
+    if representation is None:
+        identity = entry.representations.get((IDENTITY, None))
+        if identity is None:
+            body = entry.get_encoded(True)
+            identity = entry.representations[(IDENTITY, None)] = Representation(
+                body, IDENTITY, '"{0}"'.format(hashlib.sha1(body).hexdigest()))
+        if encoding == IDENTITY:
+            return identity
+        representation = entry.representations[key] = Representation(
+            compress(identity.body, encoding, level=level), encoding,
+            '{0}-{1}"'.format(identity.etag[:-1], encoding))
+    return representation
+
+
+def _parse_qvalue(value):
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+def negotiate_encoding(accept_encoding):
+    """Chooses a content coding acceptable according to the value of
+    an ``Accept-Encoding`` header, preferring :data:`GZIP` to :data:`DEFLATE`
+    to :data:`IDENTITY` if their quality values are equal.
+
+    .. versionadded:: 0.3.0
+
+    :param str accept_encoding: A header value or ``None`` if it is missing.
+    :returns:
+        :data:`IDENTITY`, :data:`GZIP` or :data:`DEFLATE`. :data:`IDENTITY`
+        is returned if none of them is acceptable.
+    """
+    if not accept_encoding:
+        return IDENTITY
+    qvalues = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                qvalue = _parse_qvalue(value.strip())
+        if coding == 'x-gzip':
+            coding = GZIP
+        qvalues[coding] = qvalue
+    default = qvalues.get('*')
+    best, best_qvalue = IDENTITY, 0.0
+    for encoding in _ENCODINGS:
+        qvalue = qvalues.get(encoding, default)
+        if qvalue is None:
+            # identity is acceptable unless excluded explicitly
+            qvalue = 0.001 if encoding == IDENTITY else 0.0
+        if qvalue > best_qvalue:
+            best, best_qvalue = encoding, qvalue
+    return best
+
+
+def _etag_matches(etag, if_none_match):
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def get_response(document_cls, role=DEFAULT_ROLE, method='GET', accept_encoding=None,
+                 if_none_match=None, level=DEFAULT_COMPRESSION_LEVEL, profile=FULL_PROFILE,
+                 cache_control=None):
+    """Returns a framework-agnostic HTTP response with the schema of ``document_cls``.
+
+    .. versionadded:: 0.3.0
+
+    :param document_cls: A :class:`.Document` subclass.
+    :param str role: A role.
+    :param str method: A request method. Methods other than ``GET`` and ``HEAD``
+                       are not allowed.
+    :param str accept_encoding: A value of the ``Accept-Encoding`` request header.
+    :param str if_none_match: A value of the ``If-None-Match`` request header.
+    :param int level: A compression level from 0 to 9.
+    :param str profile: The same as for :meth:`.Document.get_schema`.
+    :param str cache_control: A value of the ``Cache-Control`` response header.
+    :raises: :class:`.SchemaGenerationException`
+    :rtype: :class:`Response`
+    """
+    if method not in ('GET', 'HEAD'):
+        return _METHOD_NOT_ALLOWED
+    encoding = negotiate_encoding(accept_encoding)
+    representation = get_representation(
+        document_cls, role=role, encoding=encoding, level=level, profile=profile)
+    return _make_response(representation, method, if_none_match, cache_control)
+
+
+def _make_response(representation, method, if_none_match, cache_control):
+    """Returns a :class:`Response` to a ``GET`` or ``HEAD`` request
+    with ``representation``.
+    """
+    encoding = representation.encoding
+    headers = [('ETag', representation.etag), ('Vary', 'Accept-Encoding')]
+    if cache_control is not None:
+        headers.append(('Cache-Control', cache_control))
+    if if_none_match and _etag_matches(representation.etag, if_none_match):
+        return Response(304, headers, b'')
+    headers.append(('Content-Type', 'application/schema+json'))
+    if encoding != IDENTITY:
+        headers.append(('Content-Encoding', encoding))
+    headers.append(('Content-Length', str(len(representation.body))))
+    return Response(200, headers, representation.body if method == 'GET' else b'')
+
+
+def wsgi_response(document_cls, environ, start_response, role=DEFAULT_ROLE,
+                  level=DEFAULT_COMPRESSION_LEVEL, profile=FULL_PROFILE, cache_control=None):
+    """Responds to a WSGI request with the schema of ``document_cls``
+    (see :func:`get_response`). Returns an iterable of bytes.
+
+    .. versionadded:: 0.3.0
+    """
+    response = get_response(
+        document_cls, role=role, method=environ.get('REQUEST_METHOD', 'GET'),
+        accept_encoding=environ.get('HTTP_ACCEPT_ENCODING'),
+        if_none_match=environ.get('HTTP_IF_NONE_MATCH'),
+        level=level, profile=profile, cache_control=cache_control)
+    start_response(_STATUSES[response.status], response.headers)
+    return [response.body]
@@ -0,0 +1,248 @@
+# coding: utf-8
+"""
+Access to subschemas of documents by JSON pointers.
+
+:func:`get_subschema` returns the part of the schema of a document identified
+by a `JSON pointer`_ without generating the whole schema: it walks the fields
+along the pointer (through ``properties``, ``patternProperties``,
+``additionalProperties``, ``items``, ``additionalItems``, ``allOf``, ``anyOf``,
+``oneOf``, ``not`` and nested documents) and generates only the field the
+pointer ends at::
+
+    >>> get_subschema(User, '#/properties/address/properties/zip')
+    {'type': 'string', 'pattern': '^[0-9]{5}$'}
+
+The result is the same as the subschema found by the pointer in the schema
+returned by :meth:`.Document.get_schema`, except that:
+
+* the definitions it refers to (and only them) are added to it as
+  a ``"definitions"`` section;
+* ``$ref`` s to definitions are followed, so that a pointer can go through
+  nested documents regardless of their ``as_ref`` option.
+
+Parts of schemas that can not be navigated field by field (e.g. recursive
+documents and documents with parents in ``allOf``, ``anyOf`` and ``oneOf``
+:ref:`inheritance modes <inheritance>`) are generated as a whole.
+
+.. _JSON pointer: https://tools.ietf.org/html/rfc6901
+"""
+import collections
+
+from .context import collect, finalize_definitions, FULL_PROFILE
+from .fields import (BaseField, ArrayField, DictField, DocumentField, NotField,
+                     OneOfField, AnyOfField, AllOfField)
+from .resolutionscope import ResolutionScope
+from .roles import DEFAULT_ROLE, Resolvable
+from ._compat import iteritems, string_types, OrderedDict
+
+
+__all__ = ['get_subschema']
+
+_DEFINITIONS_PREFIX = '#/definitions/'
+
+_Node = collections.namedtuple('_Node', ['field', 'role', 'res_scope'])
+
+
+def _parse_pointer(pointer):
+    if pointer.startswith('#'):
+        pointer = pointer[1:]
+    if not pointer:
+        return []
+    if not pointer.startswith('/'):
+        raise ValueError(u'{0!r} is not a JSON pointer'.format(pointer))
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer.split('/')[1:]]
+
+
+def _is_navigable(document_cls, role):
+    """Returns ``True`` if the schema of ``document_cls`` is the schema of its
+    backend, i.e. it is neither recursive nor combined with its parents.
+    """
+    if document_cls._parent_documents:
+        return False
+    key = ('recursive', document_cls.get_role_class(role))
+    is_recursive = document_cls._cache.get(key)
+    if is_recursive is None:
+        is_recursive = document_cls._cache[key] = document_cls.is_recursive(role=role)
+    return not is_recursive
+
+
+def _resolve_field(value, role):
+    """Returns a node field and its role or ``None`` if ``value``
+    does not resolve to a field.
+    """
+    if not isinstance(value, Resolvable):
+        return None
+    field, field_role = value.resolve(role)
+    if not isinstance(field, BaseField):
+        return None
+    return field, field_role
+
+
+def _get_item(fields, fields_role, token):
+    """Returns the field at the index ``token`` among the ``fields`` that
+    resolve to fields (the others are skipped during generation).
+    """
+    if not isinstance(fields, (list, tuple)) or not token.isdigit():
+        return None
+    resolved = [field for field in (_resolve_field(f, fields_role) for f in fields)
+                if field is not None]
+    index = int(token)
+    return resolved[index] if index < len(resolved) else None
+
+
+def _step(node, tokens, i):
+    """Returns a tuple of the node a pointer leads to from ``node`` and
+    a number of the consumed tokens or ``None`` if the pointer can not be
+    followed without generating ``node``.
+    """
+    field, role, res_scope = node
+    if isinstance(field, DocumentField):
+        document_cls = field.document_cls
+        new_role = role
+        if field.owner_cls and not field.owner_cls._options.roles_to_propagate(role):
+            new_role = DEFAULT_ROLE
+        if not _is_navigable(document_cls, new_role):
+            return None
+        return _Node(document_cls._backend, new_role, res_scope), 0
+
+    token = tokens[i]
+    next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+    rv = None
+    consumed = 1
+    if isinstance(field, DictField):
+        if token == 'properties' and next_token is not None:
+            consumed = 2
+            document_cls = getattr(field, 'document_cls', None)
+            if document_cls is not None:
+                name = document_cls.get_metadata(role).properties.get(next_token)
+                if name is not None:
+                    resolutions = document_cls._get_resolved_fields(role)[0]
+                    rv = resolutions[name].value, resolutions[name].role
+            else:
+                properties, properties_role = field.resolve_attr('properties', role)
+                if isinstance(properties, dict) and next_token in properties:
+                    rv = _resolve_field(properties[next_token], properties_role)
+        elif token == 'patternProperties' and next_token is not None:
+            consumed = 2
+            properties, properties_role = field.resolve_attr('pattern_properties', role)
+            if isinstance(properties, dict) and next_token in properties:
+                rv = _resolve_field(properties[next_token], properties_role)
+        elif token == 'additionalProperties':
+            rv = _resolve_field(*field.resolve_attr('additional_properties', role))
+    elif isinstance(field, ArrayField):
+        if token == 'items':
+            items, items_role = field.resolve_attr('items', role)
+            if isinstance(items, BaseField):
+                rv = items, items_role
+            elif next_token is not None:
+                consumed = 2
+                rv = _get_item(items, items_role, next_token)
+        elif token == 'additionalItems':
+            rv = _resolve_field(*field.resolve_attr('additional_items', role))
+    elif isinstance(field, (OneOfField, AnyOfField, AllOfField)):
+        if token == field._KEYWORD and next_token is not None:
+            consumed = 2
+            fields, fields_role = field.resolve_attr('fields', role)
+            rv = _get_item(fields, fields_role, next_token)
+    elif isinstance(field, NotField):
+        if token == 'not':
+            negated_field, negated_field_role = field.resolve_attr('field', role)
+            if isinstance(negated_field, BaseField):
+                rv = negated_field, negated_field_role
+    if rv is None:
+        return None
+    # the same scope the field passes to its nested fields
+    _, child_scope = res_scope.alter(field.id)
+    return _Node(rv[0], rv[1], child_scope), consumed
+
+
+def _resolve_in_schema(schema, definitions, tokens, pointer):
+    """Resolves ``tokens`` in ``schema``, following references to ``definitions``."""
+    value = schema
+    for token in tokens:
+        if isinstance(value, dict):
+            if token not in value:
+                ref = value.get('$ref')
+                if isinstance(ref, string_types) and _DEFINITIONS_PREFIX in ref:
+                    value = definitions.get(ref.partition(_DEFINITIONS_PREFIX)[2], {})
+            if token in value:
+                value = value[token]
+                continue
+        elif isinstance(value, list) and token.isdigit() and int(token) < len(value):
+            value = value[int(token)]
+            continue
+        raise ValueError(u'{0!r} does not point to a part of the schema'.format(pointer))
+    return value
+
+
+def _collect_referenced_definitions(value, definitions, referenced):
+    if isinstance(value, dict):
+        ref = value.get('$ref')
+        if isinstance(ref, string_types) and _DEFINITIONS_PREFIX in ref:
+            definition_id = ref.partition(_DEFINITIONS_PREFIX)[2]
+            if definition_id in definitions and definition_id not in referenced:
+                referenced[definition_id] = definitions[definition_id]
+                _collect_referenced_definitions(definitions[definition_id], definitions,
+                                                referenced)
+        for key, item in iteritems(value):
+            if key != '$ref':
+                _collect_referenced_definitions(item, definitions, referenced)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_referenced_definitions(item, definitions, referenced)
+
+
+def get_subschema(document_cls, pointer, role=DEFAULT_ROLE, ordered=False,
+                  profile=FULL_PROFILE):
+    """Returns the part of the schema of ``document_cls`` identified by ``pointer``
+    along with the definitions it refers to, generating only that part if possible.
+
+    .. versionadded:: 0.3.0
+
+    :param document_cls: A :class:`.Document` subclass.
+    :param str pointer:
+        A JSON pointer, optionally prefixed with ``#``
+        (e.g. ``"#/properties/address/properties/zip"``).
+    :param str role: A role.
+    :param bool ordered: The same as for :meth:`.Document.get_schema`.
+    :param str profile: The same as for :meth:`.Document.get_schema`.
+    :raises:
+        :class:`ValueError` if ``pointer`` is not a valid JSON pointer or
+        does not point to a part of the schema;
+        :class:`.SchemaGenerationException`
+    """
+    tokens = _parse_pointer(pointer)
+    node = None
+    i = 0
+    if tokens and _is_navigable(document_cls, role):
+        res_scope = ResolutionScope(base=document_cls._options.id,
+                                    current=document_cls._options.id)
+        current = _Node(document_cls._backend, role, res_scope)
+        while i < len(tokens):
+            step = _step(current, tokens, i)
+            if step is None:
+                break
+            current, consumed = step
+            i += consumed
+            if consumed:
+                node = current
+        if node is not None and i < len(tokens) and isinstance(node.field, DocumentField):
+            # the tokens are resolved in the schema of the nested document
+            node = current
+
+    if node is None:
+        schema = document_cls.get_schema(role=role, ordered=ordered, profile=profile)
+        definitions = schema.get('definitions', {})
+        value = _resolve_in_schema(schema, definitions, tokens, pointer)
+    else:
+        definitions, schema = collect(node.field.get_definitions_and_schema, profile=profile,
+                                      role=node.role, res_scope=node.res_scope, ordered=ordered)
+        value = _resolve_in_schema(schema, definitions, tokens[i:], pointer)
+
+    if isinstance(value, dict) and definitions:
+        referenced = {}
+        _collect_referenced_definitions(value, definitions, referenced)
+        if referenced:
+            value = (OrderedDict if ordered else dict)(value)
+            value['definitions'] = finalize_definitions(referenced, ordered)
+    return value
@@ -0,0 +1,640 @@
+# coding: utf-8
+"""
+Validation of instances against generated schemas.
+
+A :class:`Validator` is compiled from a JSON schema (draft 4) once: every
+subschema is turned into a list of checks, regular expressions are compiled
+and enums are turned into sets, so validating an instance does not involve
+interpreting the schema::
+
+    from jsl.validation import get_validator
+
+    validator = get_validator(User, role='request')
+    for error in validator.iter_errors(payload):
+        print(error.path, error.message)
+
+Large JSON arrays can be validated without loading them into memory
+by :func:`iter_array_errors`, which parses a file object incrementally and
+validates the items as they arrive::
+
+    with open('users.json', 'rb') as f:
+        for error in iter_array_errors(f, ArrayField(DocumentField(User))):
+            ...
+
+The ``"format"`` keyword is not checked.
+"""
+import codecs
+import json
+import numbers
+
+from .exceptions import ValidationError
+from .fields.util import compile_regex
+from .roles import DEFAULT_ROLE
+from ._compat import iteritems, string_types, text_type, OrderedDict
+
+
+__all__ = ['Validator', 'get_validator', 'iter_array_errors', 'DEFAULT_MAX_VALUE_SIZE']
+
+_json_decoder = json.JSONDecoder()
+
+_TYPE_CHECKS = {
+    'array': lambda v: isinstance(v, list),
+    'boolean': lambda v: isinstance(v, bool),
+    'integer': lambda v: isinstance(v, numbers.Integral) and not isinstance(v, bool),
+    'null': lambda v: v is None,
+    'number': lambda v: isinstance(v, numbers.Real) and not isinstance(v, bool),
+    'object': lambda v: isinstance(v, dict),
+    'string': lambda v: isinstance(v, string_types),
+}
+
+
+def _make_key(value):
+    """Returns a hashable key such that two JSON values are equal
+    if and only if their keys are equal (``true`` is not equal to ``1``).
+    """
+    if isinstance(value, bool):
+        return 'bool', value
+    elif isinstance(value, numbers.Real):
+        return 'number', value
+    elif isinstance(value, dict):
+        return 'object', frozenset((k, _make_key(v)) for k, v in iteritems(value))
+    elif isinstance(value, (list, tuple)):
+        return 'array', tuple(_make_key(v) for v in value)
+    return type(value).__name__, value
+
+
+def _unescape_pointer_token(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+class _Compiler(object):
+    def __init__(self, root):
+        self.root = root
+        #: Maps JSON pointers to lists of checks, filled in lazily
+        #: to allow recursive references
+        self.refs = {}
+
+    def resolve_ref(self, ref):
+        _, _, pointer = ref.partition('#')
+        if pointer not in self.refs:
+            checks = self.refs[pointer] = []
+            schema = self.root
+            for token in pointer.split('/')[1:]:
+                token = _unescape_pointer_token(token)
+                schema = schema[int(token) if isinstance(schema, list) else token]
+            checks.extend(self.compile(schema))
+        return self.refs[pointer]
+
+    def compile(self, schema):
+        """Returns a list of checks. A check is a function that takes
+        an instance and a path and yields :class:`.ValidationError` s.
+        """
+        if '$ref' in schema:
+            ref_checks = self.resolve_ref(schema['$ref'])
+            return [lambda instance, path: _run(ref_checks, instance, path)]
+        checks = []
+        for keyword, value in iteritems(schema):
+            method = getattr(self, '_compile_' + keyword, None)
+            if method is not None:
+                check = method(value, schema)
+                if check is not None:
+                    checks.append(check)
+        return checks
+
+    def _compile_type(self, value, schema):
+        types = [value] if isinstance(value, string_types) else value
+        type_checks = [_TYPE_CHECKS[t] for t in types]
+        message = u'{{0!r}} is not of type {0}'.format(
+            u', '.join(repr(text_type(t)) for t in types))
+
+        def check(instance, path):
+            if not any(type_check(instance) for type_check in type_checks):
+                yield ValidationError(message.format(instance), path, 'type')
+        return check
+
+    def _compile_enum(self, value, schema):
+        keys = frozenset(_make_key(v) for v in value)
+
+        def check(instance, path):
+            if _make_key(instance) not in keys:
+                yield ValidationError(u'{0!r} is not one of {1!r}'.format(instance, value),
+                                      path, 'enum')
+        return check
+
+    # objects
+
+    def _compile_properties(self, value, schema):
+        properties = [(name, self.compile(subschema)) for name, subschema in iteritems(value)]
+
+        def check(instance, path):
+            if isinstance(instance, dict):
+                for name, checks in properties:
+                    if name in instance:
+                        for error in _run(checks, instance[name], path + (name,)):
+                            yield error
+        return check
+
+    def _compile_patternProperties(self, value, schema):
+        pattern_properties = [(compile_regex(pattern), self.compile(subschema))
+                              for pattern, subschema in iteritems(value)]
+
+        def check(instance, path):
+            if isinstance(instance, dict):
+                for regex, checks in pattern_properties:
+                    for name, item in iteritems(instance):
+                        if regex.search(name):
+                            for error in _run(checks, item, path + (name,)):
+                                yield error
+        return check
+
+    def _compile_additionalProperties(self, value, schema):
+        if value is True:
+            return None
+        properties = frozenset(schema.get('properties', ()))
+        regexes = [compile_regex(pattern) for pattern in schema.get('patternProperties', ())]
+        checks = None if value is False else self.compile(value)
+
+        def check(instance, path):
+            if not isinstance(instance, dict):
+                return
+            for name, item in iteritems(instance):
+                if name in properties or any(regex.search(name) for regex in regexes):
+                    continue
+                if checks is None:
+                    yield ValidationError(
+                        u'Additional properties are not allowed ({0!r} was unexpected)'.format(
+                            name), path, 'additionalProperties')
+                else:
+                    for error in _run(checks, item, path + (name,)):
+                        yield error
+        return check
+
+    def _compile_required(self, value, schema):
+        def check(instance, path):
+            if isinstance(instance, dict):
+                for name in value:
+                    if name not in instance:
+                        yield ValidationError(u'{0!r} is a required property'.format(name),
+                                              path, 'required')
+        return check
+
+    def _compile_minProperties(self, value, schema):
+        def check(instance, path):
+            if isinstance(instance, dict) and len(instance) < value:
+                yield ValidationError(u'{0!r} does not have enough properties'.format(instance),
+                                      path, 'minProperties')
+        return check
+
+    def _compile_maxProperties(self, value, schema):
+        def check(instance, path):
+            if isinstance(instance, dict) and len(instance) > value:
+                yield ValidationError(u'{0!r} has too many properties'.format(instance),
+                                      path, 'maxProperties')
+        return check
+
+    # arrays
+
+    def _compile_items(self, value, schema):
+        if isinstance(value, (list, tuple)):
+            items = [self.compile(subschema) for subschema in value]
+
+            def check(instance, path):
+                if isinstance(instance, list):
+                    for i, (checks, item) in enumerate(zip(items, instance)):
+                        for error in _run(checks, item, path + (i,)):
+                            yield error
+        else:
+            checks = self.compile(value)
+
+            def check(instance, path):
+                if isinstance(instance, list):
+                    for i, item in enumerate(instance):
+                        for error in _run(checks, item, path + (i,)):
+                            yield error
+        return check
+
+    def _compile_additionalItems(self, value, schema):
+        items = schema.get('items')
+        if value is True or not isinstance(items, (list, tuple)):
+            return None
+        checks = None if value is False else self.compile(value)
+
+        def check(instance, path):
+            if not isinstance(instance, list) or len(instance) <= len(items):
+                return
+            if checks is None:
+                yield ValidationError(u'Additional items are not allowed', path,
+                                      'additionalItems')
+            else:
+                for i in range(len(items), len(instance)):
+                    for error in _run(checks, instance[i], path + (i,)):
+                        yield error
+        return check
+
+    def _compile_minItems(self, value, schema):
+        def check(instance, path):
+            if isinstance(instance, list) and len(instance) < value:
+                yield ValidationError(u'{0!r} is too short'.format(instance), path, 'minItems')
+        return check
+
+    def _compile_maxItems(self, value, schema):
+        def check(instance, path):
+            if isinstance(instance, list) and len(instance) > value:
+                yield ValidationError(u'{0!r} is too long'.format(instance), path, 'maxItems')
+        return check
+
+    def _compile_uniqueItems(self, value, schema):
+        if not value:
+            return None
+
+        def check(instance, path):
+            if isinstance(instance, list):
+                keys = [_make_key(item) for item in instance]
+                if len(set(keys)) != len(keys):
+                    yield ValidationError(u'{0!r} has non-unique elements'.format(instance),
+                                          path, 'uniqueItems')
+        return check
+
+    # strings
+
+    def _compile_minLength(self, value, schema):
+        def check(instance, path):
+            if isinstance(instance, string_types) and len(instance) < value:
+                yield ValidationError(u'{0!r} is too short'.format(instance), path, 'minLength')
+        return check
+
+    def _compile_maxLength(self, value, schema):
+        def check(instance, path):
+            if isinstance(instance, string_types) and len(instance) > value:
+                yield ValidationError(u'{0!r} is too long'.format(instance), path, 'maxLength')
+        return check
+
+    def _compile_pattern(self, value, schema):
+        regex = compile_regex(value)
+
+        def check(instance, path):
+            if isinstance(instance, string_types) and not regex.search(instance):
+                yield ValidationError(u'{0!r} does not match {1!r}'.format(instance, value),
+                                      path, 'pattern')
+        return check
+
+    # numbers
+
+    def _compile_minimum(self, value, schema):
+        exclusive = schema.get('exclusiveMinimum', False)
+
+        def check(instance, path):
+            if _TYPE_CHECKS['number'](instance) and (
+                    instance <= value if exclusive else instance < value):
+                yield ValidationError(u'{0!r} is less than {1}the minimum of {2!r}'.format(
+                    instance, 'or equal to ' if exclusive else '', value), path, 'minimum')
+        return check
+
+    def _compile_maximum(self, value, schema):
+        exclusive = schema.get('exclusiveMaximum', False)
+
+        def check(instance, path):
+            if _TYPE_CHECKS['number'](instance) and (
+                    instance >= value if exclusive else instance > value):
+                yield ValidationError(u'{0!r} is greater than {1}the maximum of {2!r}'.format(
+                    instance, 'or equal to ' if exclusive else '', value), path, 'maximum')
+        return check
+
+    def _compile_multipleOf(self, value, schema):
+        def check(instance, path):
+            if not _TYPE_CHECKS['number'](instance):
+                return
+            if isinstance(value, float) or isinstance(instance, float):
+                quotient = instance / value
+                failed = int(quotient) != quotient
+            else:
+                failed = instance % value
+            if failed:
+                yield ValidationError(u'{0!r} is not a multiple of {1!r}'.format(instance, value),
+                                      path, 'multipleOf')
+        return check
+
+    # combinations
+
+    def _compile_allOf(self, value, schema):
+        subschemas = [self.compile(subschema) for subschema in value]
+
+        def check(instance, path):
+            for checks in subschemas:
+                for error in _run(checks, instance, path):
+                    yield error
+        return check
+
+    def _compile_anyOf(self, value, schema):
+        subschemas = [self.compile(subschema) for subschema in value]
+
+        def check(instance, path):
+            if not any(_is_valid(checks, instance) for checks in subschemas):
+                yield ValidationError(
+                    u'{0!r} is not valid under any of the given schemas'.format(instance),
+                    path, 'anyOf')
+        return check
+
+    def _compile_oneOf(self, value, schema):
+        subschemas = [self.compile(subschema) for subschema in value]
+
+        def check(instance, path):
+            matched = sum(1 for checks in subschemas if _is_valid(checks, instance))
+            if matched == 0:
+                yield ValidationError(
+                    u'{0!r} is not valid under any of the given schemas'.format(instance),
+                    path, 'oneOf')
+            elif matched > 1:
+                yield ValidationError(
+                    u'{0!r} is valid under each of {1} of the given schemas'.format(
+                        instance, matched),
+                    path, 'oneOf')
+        return check
+
+    def _compile_not(self, value, schema):
+        checks = self.compile(value)
+
+        def check(instance, path):
+            if _is_valid(checks, instance):
+                yield ValidationError(u'{0!r} is not allowed for {1!r}'.format(value, instance),
+                                      path, 'not')
+        return check
+
+
+def _run(checks, instance, path):
+    for check in checks:
+        for error in check(instance, path):
+            yield error
+
+
+def _is_valid(checks, instance):
+    for _ in _run(checks, instance, ()):
+        return False
+    return True
+
+
+class Validator(object):
+    """A validator compiled from a JSON schema.
+
+    .. versionadded:: 0.3.0
+
+    :param dict schema:
+        A JSON schema (draft 4). References must point to the schema itself,
+        e.g. ``#/definitions/user``.
+    """
+
+    def __init__(self, schema):
+        #: The schema
+        self.schema = schema
+        self._compiler = _Compiler(schema)
+        self._checks = self._compiler.compile(schema)
+
+    @classmethod
+    def from_field(cls, field, role=DEFAULT_ROLE):
+        """Returns a validator of the schema of ``field``.
+
+        :type field: :class:`.BaseField`
+        :raises: :class:`.SchemaGenerationException`
+        """
+        definitions, schema = field.get_definitions_and_schema(role=role)
+        rv = OrderedDict()
+        if definitions:
+            rv['definitions'] = definitions
+        rv.update(schema)
+        return cls(rv)
+
+    def subvalidator(self, pointer):
+        """Returns a validator of the subschema identified by ``pointer``
+        (e.g. ``"#/items"``) that shares references with this validator.
+        """
+        return self._derive(self._compiler.resolve_ref(pointer))
+
+    def _derive(self, checks):
+        rv = object.__new__(self.__class__)
+        rv.schema = self.schema
+        rv._compiler = self._compiler
+        rv._checks = checks
+        return rv
+
+    def iter_errors(self, instance, path=()):
+        """Lazily yields :class:`.ValidationError` s of ``instance``.
+
+        :param tuple path: A path to prepend to the paths of the errors.
+        """
+        return _run(self._checks, instance, tuple(path))
+
+    def is_valid(self, instance):
+        """Returns ``True`` if ``instance`` is valid."""
+        return _is_valid(self._checks, instance)
+
+    def validate(self, instance):
+        """Raises the first :class:`.ValidationError` of ``instance``, if any."""
+        for error in self.iter_errors(instance):
+            raise error
+
+
+def get_validator(document_cls, role=DEFAULT_ROLE):
+    """Returns a :class:`Validator` of the schema of ``document_cls``.
+
+    Validators are cached per :meth:`role class <.Document.get_role_class>`
+    (see :meth:`.Document.clear_cache`).
+
+    .. versionadded:: 0.3.0
+
+    :param document_cls: A :class:`.Document` subclass.
+    :param str role: A role.
+    :raises: :class:`.SchemaGenerationException`
+    :rtype: :class:`Validator`
+    """
+    document_cls._check_providers()
+    key = ('validator', document_cls.get_role_class(role))
+    validator = document_cls._cache.get(key)
+    if validator is None:
+        validator = Validator(document_cls.get_schema(role=role))
+        # see Document.get_schema_bytes
+        if not document_cls._get_matchers()[2]:
+            document_cls._cache[key] = validator
+    return validator
+
+
+DEFAULT_MAX_VALUE_SIZE = 64 * 1024 * 1024
+"""A default maximum number of characters of an item read by :func:`iter_array_errors`."""
+
+# characters JSON values start with
+_VALUE_STARTS = frozenset(u'{["-0123456789tfn')
+
+
+class _IncrementalReader(object):
+    def __init__(self, fp, chunk_size, max_value_size=DEFAULT_MAX_VALUE_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = u''
+        self.position = 0
+        self.consumed = 0
+        self.eof = False
+
+    def read_more(self, min_size=0):
+        """Appends at least ``min_size`` characters to the buffer (unless the end of
+        the file is reached) and drops the consumed part of the buffer.
+        """
+        self.buffer = self.buffer[self.position:]
+        self.consumed += self.position
+        self.position = 0
+        target = len(self.buffer) + max(min_size, 1)
+        while not self.eof and len(self.buffer) < target:
+            chunk = self.fp.read(self.chunk_size)
+            if isinstance(chunk, text_type):
+                text = chunk
+            else:
+                text = self.decoder.decode(chunk, final=not chunk)
+            if not chunk:
+                self.eof = True
+            self.buffer += text
+
+    def skip_whitespace(self):
+        """Skips whitespace and returns the next character or ``None`` at the end."""
+        while True:
+            buffer = self.buffer
+            while self.position < len(buffer) and buffer[self.position] in u' \t\n\r':
+                self.position += 1
+            if self.position < len(buffer):
+                return buffer[self.position]
+            if self.eof:
+                return None
+            self.read_more()
+
+    def error(self, message):
+        return ValueError('{0} at position {1}'.format(message, self.consumed + self.position))
+
+    def decode_value(self):
+        """Decodes a value that starts at the current position. Makes sure that
+        the value is not cut by the end of the buffer.
+
+        Raises :class:`ValueError` as soon as it is clear that the value is invalid
+        or longer than :attr:`max_value_size`, without reading the rest of the file.
+        """
+        if self.skip_whitespace() not in _VALUE_STARTS:
+            raise self.error('Invalid JSON value')
+        while True:
+            try:
+                value, end = _json_decoder.raw_decode(self.buffer, self.position)
+            except ValueError:
+                value, end = None, None
+            # a number (or a truncated value) at the end of the buffer may continue
+            # in the next chunk
+            if end is not None and (end < len(self.buffer) or self.eof):
+                self.position = end
+                return value
+            if self.eof:
+                raise self.error('Invalid JSON value')
+            size = len(self.buffer) - self.position
+            if self.max_value_size is not None and size > self.max_value_size:
+                raise self.error('Invalid JSON value or a value longer than {0} characters'
+                                 .format(self.max_value_size))
+            self.read_more(min_size=size)
+
+
+def iter_array_errors(fp, field_or_validator, role=DEFAULT_ROLE, chunk_size=65536,
+                      max_value_size=DEFAULT_MAX_VALUE_SIZE):
+    """Lazily yields :class:`.ValidationError` s of a JSON array read from
+    the file object ``fp``.
+
+    The array is parsed incrementally: its items are decoded and validated one by
+    one, so the memory usage is bounded by the size of the largest item
+    (and, if ``"uniqueItems"`` is set, by the number of items).
+
+    .. versionadded:: 0.3.0
+
+    :param fp: A file object opened in binary (UTF-8) or text mode.
+    :param field_or_validator:
+        An :class:`.ArrayField` or a :class:`Validator` of an array schema.
+    :param str role: A role (if ``field_or_validator`` is a field).
+    :param int chunk_size: A number of bytes to read at once.
+    :param int max_value_size:
+        A maximum number of characters of an item (or of the value if it is
+        not an array) or ``None`` if it is not limited. As invalid JSON can not be
+        told from a truncated item, it also limits the data read and kept in
+        memory before an error is reported.
+    :raises: :class:`ValueError` if ``fp`` does not contain a JSON array
+             (or contains an item longer than ``max_value_size``);
+             :class:`.SchemaGenerationException`
+    """
+    if isinstance(field_or_validator, Validator):
+        validator = field_or_validator
+    else:
+        validator = Validator.from_field(field_or_validator, role=role)
+    schema = validator.schema
+    items = schema.get('items', {})
+    if isinstance(items, (list, tuple)):
+        item_validators = [validator.subvalidator('#/items/{0}'.format(i))
+                           for i in range(len(items))]
+        additional_items = schema.get('additionalItems', True)
+        if isinstance(additional_items, dict):
+            additional_validator = validator.subvalidator('#/additionalItems')
+        else:
+            additional_validator = None
+    else:
+        item_validators = []
+        additional_items = True
+        additional_validator = validator.subvalidator('#/items')
+    # the rest of the keywords are checked against an empty array
+    array_validator = validator._derive(validator._compiler.compile(dict(
+        (k, v) for k, v in iteritems(schema)
+        if k not in ('items', 'additionalItems', 'minItems', 'maxItems', 'uniqueItems'))))
+    unique_keys = set() if schema.get('uniqueItems') else None
+    max_items = schema.get('maxItems')
+
+    reader = _IncrementalReader(fp, chunk_size, max_value_size=max_value_size)
+    if reader.skip_whitespace() != u'[':
+        for error in array_validator.iter_errors(reader.decode_value()):
+            yield error
+        return
+    reader.position += 1
+    count = 0
+    while True:
+        next_char = reader.skip_whitespace()
+        if next_char == u']' and count == 0:
+            reader.position += 1
+            break
+        if count:
+            if next_char == u']':
+                reader.position += 1
+                break
+            if next_char != u',':
+                raise reader.error('Expecting "," or "]"')
+            reader.position += 1
+            reader.skip_whitespace()
+        item = reader.decode_value()
+        if count < len(item_validators):
+            item_validator = item_validators[count]
+        elif additional_validator is not None:
+            item_validator = additional_validator
+        else:
+            item_validator = None
+            if additional_items is False and count == len(item_validators):
+                yield ValidationError(u'Additional items are not allowed', (), 'additionalItems')
+        if item_validator is not None:
+            for error in item_validator.iter_errors(item, path=(count,)):
+                yield error
+        if unique_keys is not None:
+            key = _make_key(item)
+            if key in unique_keys:
+                yield ValidationError(u'The item {0} is not unique'.format(count), (),
+                                      'uniqueItems')
+                # the array is known to be invalid, the rest of the items need not be kept
+                unique_keys = None
+            else:
+                unique_keys.add(key)
+        count += 1
+        if max_items is not None and count == max_items + 1:
+            yield ValidationError(u'The array has more than {0} items'.format(max_items),
+                                  (), 'maxItems')
+    if reader.skip_whitespace() is not None:
+        raise reader.error('Extra data')
+    if count < schema.get('minItems', 0):
+        yield ValidationError(u'The array has less than {0} items'.format(schema['minItems']),
+                              (), 'minItems')
+    for error in array_validator.iter_errors([]):
+        yield error
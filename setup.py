@@ -36,6 +36,9 @@ setup(
     author_email='anthony.romanovich@gmail.com',
     url='https://jsl.readthedocs.io',
     packages=find_packages(exclude=['tests']),
+    entry_points={
+        'console_scripts': ['jsl = jsl.cli:main'],
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
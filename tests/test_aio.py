@@ -0,0 +1,183 @@
+# coding: utf-8
+import sys
+import threading
+
+import pytest
+
+from jsl import Document, StringField, IntField, Var, DEFAULT_ROLE
+from jsl.frozen import FrozenDict
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 5), reason='requires Python 3.5+')
+
+
+def run(coroutine):
+    import asyncio
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_aget_schema():
+    import asyncio
+    from jsl import aio
+
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    class A(Document):
+        a = Var({'response': IntField()})
+        b = StringField()
+
+    get_schema = A.get_schema.__func__
+
+    def slow_get_schema(cls, *args, **kwargs):
+        if not kwargs.get('frozen'):
+            calls.append(kwargs.get('role'))
+            started.set()
+            release.wait(5)
+        return get_schema(cls, *args, **kwargs)
+
+    A.get_schema = classmethod(slow_get_schema)
+
+    async def scenario():
+        tasks = [asyncio.ensure_future(A.aget_schema(role=role))
+                 for role in ('response', 'response', 'request', DEFAULT_ROLE)]
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, started.wait, 5)
+        # the loop is not blocked while the schemas are being generated
+        await asyncio.sleep(0.01)
+        assert not any(task.done() for task in tasks)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    response, response_2, request, default = run(scenario())
+    assert response is response_2
+    assert request is default
+    assert isinstance(response, FrozenDict)
+    assert set(response['properties']) == set(['a', 'b'])
+    assert set(request['properties']) == set(['b'])
+    # requests for the same role class are coalesced
+    assert len(calls) == 2
+
+    del calls[:]
+    assert run(aio.aget_schema(A, role='response')) is response
+    assert run(aio.aget_schema_bytes(A, role='other')) == A.get_schema_bytes(role='request')
+    assert len(calls) == 0
+
+
+def test_prewarm():
+    from jsl import aio
+
+    class A(Document):
+        a = Var({'response': IntField()})
+
+    class B(Document):
+        b = StringField()
+
+    run(aio.prewarm([A, B], roles=['request', 'response', 'other']))
+    assert len([key for key in A._cache if key[0] == 'schema']) == 2
+    assert len([key for key in B._cache if key[0] == 'schema']) == 1
+    entry = A._get_cache_entry('other', False, False)
+    assert True in entry.encoded
+
+
+def test_asgi_response():
+    import zlib
+    from jsl import aio
+
+    class A(Document):
+        a = StringField()
+
+    def respond(headers):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'headers': headers}
+        run(aio.asgi_response(A, scope, send))
+        return messages
+
+    start, body = respond([(b'Accept-Encoding', b'gzip, deflate')])
+    assert start['type'] == 'http.response.start'
+    assert start['status'] == 200
+    headers = dict(start['headers'])
+    assert headers[b'content-encoding'] == b'gzip'
+    assert body['type'] == 'http.response.body'
+    assert zlib.decompress(body['body'], 31) == A.get_schema_bytes()
+
+    start, body = respond([(b'accept-encoding', b'gzip'), (b'if-none-match', headers[b'etag'])])
+    assert start['status'] == 304
+    assert body['body'] == b''
+
+
+def test_asgi_response_with_callable_values():
+    import json
+    from jsl import aio
+
+    loop_thread = threading.current_thread()
+    calls = []
+
+    def enum():
+        calls.append(threading.current_thread())
+        return [str(len(calls))]
+
+    class A(Document):
+        a = StringField(enum=enum)
+
+    def respond(method='GET'):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': method, 'headers': []}
+        run(aio.asgi_response(A, scope, send))
+        return messages
+
+    for i in range(1, 3):
+        start, body = respond()
+        assert start['status'] == 200
+        assert json.loads(body['body'].decode('utf-8'))['properties']['a']['enum'] == [str(i)]
+    assert len(calls) == 2
+    assert loop_thread not in calls
+
+    assert respond(method='POST')[0]['status'] == 405
+    assert len(calls) == 2
+
+
+def test_asgi_app():
+    from jsl import aio, registry
+    from jsl.server import SchemaServer
+
+    registry.clear()
+
+    class A(Document):
+        class Options(object):
+            definition_id = 'a'
+        a = StringField()
+
+    server = SchemaServer(warm=False)
+    app = aio.asgi_app(server)
+
+    def request(path):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        run(app({'type': 'http', 'method': 'GET', 'path': path, 'headers': []}, None, send))
+        return messages
+
+    for _ in range(2):
+        start, body = request('/a')
+        assert start['status'] == 200
+        assert body['body'] == A.get_schema_bytes()
+    assert server.get_stats()['misses'] == 1
+    assert server.get_stats()['hits'] == 1
+    assert request('/b')[0]['status'] == 404
+
+    registry.clear()
@@ -0,0 +1,79 @@
+# coding: utf-8
+import json
+import os
+
+import pytest
+
+from jsl import Document, StringField, IntField, Var, DEFAULT_ROLE
+from jsl.artifacts import write_artifact, Artifact
+
+
+class User(Document):
+    class Options(object):
+        definition_id = 'user'
+
+    id = Var({'response': IntField(required=True)})
+    login = StringField()
+
+
+class Login(Document):
+    login = StringField()
+
+
+def test_artifact(tmpdir):
+    path = str(tmpdir.join('schemas.jsla'))
+    roles = ['request', 'response', DEFAULT_ROLE]
+    write_artifact(path, [User, Login], roles=roles)
+    assert os.listdir(str(tmpdir)) == ['schemas.jsla']
+
+    with Artifact(path) as artifact:
+        assert ('user', 'response') in artifact
+        assert ('user', 'other') not in artifact
+        assert len(artifact.keys()) == 6
+        for role in roles:
+            view = artifact.get('user', role=role)
+            assert isinstance(view, memoryview)
+            assert view.tobytes() == User.get_schema_bytes(role=role)
+            assert json.loads(view.tobytes().decode('utf-8')) == User.get_schema(role=role)
+            view.release()
+        login_id = Login.get_definition_id()
+        assert artifact.get(login_id).tobytes() == Login.get_schema_bytes()
+
+        request = artifact.get('user', role='request')
+        default = artifact.get(login_id)
+        assert request == default
+        request.release()
+        default.release()
+        # equal schemas are stored once
+        assert artifact._index[('user', 'request')] == artifact._index[(login_id, DEFAULT_ROLE)]
+        assert len(set(artifact._index.values())) == 2
+
+        with pytest.raises(KeyError):
+            artifact.get('user', role='other')
+        with pytest.raises(KeyError):
+            artifact.get('unknown')
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='POSIX permissions')
+def test_artifact_permissions(tmpdir):
+    path = str(tmpdir.join('schemas.jsla'))
+    umask = os.umask(0o022)
+    try:
+        write_artifact(path, [User])
+        assert os.stat(path).st_mode & 0o777 == 0o644
+        os.chmod(path, 0o640)
+        write_artifact(path, [User])
+        assert os.stat(path).st_mode & 0o777 == 0o640
+    finally:
+        os.umask(umask)
+
+
+def test_artifact_errors(tmpdir):
+    with pytest.raises(ValueError):
+        write_artifact(str(tmpdir.join('a.jsla')), [User, User])
+    assert os.listdir(str(tmpdir)) == []
+
+    path = tmpdir.join('not-an-artifact')
+    path.write('{"a": 1}' * 10)
+    with pytest.raises(ValueError):
+        Artifact(str(path))
@@ -0,0 +1,104 @@
+# coding: utf-8
+import math
+
+import pytest
+
+from jsl import (Document, StringField, IntField, NumberField, ArrayField, DocumentField,
+                 Var, Scope)
+from jsl.fields import Null
+from jsl.codegen import generate_module
+from jsl.roles import not_, prefix
+
+
+def get_statuses():
+    return STATUSES
+
+
+def get_default_status():
+    return DEFAULT_STATUS
+
+
+STATUSES = ['new']
+DEFAULT_STATUS = Null
+
+
+class Author(Document):
+    name = StringField(required=True)
+
+
+class Task(Document):
+    class Options(object):
+        definition_id = 'task'
+
+    id = Var({not_('request'): IntField(required=True)})
+    status = StringField(enum=get_statuses, default=get_default_status)
+    authors = ArrayField(DocumentField(Author, as_ref=True))
+    parent = DocumentField('self')
+    with Scope(prefix('admin.')) as admin:
+        admin.notes = StringField(title='Notes', description=u'Заметки')
+
+
+def load(source):
+    namespace = {}
+    exec(compile(source, '<generated>', 'exec'), namespace)
+    return namespace
+
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_generate_module(ordered):
+    global STATUSES, DEFAULT_STATUS
+    roles = ['request', 'response', 'admin.response', 'admin.request']
+    source = generate_module(Task, roles=roles, ordered=ordered)
+    # one function per role class
+    assert source.count('def _build_') == 3
+    module = load(source)
+
+    for role in roles + ['other']:
+        assert module['get_schema'](role) == Task.get_schema(role=role, ordered=ordered)
+    assert type(module['get_schema']('response')) is type(Task.get_schema(ordered=ordered))
+    assert module['get_schema']('response') is not module['get_schema']('response')
+
+    STATUSES = []
+    DEFAULT_STATUS = 'new'
+    try:
+        schema = module['get_schema']('response')
+        assert schema == Task.get_schema(role='response', ordered=ordered)
+        status_schema = schema['definitions']['task']['properties']['status']
+        assert 'enum' not in status_schema
+        assert status_schema['default'] == 'new'
+    finally:
+        STATUSES = ['new']
+        DEFAULT_STATUS = Null
+
+
+class Measurement(Document):
+    value = NumberField(minimum=float('-inf'), maximum=float('inf'), default=float('nan'))
+
+
+def test_generate_module_with_special_floats():
+    source = generate_module(Measurement)
+    assert "float('inf')" in source
+    assert "float('-inf')" in source
+    assert "float('nan')" in source
+    schema = load(source)['get_schema']()
+    value_schema = schema['properties']['value']
+    assert value_schema['minimum'] == float('-inf')
+    assert value_schema['maximum'] == float('inf')
+    assert math.isnan(value_schema['default'])
+
+
+class WithLambda(Document):
+    a = StringField(enum=lambda: ['a'])
+
+
+def test_generate_module_errors():
+    with pytest.raises(ValueError) as e:
+        generate_module(WithLambda)
+    assert 'can not be referenced' in str(e.value)
+
+    class A(Document):
+        a = StringField()
+
+    with pytest.raises(ValueError) as e:
+        generate_module(A)
+    assert 'can not be imported' in str(e.value)
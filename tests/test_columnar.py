@@ -0,0 +1,116 @@
+# coding: utf-8
+import pytest
+
+from jsl import (Document, StringField, IntField, NumberField, BooleanField,
+                 DocumentField, ArrayField, Var)
+from jsl.columnar import get_columns, validate_columns
+
+np = pytest.importorskip('numpy')
+
+
+class Geo(Document):
+    lat = NumberField(required=True, minimum=-90, maximum=90)
+
+
+class Address(Document):
+    street = StringField(required=True, min_length=1, max_length=5)
+    zip = StringField(pattern=r'^\d{3}$')
+    geo = DocumentField(Geo, as_ref=True)
+
+
+class User(Document):
+    id = IntField(required=True, minimum=1, multiple_of=2)
+    kind = Var({'admin': StringField(enum=['a', 'b'])}, default=StringField())
+    score = NumberField(maximum=10, exclusive_maximum=True)
+    active = BooleanField()
+    address = DocumentField(Address)
+
+
+def test_get_columns():
+    columns = get_columns(User)
+    assert [(c.name, c.required, c.parents) for c in columns] == [
+        ('id', True, ()),
+        ('kind', False, ()),
+        ('score', False, ()),
+        ('active', False, ()),
+        ('address.street', True, ('address',)),
+        ('address.zip', False, ('address',)),
+        ('address.geo.lat', True, ('address', 'address.geo')),
+    ]
+    assert get_columns(User, role='admin')[1].schema['enum'] == ['a', 'b']
+
+    class Invalid(Document):
+        tags = ArrayField(StringField())
+
+    with pytest.raises(ValueError) as e:
+        get_columns(Invalid)
+    assert 'tags' in str(e.value)
+
+    class Recursive(Document):
+        child = DocumentField('self')
+
+    with pytest.raises(ValueError):
+        get_columns(Recursive)
+
+
+def test_validate_columns():
+    columns = {
+        'id': np.array([2, 0, 3, 4, 6]),
+        'kind': np.array(['a', 'c', 'b', 'a', 'b']),
+        'score': np.array([1.5, 10.0, 9.9, 0, 0]),
+        'address.street': np.array(['x', 'toolong', '', 'y', '']),
+        'address.zip': np.array(['123', '12', '123', 'abc', '']),
+        'address.geo.lat': np.ma.masked_array([0.0, 100.0, 0.0, 0.0, 0.0],
+                                              mask=[False, False, True, False, True]),
+    }
+    nulls = {
+        'address.street': np.array([False, False, True, False, True]),
+        'address.zip': np.array([False, False, False, False, True]),
+        'address.geo': np.array([False, False, False, False, True]),
+    }
+    result = validate_columns(User, columns, nulls=nulls)
+    assert not result.is_valid
+    assert result.length == 5
+    assert list(result.get_counts().items()) == [
+        (('id', 'minimum'), 1),
+        (('id', 'multipleOf'), 1),
+        (('score', 'maximum'), 1),
+        (('address.street', 'required'), 1),
+        (('address.street', 'maxLength'), 1),
+        (('address.zip', 'pattern'), 2),
+        (('address.geo.lat', 'required'), 1),
+        (('address.geo.lat', 'maximum'), 1),
+    ]
+    assert result.get_failures('id', 'multipleOf').tolist() == [False, False, True, False, False]
+    assert result.get_failures('address.street', 'required').tolist() == [
+        False, False, True, False, False]
+    assert result.get_failures('address.geo.lat', 'required').tolist() == [
+        False, False, True, False, False]
+    assert result.get_failures('kind', 'enum').tolist() == [False] * 5
+    assert result.get_invalid_rows().tolist() == [False, True, True, True, False]
+    assert all(bitmap.dtype == np.uint8 and len(bitmap) == 1
+               for bitmap in result.bitmaps.values())
+
+    result = validate_columns(User, columns, role='admin', nulls=nulls)
+    assert result.get_failures('kind', 'enum').tolist() == [False, True, False, False, False]
+
+
+def test_validate_columns_types_and_missing_columns():
+    columns = np.zeros(3, dtype=[('id', 'f8'), ('score', 'U3'), ('active', '?')])
+    columns['id'] = [2, 2.5, 4]
+    result = validate_columns(User, columns)
+    assert result.get_failures('id', 'type').tolist() == [False, True, False]
+    assert result.get_failures('score', 'type').tolist() == [True, True, True]
+    assert result.get_failures('active', 'type').tolist() == [False] * 3
+    # the optional address is null in every row since all its columns are missing
+    assert ('address.street', 'required') not in result.bitmaps
+
+    result = validate_columns(User, {'score': np.array([1.0, 2.0])})
+    assert result.get_failures('id', 'required').tolist() == [True, True]
+
+    assert validate_columns(User, {'id': np.array([2, 4])}).is_valid
+
+    with pytest.raises(ValueError):
+        validate_columns(User, {'id': np.array([2]), 'score': np.array([1.0, 2.0])})
+    with pytest.raises(ValueError):
+        validate_columns(User, {'id': np.array([2, None], dtype=object)})
@@ -0,0 +1,232 @@
+# coding: utf-8
+import mock
+import pytest
+
+import jsl.context
+
+from jsl import (Document, StringField, IntField, ArrayField, DictField, OneOfField,
+                 DocumentField, Var, SchemaGenerationException)
+from jsl.context import (GenerationContext, get_context, get_profile, new_context,
+                         FULL_PROFILE, RUNTIME_PROFILE)
+from jsl.roles import not_
+from jsl._compat import OrderedDict
+
+
+def test_generation_context():
+    context = GenerationContext()
+    schema = {'type': 'string'}
+    context.add('a', schema)
+    context.add('a', schema)
+    context.add('a', {'type': 'string'})
+    context.update({'a': schema, 'b': {'type': 'integer'}})
+    assert context.definitions == {'a': schema, 'b': {'type': 'integer'}}
+    with pytest.raises(SchemaGenerationException) as e:
+        context.add('a', {'type': 'integer'})
+    assert 'a' in str(e.value)
+
+    assert get_context() is None
+    with new_context() as context:
+        assert get_context() is context
+        with new_context() as nested_context:
+            assert get_context() is nested_context
+        assert get_context() is context
+    assert get_context() is None
+
+
+def test_definitions_are_collected_from_any_depth():
+    class Leaf(Document):
+        class Options(object):
+            definition_id = 'leaf'
+        value = StringField()
+
+    class Node(Document):
+        class Options(object):
+            definition_id = 'node'
+        leaves = ArrayField(OneOfField([DocumentField(Leaf, as_ref=True), StringField()]))
+
+    field = DictField(properties={
+        'nodes': ArrayField(DocumentField(Node, as_ref=True)),
+        'leaf': DocumentField(Leaf, as_ref=True),
+    })
+    definitions, schema = field.get_definitions_and_schema()
+    assert sorted(definitions) == ['leaf', 'node']
+    assert schema['properties']['leaf'] == {'$ref': '#/definitions/leaf'}
+    assert get_context() is None
+
+
+def test_conflicting_definitions():
+    class A(Document):
+        class Options(object):
+            definition_id = 'conflict'
+        a = StringField()
+
+    class B(Document):
+        class Options(object):
+            definition_id = 'conflict'
+        b = StringField()
+
+    class C(Document):
+        a = DocumentField(A, as_ref=True)
+        b = DocumentField(B, as_ref=True)
+
+    with pytest.raises(SchemaGenerationException) as e:
+        C.get_schema()
+    assert 'conflict' in str(e.value)
+    assert get_context() is None
+
+
+def test_conflicting_definitions_of_a_document_under_different_roles():
+    class User(Document):
+        class Options(object):
+            definition_id = 'user'
+        login = StringField()
+        email = Var({'admin': StringField()})
+
+    class Task(Document):
+        author = DocumentField(User, as_ref=True)
+        # the role is not propagated, so User is resolved using the default role here
+        reviewer = Var({'admin': DocumentField(User, as_ref=True)}, propagate=not_('admin'))
+
+    assert Task.get_schema()['definitions']['user']['properties'] == {
+        'login': {'type': 'string'}}
+    # previously the definition generated last silently won, and "author"
+    # referred to a definition without "email"
+    with pytest.raises(SchemaGenerationException) as e:
+        Task.get_schema(role='admin')
+    assert 'user' in str(e.value)
+    assert get_context() is None
+
+
+def test_schema_generated_during_generation():
+    class Inner(Document):
+        class Options(object):
+            definition_id = 'inner'
+        value = StringField()
+
+    class Holder(Document):
+        inner = DocumentField(Inner, as_ref=True)
+
+    def get_default():
+        # a nested generation must not leak its definitions into the current one
+        return sorted(Holder.get_schema()['definitions'])
+
+    class Outer(Document):
+        names = ArrayField(StringField(), default=get_default)
+
+    schema = Outer.get_schema()
+    assert schema['properties']['names']['default'] == ['inner']
+    assert 'definitions' not in schema
+
+
+def test_definitions_are_sorted_once():
+    class Leaf(Document):
+        class Options(object):
+            definition_id = 'b'
+        value = StringField()
+
+    class Node(Document):
+        class Options(object):
+            definition_id = 'a'
+        leaf = DocumentField(Leaf, as_ref=True)
+
+    class Root(Document):
+        class Options(object):
+            definition_id = 'c'
+        node = DocumentField(Node, as_ref=True)
+        leaves = ArrayField(DocumentField(Leaf, as_ref=True))
+
+    with mock.patch.object(jsl.context, 'OrderedDict', wraps=OrderedDict) as ordered_dict:
+        definitions, _ = Root.get_definitions_and_schema(ordered=True)
+    assert ordered_dict.call_count == 1
+    assert isinstance(definitions, OrderedDict)
+    assert list(definitions) == ['a', 'b']
+
+    definitions, _ = ArrayField(DocumentField(Root, as_ref=True)).get_definitions_and_schema(
+        ordered=True)
+    assert list(definitions) == ['a', 'b', 'c']
+    assert list(Root.get_schema(ordered=True)['definitions']) == ['a', 'b']
+    definitions, _ = Root.get_definitions_and_schema()
+    assert type(definitions) is dict
+
+
+def test_runtime_profile():
+    class Base(Document):
+        class Options(object):
+            title = 'Base'
+            description = 'A base document.'
+            definition_id = 'base'
+        id = IntField(title='ID', required=True)
+
+    load_default = mock.Mock(return_value=10)
+
+    class Child(Base):
+        class Options(object):
+            title = 'Child'
+            inheritance_mode = 'all_of'
+        name = StringField(description='A name.', enum=['a', 'b'], default='a')
+        limit = IntField(default=load_default)
+
+    full_schema = Child.get_schema()
+    assert full_schema['definitions']['base']['title'] == 'Base'
+    assert full_schema['allOf'][1]['properties']['limit']['default'] == 10
+
+    load_default.reset_mock()
+    schema = Child.get_schema(profile=RUNTIME_PROFILE)
+    assert not load_default.called
+    assert schema == {
+        '$schema': 'http://json-schema.org/draft-04/schema#',
+        'definitions': {
+            'base': {
+                'type': 'object',
+                'properties': {'id': {'type': 'integer'}},
+                'required': ['id'],
+                'additionalProperties': False,
+            },
+        },
+        'allOf': [
+            {'$ref': '#/definitions/base'},
+            {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string', 'enum': ['a', 'b']},
+                    'limit': {'type': 'integer'},
+                },
+                'additionalProperties': False,
+            },
+        ],
+    }
+    # the cached fragment of the parent does not leak into the full variant
+    assert Child.get_schema() == full_schema
+
+    assert StringField(title='A', default='a').get_schema(profile=RUNTIME_PROFILE) == {
+        'type': 'string'}
+
+    with pytest.raises(ValueError):
+        Child.get_schema(profile='minimal')
+
+
+def test_runtime_profile_is_cached_separately():
+    class A(Document):
+        class Options(object):
+            title = 'A'
+        a = StringField(description='A string.')
+
+    full = A.get_schema(frozen=True)
+    runtime = A.get_schema(frozen=True, profile=RUNTIME_PROFILE)
+    assert runtime is A.get_schema(frozen=True, profile=RUNTIME_PROFILE)
+    assert full is A.get_schema(frozen=True, profile=FULL_PROFILE)
+    assert 'title' in full and 'title' not in runtime
+
+    full_bytes = A.get_schema_bytes()
+    runtime_bytes = A.get_schema_bytes(profile=RUNTIME_PROFILE)
+    assert len(runtime_bytes) < len(full_bytes)
+    assert b'description' not in runtime_bytes
+    assert runtime_bytes is A.get_schema_bytes(profile=RUNTIME_PROFILE)
+
+
+def test_get_profile():
+    assert get_profile() == FULL_PROFILE
+    with new_context(profile=RUNTIME_PROFILE) as context:
+        assert not context.annotations
+        assert get_profile() == RUNTIME_PROFILE
+    assert get_profile() == FULL_PROFILE
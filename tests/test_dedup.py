@@ -0,0 +1,79 @@
+# coding: utf-8
+import jsonschema
+
+from jsl.document import Document
+from jsl.dedup import deduplicate, DEFINITION_ID_PREFIX
+from jsl.fields import StringField, IntField, ArrayField, DocumentField, DictField
+from jsl._compat import OrderedDict, iterkeys
+
+from util import normalize
+
+
+def test_deduplicate():
+    class Address(Document):
+        street = StringField(required=True)
+        zip = StringField(pattern='^[0-9]{5}$')
+
+    class User(Document):
+        home = DocumentField(Address, required=True)
+        work = DocumentField(Address)
+        previous = ArrayField(DocumentField(Address))
+        name = StringField()
+        nickname = StringField()
+
+    schema = User.get_schema(deduplicate=True)
+    normalize(schema)
+    definitions = schema['definitions']
+    assert len(definitions) == 1
+    definition_id = list(iterkeys(definitions))[0]
+    assert definition_id.startswith(DEFINITION_ID_PREFIX)
+    assert normalize(definitions[definition_id]) == normalize(Address.get_definitions_and_schema()[1])
+    ref = {'$ref': '#/definitions/' + definition_id}
+    assert schema['properties']['home'] == ref
+    assert schema['properties']['work'] == ref
+    assert schema['properties']['previous']['items'] == ref
+    # small subschemas are left as they are
+    assert schema['properties']['name'] == {'type': 'string'}
+
+    instance = {'home': {'street': 'Main'}, 'previous': [{'street': 'A', 'zip': '12345'}]}
+    jsonschema.validate(instance, schema)
+    jsonschema.validate(instance, User.get_schema())
+    instance['previous'][0]['zip'] = 'xxx'
+    assert not jsonschema.Draft4Validator(schema).is_valid(instance)
+
+    # the result is deterministic
+    assert User.get_schema(deduplicate=True) == schema
+
+    ordered_schema = User.get_schema(ordered=True, deduplicate=True)
+    assert isinstance(ordered_schema['definitions'], OrderedDict)
+    assert normalize(ordered_schema) == schema
+
+
+def test_deduplicate_reuses_existing_definitions():
+    class Address(Document):
+        street = StringField(required=True)
+        zip = StringField(pattern='^[0-9]{5}$')
+
+    class User(Document):
+        home = DocumentField(Address, as_ref=True)
+        work = DocumentField(Address)
+
+    schema = User.get_schema(deduplicate=True)
+    assert list(iterkeys(schema['definitions'])) == [Address.get_definition_id()]
+    assert schema['properties']['work'] == schema['properties']['home']
+
+
+def test_deduplicate_keeps_ids():
+    address = DictField(id='address.json', properties={
+        'street': StringField(required=True),
+        'zip': IntField(),
+    })
+    definitions, schema = deduplicate({}, {
+        'type': 'object',
+        'properties': {
+            'a': address.get_schema(),
+            'b': address.get_schema(),
+        },
+    })
+    assert definitions == {}
+    assert schema['properties']['a'] == schema['properties']['b'] == address.get_schema()
@@ -1,8 +1,14 @@
 # coding: utf-8
+import json
+import pickle
+
 import jsonschema
+import mock
+import pytest
 
-from jsl.roles import Scope, Resolution
-from jsl.document import Document
+from jsl.roles import Var, Scope, Resolution
+from jsl.document import Document, ALL_OF, bundle
+from jsl.frozen import thaw, FrozenDict, FrozenOrderedDict
 from jsl.fields import (
     RECURSIVE_REFERENCE_CONSTANT, StringField, IntField, DocumentField,
     DateTimeField, ArrayField, OneOfField)
@@ -456,3 +462,199 @@ def test_resolve_field():
     assert X.resolve_field('name', 'xxx') == Resolution(None, 'xxx')
     assert X.resolve_field('name', 'role_1') == Resolution(X.s_1.name, 'role_1')
     assert X.resolve_field('name', 'role_2') == Resolution(X.s_2.name, 'role_2')
+    assert X.resolve_field('name', 'role_2') is X.resolve_field('name', 'role_2')
+    assert X.resolve_field('xxx', 'role_2') == Resolution(None, 'role_2')
+    assert list(X.resolve_and_iter_fields('role_1')) == [('name', X.s_1.name)]
+    assert list(X.resolve_and_iter_fields('xxx')) == []
+
+    X.name = Var({'role_1': IntField()})
+    X._backend.properties['name'] = X.name
+    assert X.resolve_field('name', 'role_1').value is X.s_1.name
+    X.clear_cache()
+    assert X.resolve_field('name', 'role_1').value is X.name.values[0][1]
+    assert list(X.resolve_and_iter_fields('role_1')) == [('name', X.name.values[0][1])]
+
+
+def test_resolve_field_does_not_match_roles_on_hits():
+    calls = []
+
+    def matcher(role):
+        calls.append(role)
+        return role == 'role_1'
+
+    class X(Document):
+        name = Var([(matcher, StringField())])
+
+    assert X.resolve_field('name', 'role_1').value is X.name.values[0][1]
+    assert X.resolve_field('name', 'role_2') == Resolution(None, 'role_2')
+    del calls[:]
+    for _ in range(10):
+        X.resolve_field('name', 'role_1')
+        X.resolve_field('name', 'role_2')
+        list(X.resolve_and_iter_fields('role_1'))
+    assert calls == []
+
+
+def test_get_metadata():
+    class X(Document):
+        class Options(object):
+            pattern_properties = {'^x-': StringField()}
+            additional_properties = True
+
+        id = IntField(required=True)
+        login = StringField(name='user-login',
+                            required=Var({'request': True}, default=False))
+        secret = Var({'request': StringField()})
+
+    metadata = X.get_metadata()
+    assert isinstance(metadata.properties, FrozenOrderedDict)
+    assert list(metadata.properties.items()) == [('id', 'id'), ('user-login', 'login')]
+    assert metadata.required == frozenset(['id'])
+    assert isinstance(metadata.pattern_properties, FrozenDict)
+    assert metadata.pattern_properties['^x-'].match('x-a')
+    assert metadata.additional_properties is True
+    assert X.get_metadata() is metadata
+
+    metadata = X.get_metadata('request')
+    assert list(metadata.properties) == ['id', 'user-login', 'secret']
+    assert metadata.required == frozenset(['id', 'user-login'])
+
+    schema = X.get_schema(role='request')
+    assert list(schema['properties']) == ['id', 'user-login', 'secret']
+    assert schema['required'] == ['id', 'user-login']
+
+    X.clear_cache()
+    X.login.required = True
+    assert X.get_metadata().required == frozenset(['id', 'user-login'])
+    assert X.get_schema()['required'] == ['id', 'user-login']
+
+
+def test_get_schema_bytes():
+    class A(Document):
+        with Scope('response') as response:
+            response.id = IntField(required=True)
+        name = StringField(title=u'Имя')
+        created_at = DateTimeField()
+
+    encoded = A.get_schema_bytes()
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded.decode('utf-8')) == A.get_schema()
+    assert encoded == json.dumps(A.get_schema(), sort_keys=True, separators=(',', ':'),
+                                 ensure_ascii=False).encode('utf-8')
+    assert A.get_schema_bytes() is encoded
+    assert A.get_schema_bytes(ordered=True) is encoded
+
+    response_encoded = A.get_schema_bytes(role='response')
+    assert json.loads(response_encoded.decode('utf-8')) == A.get_schema(role='response')
+
+    ordered_encoded = A.get_schema_bytes(ordered=True, canonical=False)
+    assert json.loads(ordered_encoded.decode('utf-8'), object_pairs_hook=OrderedDict) == \
+        A.get_schema(ordered=True)
+
+    with mock.patch('jsl.encoding.orjson', None):
+        A.clear_cache()
+        assert A.get_schema_bytes() == encoded
+        assert A.get_schema_bytes() is not encoded
+
+
+def test_get_frozen_schema():
+    class B(Document):
+        name = StringField(enum=['a', 'b'])
+
+    class A(Document):
+        b = ArrayField(DocumentField(B), required=True)
+
+    schema = A.get_schema(frozen=True)
+    assert thaw(schema) == A.get_schema()
+    assert A.get_schema(frozen=True) is schema
+    assert isinstance(schema['properties']['b']['items']['properties']['name']['enum'], tuple)
+    with pytest.raises(TypeError):
+        schema['title'] = 'A'
+    with pytest.raises(TypeError):
+        schema['properties'].pop('b')
+
+    thawed_schema = thaw(schema)
+    thawed_schema['required'].append('c')
+    thawed_schema['properties']['b']['title'] = 'B'
+    assert thaw(schema) == A.get_schema()
+
+    ordered_schema = A.get_schema(ordered=True, frozen=True)
+    assert isinstance(ordered_schema, OrderedDict)
+    assert list(iterkeys(ordered_schema)) == list(iterkeys(A.get_schema(ordered=True)))
+    assert isinstance(thaw(ordered_schema), OrderedDict)
+    with pytest.raises(TypeError):
+        ordered_schema['title'] = 'A'
+
+    assert pickle.loads(pickle.dumps(ordered_schema)) == ordered_schema
+    assert pickle.loads(pickle.dumps(schema)) == schema
+    assert json.loads(A.get_schema_bytes().decode('utf-8')) == thaw(schema)
+    assert json.loads(json.dumps(schema)) == thaw(schema)
+
+    A.clear_cache()
+    assert A.get_schema(frozen=True) is not schema
+
+
+def test_bundle():
+    class Resource(Document):
+        class Options(object):
+            definition_id = 'resource'
+
+        id = IntField()
+
+    class User(Resource):
+        class Options(object):
+            definition_id = 'user'
+            inheritance_mode = ALL_OF
+
+        login = StringField()
+        friends = ArrayField(DocumentField(RECURSIVE_REFERENCE_CONSTANT))
+
+    class Comment(Document):
+        class Options(object):
+            definition_id = 'comment'
+
+        author = DocumentField(User)
+        text = StringField()
+
+    class Task(Document):
+        class Options(object):
+            definition_id = 'task'
+
+        author = DocumentField(User, as_ref=True)
+        comments = ArrayField(DocumentField(Comment))
+
+    with mock.patch.object(User._backend, 'get_definitions_and_schema',
+                           wraps=User._backend.get_definitions_and_schema) as generate:
+        schema = bundle([Task, Comment], ordered=True)
+        assert generate.call_count == 1
+
+    assert list(schema.keys()) == ['$schema', 'definitions']
+    definitions = schema['definitions']
+    assert list(definitions.keys()) == ['comment', 'resource', 'task', 'user']
+    assert definitions['task']['properties']['author'] == {'$ref': '#/definitions/user'}
+    assert definitions['task']['properties']['comments']['items'] == {
+        '$ref': '#/definitions/comment'}
+    assert definitions['comment']['properties']['author'] == {'$ref': '#/definitions/user'}
+    assert normalize(definitions['user']) == normalize({
+        'allOf': [
+            {'$ref': '#/definitions/resource'},
+            {
+                'type': 'object',
+                'properties': {
+                    'login': {'type': 'string'},
+                    'friends': {'type': 'array', 'items': {'$ref': '#/definitions/user'}},
+                },
+                'additionalProperties': False,
+            },
+        ],
+    })
+    assert definitions['resource']['properties'] == {'id': {'type': 'integer'}}
+    jsonschema.Draft4Validator.check_schema(schema)
+
+    class AnotherTask(Document):
+        class Options(object):
+            definition_id = 'task'
+
+    with pytest.raises(ValueError) as e:
+        bundle([Task, AnotherTask])
+    assert 'the same definition id' in str(e.value)
@@ -82,6 +82,15 @@ def test_string_field():
     assert str(e.value) == 'Invalid regular expression: unbalanced parenthesis'
 
 
+def test_string_field_compiled_pattern():
+    f = fields.StringField(pattern='^test$')
+    compiled_pattern = f.get_compiled_pattern()
+    assert compiled_pattern.match('test')
+    assert f.get_compiled_pattern() is compiled_pattern
+    assert fields.StringField(pattern='^test$').get_compiled_pattern() is compiled_pattern
+    assert fields.StringField().get_compiled_pattern() is None
+
+
 def test_string_derived_fields():
     f = fields.EmailField()
     definitions, schema = f.get_definitions_and_schema()
@@ -284,6 +293,22 @@ def test_dict_field_to_schema():
     })
 
 
+def test_dict_field_compiled_pattern_properties():
+    f = fields.DictField(pattern_properties={
+        'c*': fields.StringField(),
+        '^x$': fields.IntField(),
+    })
+    compiled = f.get_compiled_pattern_properties()
+    assert sorted(compiled) == ['^x$', 'c*']
+    assert compiled['^x$'].match('x')
+    assert f.get_compiled_pattern_properties()['c*'] is compiled['c*']
+    assert fields.DictField().get_compiled_pattern_properties() == {}
+
+    f = fields.DictField(pattern_properties={'((((': fields.StringField()})
+    with pytest.raises(ValueError):
+        f.get_compiled_pattern_properties()
+
+
 def test_dict_field_walk():
     aa = fields.StringField()
     a = fields.DictField(properties={'aa': aa})
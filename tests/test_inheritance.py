@@ -1,10 +1,12 @@
 # coding: utf-8
+import mock
 import pytest
 
 from jsl import (
     NumberField, IntField, DocumentField, StringField, BooleanField,
     Document, ALL_OF, INLINE, ANY_OF, ONE_OF, RECURSIVE_REFERENCE_CONSTANT
 )
+from jsl.document import get_definitions_and_schemas
 from util import normalize
 
 
@@ -404,3 +406,93 @@ def test_nested_inheritance_inline_parent():
     }
     schema = Child.get_schema()
     assert normalize(schema) == normalize(expected_schema)
+
+
+def test_parent_fragments_are_shared():
+    class Base(Document):
+        class Options(object):
+            definition_id = 'base'
+
+        id = IntField()
+
+    class A(Base):
+        class Options(object):
+            inheritance_mode = ALL_OF
+
+        a = IntField()
+
+    class B(Base):
+        class Options(object):
+            inheritance_mode = ALL_OF
+
+        b = IntField()
+
+    with mock.patch.object(Base._backend, 'get_definitions_and_schema',
+                           wraps=Base._backend.get_definitions_and_schema) as generate:
+        a_schema = A.get_schema()
+        b_schema = B.get_schema()
+        assert generate.call_count == 1
+        a_schema['definitions']['base']['properties']['x'] = {}
+        assert 'x' not in B.get_schema()['definitions']['base']['properties']
+        assert generate.call_count == 1
+
+        A.get_schema(role='other')
+        A.get_schema(ordered=True)
+        assert generate.call_count == 2
+
+        Base.clear_cache()
+        B.get_schema()
+        assert generate.call_count == 3
+
+    assert b_schema['definitions']['base'] == {
+        'type': 'object',
+        'properties': {'id': {'type': 'integer'}},
+        'additionalProperties': False,
+    }
+
+    counter = []
+
+    def get_default():
+        counter.append(1)
+        return len(counter)
+
+    class DynamicBase(Document):
+        id = IntField(default=get_default)
+
+    class C(DynamicBase):
+        class Options(object):
+            inheritance_mode = ALL_OF
+
+    C.get_schema()
+    assert C.get_schema()['definitions'][DynamicBase.get_definition_id()] == {
+        'type': 'object',
+        'properties': {'id': {'type': 'integer', 'default': 2}},
+        'additionalProperties': False,
+    }
+
+
+def test_get_definitions_and_schemas():
+    class Base(Document):
+        class Options(object):
+            definition_id = 'base'
+
+        id = IntField()
+
+    class A(Base):
+        class Options(object):
+            inheritance_mode = ALL_OF
+            definition_id = 'a'
+
+        a = IntField()
+
+    class B(Base):
+        class Options(object):
+            inheritance_mode = ALL_OF
+
+        b = DocumentField(A, as_ref=True)
+
+    definitions, schemas = get_definitions_and_schemas([A, B], ordered=True)
+    assert list(definitions.keys()) == ['a', 'base']
+    assert [s['allOf'][0] for s in schemas] == [{'$ref': '#/definitions/base'}] * 2
+    assert schemas[1]['allOf'][1]['properties']['b'] == {'$ref': '#/definitions/a'}
+    assert normalize(schemas[0]) == normalize(A.get_definitions_and_schema()[1])
@@ -0,0 +1,89 @@
+# coding: utf-8
+import io
+import json
+
+from jsl import Document, StringField, IntField
+from jsl.cli import main
+from jsl.ndjson import validate_ndjson
+
+
+class Event(Document):
+    id = IntField(required=True, minimum=1)
+    name = StringField(max_length=5)
+
+
+LINES = [
+    b'{"id": 1, "name": "a"}',
+    b'{"id": 0}',
+    b'',
+    b'{"id": 2, "name": "toolong"}',
+    b'{"id": 3',
+    b'{"id": 4}',
+    b'{"name": "b"}',
+]
+
+
+def make_source(trailing_newline=True):
+    return io.BytesIO(b'\n'.join(LINES) + (b'\n' if trailing_newline else b''))
+
+
+def check(processes, chunk_size):
+    valid = io.BytesIO()
+    invalid = io.BytesIO()
+    errors = io.BytesIO()
+    summary = validate_ndjson(make_source(), Event, valid_sink=valid, invalid_sink=invalid,
+                              errors_sink=errors, processes=processes,
+                              chunk_size=chunk_size, max_examples=2)
+    assert valid.getvalue() == b'{"id": 1, "name": "a"}\n{"id": 4}\n'
+    assert invalid.getvalue() == (b'{"id": 0}\n{"id": 2, "name": "toolong"}\n'
+                                  b'{"id": 3\n{"name": "b"}\n')
+    records = [json.loads(line.decode('utf-8')) for line in errors.getvalue().splitlines()]
+    assert [r['line'] for r in records] == [2, 4, 5, 7]
+    assert records[0]['errors'] == [
+        {'path': ['id'], 'keyword': 'minimum', 'message': records[0]['errors'][0]['message']}]
+    assert records[2]['errors'][0]['keyword'] is None
+    assert records[2]['errors'][0]['message'].startswith('Invalid JSON')
+
+    assert summary.valid == 2
+    assert summary.invalid == 4
+    assert summary.error_counts == {
+        ('id', 'minimum'): 1,
+        ('name', 'maxLength'): 1,
+        ('', None): 1,
+        ('', 'required'): 1,
+    }
+    assert [line for line, _ in summary.examples] == [2, 4]
+    as_dict = summary.as_dict()
+    assert as_dict['valid'] == 2
+    assert len(as_dict['errors']) == 4
+    json.dumps(as_dict)
+
+
+def test_validate_ndjson_in_process():
+    for chunk_size in (1, 7, 1024):
+        check(processes=1, chunk_size=chunk_size)
+
+
+def test_validate_ndjson_in_pool():
+    check(processes=2, chunk_size=16)
+
+
+def test_validate_ndjson_without_trailing_newline():
+    invalid = io.BytesIO()
+    summary = validate_ndjson(make_source(trailing_newline=False), Event,
+                              invalid_sink=invalid, processes=1)
+    assert summary.valid == 2
+    assert summary.invalid == 4
+    assert invalid.getvalue().endswith(b'{"name": "b"}\n')
+
+
+def test_cli(tmpdir):
+    source = tmpdir.join('events.ndjson')
+    source.write_binary(make_source().getvalue())
+    valid = tmpdir.join('valid.ndjson')
+    invalid = tmpdir.join('invalid.ndjson')
+    status = main(['validate', 'test_ndjson.Event', str(source), '--processes', '1',
+                   '--valid', str(valid), '--invalid', str(invalid)])
+    assert status == 1
+    assert valid.read_binary() == b'{"id": 1, "name": "a"}\n{"id": 4}\n'
+    assert len(invalid.read_binary().splitlines()) == 4
@@ -0,0 +1,112 @@
+# coding: utf-8
+import cProfile
+import pstats
+
+import pytest
+
+from jsl import _instrumentation
+from jsl.document import Document
+from jsl.exceptions import DocumentStep, FieldStep, SchemaGenerationException
+from jsl.fields import StringField, ArrayField, DocumentField
+from jsl.observers import (
+    Observer, AggregatingObserver, FrameTagger, register, unregister, observing, iter_observers)
+from jsl.roles import Var
+
+
+class Tag(Document):
+    name = StringField()
+
+
+class Post(Document):
+    title = Var({'full': StringField()})
+    tags = ArrayField(DocumentField(Tag))
+
+
+class RecordingObserver(Observer):
+    def __init__(self):
+        self.events = []
+
+    def enter(self, step):
+        self.events.append(('enter', step))
+
+    def exit(self, step, definitions, schema):
+        self.events.append(('exit', step, schema is not None))
+
+
+def test_register():
+    observer = Observer()
+    assert _instrumentation.observers == ()
+    register(observer)
+    assert list(iter_observers()) == [observer]
+    unregister(observer)
+    assert list(iter_observers()) == []
+    with pytest.raises(ValueError):
+        unregister(observer)
+
+    with observing(observer, FrameTagger()):
+        assert len(_instrumentation.observers) == 2
+        assert _instrumentation.tag_frames
+    assert _instrumentation.observers == ()
+    assert not _instrumentation.tag_frames
+
+
+def test_events():
+    observer = RecordingObserver()
+    with observing(observer):
+        Post.get_schema()
+    events = observer.events
+    assert events[0] == ('enter', DocumentStep(Post))
+    assert events[1] == ('enter', FieldStep(Post._backend))
+    assert events[-1] == ('exit', DocumentStep(Post), True)
+    assert ('exit', DocumentStep(Tag), True) in events
+    assert len([e for e in events if e[0] == 'enter']) == len([e for e in events if e[0] == 'exit'])
+
+    class Broken(Document):
+        a = ArrayField(Var({'x': StringField()}, default=[]))
+
+    observer = RecordingObserver()
+    with observing(observer):
+        with pytest.raises(SchemaGenerationException):
+            Broken.get_schema()
+    assert observer.events[-1] == ('exit', DocumentStep(Broken), False)
+
+
+def test_aggregating_observer():
+    observer = AggregatingObserver(buckets=[0.5, 1.0])
+    with observing(observer):
+        Post.get_schema(role='full')
+        Post.clear_cache()
+        Post.get_schema_bytes()
+        Post.get_schema_bytes()
+    Post.get_schema()
+
+    snapshot = observer.snapshot()
+    assert snapshot['buckets'] == [0.5, 1.0]
+    counters = snapshot['counters']
+    assert counters['documents_visited'] == 4
+    assert counters['fields_visited'] > 4
+    assert counters['var_resolutions'] > 0
+    assert counters['recursion_checks'] >= 4
+    assert counters['cache_hits'] == counters['cache_misses'] == 1
+    assert snapshot['cache_hit_rate'] == 0.5
+
+    post_metrics = snapshot['documents']['test_observers.Post']
+    assert post_metrics['count'] == 2
+    assert post_metrics['errors'] == 0
+    assert sum(post_metrics['buckets']) == 2
+    assert post_metrics['cache_hits'] == post_metrics['cache_misses'] == 1
+    assert snapshot['documents']['test_observers.Tag']['count'] == 2
+
+    observer.reset()
+    assert observer.snapshot()['documents'] == {}
+
+
+def test_frame_tagger():
+    profiler = cProfile.Profile()
+    with observing(FrameTagger()):
+        profiler.enable()
+        Post.get_schema()
+        profiler.disable()
+    function_names = set(key[2] for key in pstats.Stats(profiler).stats)
+    assert 'jsl:test_observers.Post' in function_names
+    assert 'jsl:test_observers.Tag' in function_names
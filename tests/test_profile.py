@@ -0,0 +1,66 @@
+# coding: utf-8
+import json
+
+import pytest
+
+from jsl import _instrumentation
+from jsl.document import Document
+from jsl.fields import StringField, IntField, ArrayField, DocumentField
+from jsl.profile import profile, COLUMNS
+from jsl.roles import Var, Scope
+
+
+class Address(Document):
+    street = StringField(required=True)
+    zip = Var({'full': StringField(pattern='^[0-9]{5}$')})
+
+
+class User(Document):
+    name = StringField(required=True)
+    with Scope('full') as full:
+        full.age = IntField()
+    addresses = ArrayField(DocumentField(Address))
+    friends = ArrayField(DocumentField('self'))
+
+
+def test_profile():
+    report = profile(User, role='full')
+    assert _instrumentation.observers == ()
+
+    documents = dict((row['name'], row) for row in report.documents)
+    assert sorted(documents) == ['test_profile.Address', 'test_profile.User']
+    user_row = documents['test_profile.User']
+    address_row = documents['test_profile.Address']
+    assert user_row['role'] == address_row['role'] == 'full'
+    assert user_row['calls'] == address_row['calls'] == 1
+    assert user_row['time'] >= address_row['time'] > 0
+    assert user_row['nodes'] > address_row['nodes'] > 0
+    assert address_row['bytes'] == len(json.dumps(
+        Address.get_definitions_and_schema(role='full')[1], separators=(',', ':')))
+    assert user_row['var_resolutions'] > address_row['var_resolutions'] > 0
+    assert user_row['recursion_checks'] >= address_row['recursion_checks'] >= 1
+
+    fields = dict((row['name'], row) for row in report.fields)
+    assert sorted(fields) == [
+        'test_profile.Address.street', 'test_profile.Address.zip',
+        'test_profile.User.addresses', 'test_profile.User.age',
+        'test_profile.User.friends', 'test_profile.User.name',
+    ]
+    assert fields['test_profile.User.addresses']['var_resolutions'] > 0
+    assert fields['test_profile.User.name']['var_resolutions'] == 0
+    assert fields['test_profile.User.name']['nodes'] == 2
+
+    assert report.total['definitions'] == 1
+    assert report.total['bytes'] == user_row['bytes']
+
+    assert json.loads(json.dumps(report.as_dict()))['documents'][0]['name'] == 'test_profile.User'
+
+
+def test_format_table():
+    report = profile(User)
+    lines = report.format_table(sort_by='nodes').splitlines()
+    assert lines[0].split() == list(COLUMNS)
+    assert lines[1].startswith('test_profile.User ')
+    assert len(report.format_table(kind='fields', limit=2).splitlines()) == 3
+    with pytest.raises(ValueError):
+        report.format_table(sort_by='xxx')
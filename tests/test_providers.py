@@ -0,0 +1,146 @@
+# coding: utf-8
+import itertools
+import json
+
+import mock
+
+import jsl.providers
+from jsl import (Document, StringField, ArrayField, DocumentField, Provider, Var,
+                 registry)
+from jsl.providers import refresh
+from jsl.serving import get_response
+from jsl.server import SchemaServer
+from jsl.validation import get_validator
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_provider():
+    clock = Clock()
+    load = mock.Mock(side_effect=[['a'], ['a'], ['a', 'b'], ['c']])
+    version = mock.Mock(return_value=1)
+    with mock.patch.object(jsl.providers, '_timer', clock):
+        provider = Provider(load, ttl=10, version=version)
+        assert provider.is_expired()
+        assert provider() == ['a']
+        assert provider.generation == 1
+        assert provider() == ['a']
+        assert load.call_count == 1
+
+        # expired, but the version is the same: revalidated without loading
+        clock.now = 10
+        assert provider.is_expired()
+        assert provider() == ['a']
+        assert load.call_count == 1
+        assert not provider.is_expired()
+
+        # the version has changed, but the value has not
+        version.return_value = 2
+        clock.now = 20
+        assert provider() == ['a']
+        assert load.call_count == 2
+        assert provider.generation == 1
+
+        provider.invalidate()
+        assert provider() == ['a', 'b']
+        assert provider.generation == 2
+
+        assert refresh([provider]) == []
+        assert refresh([provider], force=True) == [provider]
+        assert provider() == ['c']
+        assert load.call_count == 4
+
+
+def test_provider_without_ttl():
+    load = mock.Mock(side_effect=lambda: ['x'])
+    provider = Provider(load)
+    assert provider() == ['x']
+    assert provider() == ['x']
+    assert not provider.is_expired()
+    assert load.call_count == 1
+    assert refresh([provider], force=True) == []
+    assert load.call_count == 2
+    assert provider.generation == 1
+
+
+def test_cached_schemas_are_invalidated():
+    values = {'enum': ['a'], 'default': 'a'}
+    clock = Clock()
+    with mock.patch.object(jsl.providers, '_timer', clock):
+        enum = Provider(lambda: list(values['enum']), ttl=60)
+        default = Provider(lambda: values['default'])
+
+        class Tag(Document):
+            name = StringField(enum=Var({'strict': enum}), default=default)
+
+        class Post(Document):
+            tags = ArrayField(DocumentField(Tag, as_ref=True))
+
+        assert not Post._get_matchers()[2]
+        assert Post._get_matchers()[3] == [enum, default]
+
+        def get_tag_schema(document_cls, role):
+            schema = document_cls.get_schema(role=role, frozen=True)
+            return schema['definitions'][Tag.get_definition_id()]['properties']['name']
+
+        assert get_tag_schema(Post, 'strict') == {
+            'type': 'string', 'enum': ('a',), 'default': 'a'}
+        validator = get_validator(Post, role='strict')
+        assert not validator.is_valid({'tags': [{'name': 'b'}]})
+
+        values['enum'] = ['a', 'b']
+        # not expired yet
+        assert get_tag_schema(Post, 'strict')['enum'] == ('a',)
+        assert get_validator(Post, role='strict') is validator
+
+        clock.now = 60
+        bytes_before = Post.get_schema_bytes(role='strict')
+        assert get_tag_schema(Post, 'strict')['enum'] == ('a', 'b')
+        assert b'"b"' in bytes_before
+        assert get_validator(Post, role='strict').is_valid({'tags': [{'name': 'b'}]})
+
+        values['default'] = 'b'
+        default.invalidate()
+        assert get_tag_schema(Post, 'default') == {'type': 'string', 'default': 'b'}
+        assert Tag.get_schema()['properties']['name']['default'] == 'b'
+
+
+def test_callable_values_are_not_cached():
+    registry.clear()
+    counter = itertools.count()
+
+    class A(Document):
+        class Options(object):
+            definition_id = 'a'
+        x = StringField(enum=lambda: [str(next(counter))])
+
+    class B(Document):
+        a = DocumentField(A)
+
+    assert A._get_matchers()[2]
+    assert B._get_matchers()[2]
+
+    def get_enum(schema_bytes):
+        return json.loads(schema_bytes.decode('utf-8'))['properties']['x']['enum']
+
+    assert get_enum(A.get_schema_bytes()) == ['0']
+    assert get_enum(A.get_schema_bytes()) == ['1']
+    assert A.get_schema(frozen=True)['properties']['x']['enum'] == ('2',)
+    assert B.get_schema(frozen=True)['properties']['a']['properties']['x']['enum'] == ('3',)
+    assert get_enum(get_response(A).body) == ['4']
+    assert get_validator(A).is_valid({'x': '5'})
+
+    server = SchemaServer()
+    value = int(get_enum(server.handle('GET', '/a').body)[0])
+    assert value > 5
+    assert server.handle('GET', '/a', cached_only=True) is None
+    assert get_enum(server.handle('GET', '/a').body) == [str(value + 1)]
+    assert not any(key[0] == 'schema' for key in A._cache)
+
+    registry.clear()
@@ -27,3 +27,12 @@ def test_registry():
         registry.remove_document('A')
 
     registry.remove_document('A', module='qwe.rty')
+
+
+def test_registry_version():
+    version = registry.get_version()
+    registry.put_document('A', object())
+    assert registry.get_version() != version
+    version = registry.get_version()
+    registry.remove_document('A')
+    assert registry.get_version() != version
@@ -1,11 +1,14 @@
 # coding: utf-8
+import mock
 import pytest
 
+import jsl.document
 from jsl import (Document, BaseSchemaField, StringField, ArrayField,
                  DocumentField, IntField, DateTimeField, NumberField,
                  DictField, NotField, AllOfField, AnyOfField, OneOfField,
                  DEFAULT_ROLE)
-from jsl.roles import Var, Scope, not_, Resolution
+from jsl.roles import (Var, Scope, Resolution, Resolvable, Matcher,
+                       all_, not_, and_, or_, in_, prefix, glob, regex)
 from jsl.exceptions import SchemaGenerationException
 
 from util import normalize, sort_required_keys
@@ -46,6 +49,83 @@ def test_var():
     assert callable(var.propagate)
 
 
+def test_declarative_matchers():
+    roles = ['api.v1.request', 'api.v2.request', 'api.v2.response',
+             'api.v2.response.admin', 'db', DEFAULT_ROLE]
+
+    def matching(matcher):
+        assert isinstance(matcher, Matcher)
+        assert matcher.pattern is not None
+        return [role for role in roles if matcher(role)]
+
+    assert matching(in_('db', 'api')) == ['db']
+    assert matching(prefix('api.v2.')) == ['api.v2.request', 'api.v2.response',
+                                          'api.v2.response.admin']
+    assert matching(glob('api.*.request')) == ['api.v1.request', 'api.v2.request']
+    assert matching(glob('api.v[!1].re?uest')) == ['api.v2.request']
+    assert matching(regex(r'api\.v\d\.response(\..+)?')) == ['api.v2.response',
+                                                            'api.v2.response.admin']
+    assert matching(not_('db', DEFAULT_ROLE)) == roles[:4]
+    assert matching(not_(prefix('api.'))) == ['db', DEFAULT_ROLE]
+    assert matching(~prefix('api.')) == ['db', DEFAULT_ROLE]
+    assert matching(prefix('api.v2.') & ~glob('*.admin')) == ['api.v2.request',
+                                                             'api.v2.response']
+    assert matching(and_('db', prefix('d'))) == ['db']
+    assert matching(or_('db', prefix('api.v1'))) == ['api.v1.request', 'db']
+    assert matching(prefix('api.v1') | 'db') == ['api.v1.request', 'db']
+    assert matching(or_()) == []
+
+    assert in_(1, 'a')(1)
+    assert not prefix('a')(1)
+    assert not_('a')(None)
+
+    opaque = or_('db', lambda role: role.endswith('admin'))
+    assert opaque.pattern is None
+    assert [role for role in roles if opaque(role)] == ['api.v2.response.admin', 'db']
+
+    with pytest.raises(ValueError) as e:
+        regex('(')
+    assert str(e.value).startswith('Invalid regular expression')
+
+    for pattern in ['(?i)admin', 'a|(?i)admin', '(?u)admin', '(?im)admin', 'a(?x) b']:
+        with pytest.raises(ValueError) as e:
+            regex(pattern)
+        assert 'inline flags' in str(e.value)
+
+    assert regex(r'\(?i\)')('(i)')
+    assert regex(r'\(?i\)')('i)')
+    assert regex(r'[(?i)]+')('?i')
+    assert regex(r'[]()?i]+')('?i')
+    assert regex(r'(?:a|b)(?=c)c')('ac')
+
+
+def test_compiled_var():
+    var = Var([
+        (prefix('api.v2.') & ~glob('*.admin'), 1),
+        (regex(r'(a)(b)?c'), 2),
+        (glob('api.*'), 3),
+        ('db', 4),
+    ], propagate=not_('db'))
+    assert var._get_compiled()
+    assert var.resolve('api.v2.response') == Resolution(1, 'api.v2.response')
+    assert var.resolve('api.v2.response.admin') == Resolution(3, 'api.v2.response.admin')
+    assert var.resolve('ac') == Resolution(2, 'ac')
+    assert var.resolve('db') == Resolution(4, DEFAULT_ROLE)
+    assert var.resolve('other') == Resolution(None, 'other')
+    assert var.resolve('other') == Resolution(None, 'other')
+    assert 'other' in var._resolutions
+
+    var = Var([(lambda role: role == 'a', 1), ('b', 2)], default=0)
+    assert not var._get_compiled()
+    assert var.resolve('a') == Resolution(1, 'a')
+    assert var.resolve('b') == Resolution(2, 'b')
+    assert var.resolve('c') == Resolution(0, 'c')
+    assert not var._resolutions
+
+    assert Var({'a': 1}, propagate=all_)._get_compiled()
+    assert Var().resolve('a') == Resolution(None, 'a')
+
+
 DB_ROLE = 'db'
 REQUEST_ROLE = 'request'
 RESPONSE_ROLE = 'response'
@@ -442,3 +522,95 @@ def test_document():
 
     assert A.get_definition_id(role='role_1') == 'a'
     assert A.get_definition_id(role='role_2').endswith(A.__name__)
+
+
+def test_role_classes():
+    class Author(Document):
+        class Options(object):
+            roles_to_propagate = not_('db')
+
+        id = Var({'db': IntField()})
+        login = StringField()
+
+    class Task(Document):
+        with Scope('response') as response:
+            response.id = IntField()
+        with Scope(not_('request')) as not_request:
+            not_request.created_at = DateTimeField()
+        author = DocumentField(Author)
+
+    roles = ['db', 'request', 'response', 'response_v2', 'other', DEFAULT_ROLE]
+    assert Task.partition_roles(roles) == [
+        ['db'], ['request'], ['response'], ['response_v2', 'other', DEFAULT_ROLE],
+    ]
+    for role in roles:
+        assert Task.get_role_class(role) == Task.get_role_class(role)
+    assert Task.get_role_class('other') != Task.get_role_class('response')
+
+    Task.clear_cache()
+    assert Task.get_schema(role='other', frozen=True) is Task.get_schema(role='response_v2',
+                                                                         frozen=True)
+    assert Task.get_schema(role='other', frozen=True) is not Task.get_schema(role='response',
+                                                                             frozen=True)
+    assert Task.get_schema_bytes(role='other') is Task.get_schema_bytes(role='response_v2')
+
+    class A(Document):
+        a = Var({'role_1': StringField(pattern=Var({'role_2': 'a+'}, default='b+'))})
+
+    assert A.partition_roles(['role_1', 'role_2', 'role_3', 'role_4']) == [
+        ['role_1'], ['role_2'], ['role_3', 'role_4'],
+    ]
+
+
+def test_role_classes_cache_is_bounded():
+    class A(Document):
+        a = Var({'response': StringField()})
+
+    with mock.patch.object(jsl.document, '_ROLE_CLASSES_CACHE_MAX_SIZE', 10):
+        A.get_role_class('response')
+        cache_size = len(A._cache)
+        for i in range(100):
+            assert A.get_role_class('role_{0}'.format(i)) == A.get_role_class(DEFAULT_ROLE)
+        assert len(A._cache) == cache_size
+        role_classes = A._cache[('role_classes',)]
+        assert len(role_classes) == 10
+        assert list(role_classes)[-2:] == ['role_99', DEFAULT_ROLE]
+
+    A.clear_cache()
+    assert ('role_classes',) not in A._cache
+
+
+def test_field_resolutions_are_cached_per_role_class():
+    class A(Document):
+        a = Var({'response': StringField()}, propagate='response')
+        b = Var({not_('request'): IntField()})
+        c = StringField()
+
+    A.get_schema(role='other')
+    A.resolve_field('a', role='other')
+    cache_size = len(A._cache)
+    for i in range(100):
+        role = 'role_{0}'.format(i)
+        A.get_schema(role=role)
+        assert A.resolve_field('a', role=role) == (None, DEFAULT_ROLE)
+        assert A.resolve_field('b', role=role).role == role
+        assert A.resolve_field('c', role=role).role == role
+        assert A.resolve_field('d', role=role) == (None, role)
+        resolutions, fields, _ = A._get_resolved_fields(role)
+        assert resolutions['b'].role == resolutions['c'].role == role
+        assert sorted(name for name, _ in fields) == ['b', 'c']
+    assert len(A._cache) == cache_size
+
+
+def test_role_classes_of_opaque_resolvables():
+    class CustomResolvable(Resolvable):
+        def resolve(self, role):
+            return Resolution(StringField(max_length=len(role)), role)
+
+        def iter_possible_values(self):
+            return iter([])
+
+    class A(Document):
+        a = CustomResolvable()
+
+    assert A.partition_roles(['a', 'b', 'c']) == [['a'], ['b'], ['c']]
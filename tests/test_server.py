@@ -0,0 +1,167 @@
+# coding: utf-8
+import json
+import zlib
+
+from jsl import Document, StringField, IntField, Var, Provider, registry
+from jsl.server import SchemaServer
+
+
+def get(app, path, method='GET', **headers):
+    calls = []
+
+    def start_response(status, headers):
+        calls.append((status, dict(headers)))
+
+    environ = {'REQUEST_METHOD': method, 'PATH_INFO': path}
+    for name, value in headers.items():
+        environ['HTTP_' + name.upper()] = value
+    body = b''.join(app(environ, start_response))
+    status, headers = calls[0]
+    return status, headers, body
+
+
+def test_schema_server():
+    registry.clear()
+
+    class User(Document):
+        class Options(object):
+            definition_id = 'user'
+        id = Var({'response': IntField(required=True)})
+        name = StringField()
+
+    app = SchemaServer(roles=['request', 'response'])
+    stats = app.get_stats()
+    assert stats['misses'] == 4  # two role classes in two encodings
+    assert stats['entries'] == 2
+
+    status, headers, body = get(app, '/user/response')
+    assert status == '200 OK'
+    assert body == User.get_schema_bytes(role='response')
+    assert app.get_stats()['hits'] == 1
+
+    status, headers, body = get(app, '/user/request', accept_encoding='gzip')
+    assert headers['Content-Encoding'] == 'gzip'
+    assert zlib.decompress(body, 31) == User.get_schema_bytes(role='request')
+    status, _, body = get(app, '/user/request', accept_encoding='gzip',
+                          if_none_match=headers['ETag'])
+    assert status == '304 Not Modified'
+    assert body == b''
+
+    # the default role
+    assert get(app, '/user')[2] == User.get_schema_bytes()
+    assert get(app, '/user/')[2] == User.get_schema_bytes()
+
+    assert get(app, '/unknown')[0] == '404 Not Found'
+    assert get(app, '/user/response/x')[0] == '404 Not Found'
+    assert get(app, '/user/other')[0] == '404 Not Found'
+    assert get(app, '/')[0] == '404 Not Found'
+    assert get(app, '/user', method='POST')[0] == '405 Method Not Allowed'
+
+    # documents defined after the server has been created are served too
+    class Task(Document):
+        title = StringField()
+
+    status, _, body = get(app, '/{0}'.format(Task.get_definition_id()))
+    assert status == '200 OK'
+    assert body == Task.get_schema_bytes()
+
+    status, headers, body = get(app, '/_stats')
+    assert status == '200 OK'
+    assert headers['Content-Type'] == 'application/json'
+    stats = json.loads(body.decode('utf-8'))
+    assert stats['hits'] == 5
+    assert stats['misses'] == 5
+    assert stats['hit_rate'] == 0.5
+    assert stats['generation']['count'] == 5
+    assert stats['generation']['mean_seconds'] > 0
+
+    registry.clear()
+
+
+def test_schema_server_role_dependent_definition_ids():
+    registry.clear()
+
+    class A(Document):
+        class Options(object):
+            definition_id = Var({'response': 'a-response'}, default='a')
+        a = StringField()
+
+    app = SchemaServer(roles=['response'], warm=False)
+    assert app.find_document('a') is A
+    assert app.find_document('a-response', role='response') is A
+    assert app.find_document('a-response') is None
+    assert get(app, '/a-response/response')[0] == '200 OK'
+    assert get(app, '/a')[0] == '200 OK'
+
+    registry.clear()
+
+
+def test_schema_server_unknown_roles():
+    registry.clear()
+
+    class A(Document):
+        class Options(object):
+            definition_id = 'a'
+        a = StringField()
+
+    app = SchemaServer(roles=['response'])
+    cache_size = len(A._cache)
+    for i in range(100):
+        assert get(app, '/a/role_{0}'.format(i))[0] == '404 Not Found'
+    assert len(A._cache) == cache_size
+    assert get(app, '/a/response')[0] == '200 OK'
+
+    registry.clear()
+
+
+def test_schema_server_cached_only():
+    registry.clear()
+
+    loads = []
+
+    def load():
+        loads.append(None)
+        return ['x']
+
+    provider = Provider(load)
+
+    class A(Document):
+        class Options(object):
+            definition_id = 'a'
+        a = StringField(enum=provider)
+
+    app = SchemaServer()
+    assert len(loads) == 1
+    assert app.handle('GET', '/a', cached_only=True).status == 200
+
+    provider.invalidate()
+    assert app.handle('GET', '/a', cached_only=True) is None
+    assert len(loads) == 1
+    assert app.handle('GET', '/a').status == 200
+    assert len(loads) == 2
+
+    registry.clear()
+
+
+def test_schema_server_max_size():
+    registry.clear()
+
+    documents = [type('D{0}'.format(i), (Document,), {'a': StringField(description='a' * 100)})
+                 for i in range(5)]
+    size = len(documents[0].get_schema_bytes())
+    app = SchemaServer(warm=False, max_size=size * 3)
+    for document_cls in documents:
+        assert get(app, '/{0}'.format(document_cls.get_definition_id()))[0] == '200 OK'
+    stats = app.get_stats()
+    assert stats['entries'] == 3
+    assert stats['evictions'] == 2
+    assert stats['size'] <= size * 3
+    cache_key = documents[0]._get_cache_key('default', False, False)
+    assert cache_key not in documents[0]._cache
+    assert cache_key in documents[-1]._cache
+
+    # evicted schemas are generated again
+    get(app, '/{0}'.format(documents[0].get_definition_id()))
+    assert app.get_stats()['misses'] == 6
+
+    registry.clear()
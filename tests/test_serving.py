@@ -0,0 +1,137 @@
+# coding: utf-8
+import gzip
+import io
+import zlib
+
+import mock
+import pytest
+
+import jsl.serving
+from jsl import Document, StringField, IntField, Var, Provider
+from jsl.serving import (get_representation, get_response, negotiate_encoding, wsgi_response,
+                         IDENTITY, GZIP, DEFLATE)
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding(None) == IDENTITY
+    assert negotiate_encoding('') == IDENTITY
+    assert negotiate_encoding('gzip, deflate, br') == GZIP
+    assert negotiate_encoding('deflate, gzip') == GZIP
+    assert negotiate_encoding('deflate') == DEFLATE
+    assert negotiate_encoding('x-gzip') == GZIP
+    assert negotiate_encoding('gzip;q=0.5, deflate;q=0.8') == DEFLATE
+    assert negotiate_encoding('gzip;q=0, deflate;q=0') == IDENTITY
+    assert negotiate_encoding('*') == GZIP
+    assert negotiate_encoding('br, *;q=0.1, gzip;q=0') == DEFLATE
+    assert negotiate_encoding('identity, gzip;q=0.5') == IDENTITY
+    assert negotiate_encoding('br') == IDENTITY
+    assert negotiate_encoding('GZIP; Q=0.9') == GZIP
+
+
+def test_get_representation():
+    class A(Document):
+        a = StringField(description='x' * 1000)
+
+    identity = get_representation(A)
+    assert identity.body == A.get_schema_bytes()
+    assert identity.encoding == IDENTITY
+    assert identity.etag.startswith('"') and identity.etag.endswith('"')
+
+    gzipped = get_representation(A, encoding=GZIP)
+    assert gzipped.encoding == GZIP
+    assert gzip.GzipFile(fileobj=io.BytesIO(gzipped.body)).read() == identity.body
+    assert gzipped.etag == identity.etag[:-1] + '-gzip"'
+    deflated = get_representation(A, encoding=DEFLATE, level=9)
+    assert zlib.decompress(deflated.body) == identity.body
+    assert len(deflated.body) < len(identity.body)
+
+    # variants are computed once
+    with mock.patch.object(jsl.serving, 'compress') as compress:
+        assert get_representation(A, encoding=GZIP) is gzipped
+        assert get_representation(A, encoding=DEFLATE, level=9) is deflated
+        assert get_representation(A) is identity
+    assert not compress.called
+    assert get_representation(A, encoding=DEFLATE, level=1) is not deflated
+
+    A.clear_cache()
+    assert get_representation(A, encoding=GZIP) is not gzipped
+
+    with pytest.raises(ValueError):
+        get_representation(A, encoding='br')
+
+
+def test_etag_depends_on_schema():
+    class A(Document):
+        a = Var({'response': IntField()})
+        b = StringField()
+
+    assert get_representation(A, role='request').etag == get_representation(A).etag
+    assert get_representation(A, role='response').etag != get_representation(A).etag
+
+    value = ['a']
+    provider = Provider(lambda: list(value))
+
+    class B(Document):
+        b = StringField(enum=provider)
+
+    etag = get_representation(B).etag
+    assert get_representation(B).etag == etag
+    value.append('b')
+    provider.invalidate()
+    assert get_representation(B).etag != etag
+
+
+def test_get_response():
+    class A(Document):
+        a = StringField()
+
+    response = get_response(A, accept_encoding='gzip')
+    assert response.status == 200
+    headers = dict(response.headers)
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert headers['Content-Type'] == 'application/schema+json'
+    assert int(headers['Content-Length']) == len(response.body)
+    assert zlib.decompress(response.body, 31) == A.get_schema_bytes()
+    etag = headers['ETag']
+
+    response = get_response(A, accept_encoding='gzip', if_none_match=etag,
+                            cache_control='max-age=60')
+    assert response.status == 304
+    assert response.body == b''
+    assert dict(response.headers)['ETag'] == etag
+    assert dict(response.headers)['Cache-Control'] == 'max-age=60'
+    assert get_response(A, accept_encoding='gzip',
+                        if_none_match='"other", W/{0}'.format(etag)).status == 304
+    assert get_response(A, accept_encoding='gzip', if_none_match='*').status == 304
+    # the identity representation has a different tag
+    response = get_response(A, if_none_match=etag)
+    assert response.status == 200
+    assert 'Content-Encoding' not in dict(response.headers)
+    assert response.body == A.get_schema_bytes()
+
+    response = get_response(A, method='HEAD')
+    assert response.status == 200
+    assert response.body == b''
+    assert int(dict(response.headers)['Content-Length']) == len(A.get_schema_bytes())
+    assert get_response(A, method='POST').status == 405
+
+
+def test_wsgi_response():
+    class A(Document):
+        a = Var({'response': IntField()})
+
+    calls = []
+
+    def start_response(status, headers):
+        calls.append((status, headers))
+
+    environ = {'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': 'deflate'}
+    body = b''.join(wsgi_response(A, environ, start_response, role='response'))
+    status, headers = calls.pop()
+    assert status == '200 OK'
+    assert zlib.decompress(body) == A.get_schema_bytes(role='response')
+
+    environ['HTTP_IF_NONE_MATCH'] = dict(headers)['ETag']
+    assert b''.join(wsgi_response(A, environ, start_response, role='response')) == b''
+    assert calls.pop()[0] == '304 Not Modified'
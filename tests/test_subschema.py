@@ -0,0 +1,155 @@
+# coding: utf-8
+import mock
+import pytest
+
+import jsl.subschema
+from jsl import (Document, StringField, IntField, ArrayField, DictField, DocumentField,
+                 OneOfField, NotField, Var)
+from jsl.context import RUNTIME_PROFILE
+
+
+class Address(Document):
+    class Options(object):
+        definition_id = 'address'
+    street = StringField(required=True)
+    zip = StringField(pattern=r'^[0-9]{5}$')
+
+
+class Tag(Document):
+    class Options(object):
+        definition_id = 'tag'
+    name = StringField(title='Name')
+
+
+class Node(Document):
+    class Options(object):
+        definition_id = 'node'
+    value = IntField()
+    children = ArrayField(DocumentField('self'))
+
+
+class Base(Document):
+    class Options(object):
+        definition_id = 'base'
+    id = IntField()
+
+
+class Child(Base):
+    class Options(object):
+        inheritance_mode = 'all_of'
+        definition_id = 'child'
+    name = StringField()
+
+
+class User(Document):
+    class Options(object):
+        definition_id = 'user'
+        pattern_properties = {'^x-': StringField()}
+    name = StringField(required=True, title='Name')
+    address = DocumentField(Address)
+    shipping_address = DocumentField(Address, as_ref=True)
+    tags = ArrayField(DocumentField(Tag, as_ref=True))
+    pair = ArrayField([IntField(), Var({'response': None}, default=StringField())])
+    contact = OneOfField([StringField(format='email'), DictField(
+        properties={'phone': StringField(max_length=20)}, additional_properties=IntField())])
+    not_empty = NotField(StringField(max_length=0))
+    secret = Var({'request': StringField()})
+    tree = DocumentField(Node)
+    child = DocumentField(Child)
+
+
+POINTERS = [
+    '#',
+    '',
+    '#/properties/name',
+    '/properties/name',
+    '#/properties/name/title',
+    '#/properties/address',
+    '#/properties/address/properties/zip',
+    '#/properties/address/required',
+    '#/properties/shipping_address',
+    '#/properties/shipping_address/properties/street',
+    '#/properties/tags',
+    '#/properties/tags/items',
+    '#/properties/tags/items/properties/name',
+    '#/properties/pair/items/0',
+    '#/properties/pair/items/1',
+    '#/properties/contact/oneOf/0',
+    '#/properties/contact/oneOf/1/properties/phone',
+    '#/properties/contact/oneOf/1/additionalProperties',
+    '#/properties/not_empty/not',
+    '#/properties/tree',
+    '#/properties/tree/properties/children/items',
+    '#/properties/child',
+    '#/properties/child/allOf/1/properties/name',
+    '#/patternProperties/^x-',
+    '#/required',
+    '#/definitions/address',
+]
+
+
+def get_full_subschema(*args, **kwargs):
+    with mock.patch.object(jsl.subschema, '_is_navigable', return_value=False):
+        return User.get_subschema(*args, **kwargs)
+
+
+@pytest.mark.parametrize('pointer', POINTERS)
+@pytest.mark.parametrize('role', ['request', 'response'])
+def test_get_subschema(pointer, role):
+    User.clear_cache()
+    try:
+        expected = get_full_subschema(pointer, role=role)
+    except ValueError:
+        with pytest.raises(ValueError):
+            User.get_subschema(pointer, role=role)
+    else:
+        assert User.get_subschema(pointer, role=role) == expected
+
+
+def test_get_subschema_results():
+    assert User.get_subschema('#/properties/address/properties/zip') == {
+        'type': 'string', 'pattern': '^[0-9]{5}$'}
+    assert User.get_subschema('#') == User.get_schema()
+    assert User.get_subschema('#/properties/tags') == {
+        'type': 'array',
+        'items': {'$ref': '#/definitions/tag'},
+        'definitions': {'tag': {
+            'type': 'object',
+            'properties': {'name': {'type': 'string', 'title': 'Name'}},
+            'additionalProperties': False,
+        }},
+    }
+    assert User.get_subschema('#/properties/tags/items/properties/name',
+                              profile=RUNTIME_PROFILE) == {'type': 'string'}
+    assert User.get_subschema('#/properties/secret', role='request') == {'type': 'string'}
+    assert User.get_subschema('#/properties/pair/items/1', role='request') == {'type': 'string'}
+    tree = User.get_subschema('#/properties/tree')
+    assert tree['$ref'] == '#/definitions/node'
+    assert set(tree['definitions']) == set(['node'])
+
+    ordered = User.get_subschema('#/properties/shipping_address', ordered=True)
+    assert list(ordered) == ['$ref', 'definitions']
+
+    for pointer in ('#/properties/secret', '#/properties/missing', '#/properties/pair/items/2',
+                    '#/properties/pair/items/1',
+                    '#/properties/name/items', 'properties', '#/properties/tags/items/0'):
+        with pytest.raises(ValueError):
+            User.get_subschema(pointer, role='response')
+
+
+def test_get_subschema_generates_only_the_requested_part():
+    load_default = mock.Mock(return_value='x')
+
+    class Heavy(Document):
+        value = StringField(default=load_default)
+
+    class A(Document):
+        heavy = DocumentField(Heavy)
+        heavy_list = ArrayField(DocumentField(Heavy, as_ref=True))
+        b = DictField(properties={'c': IntField(minimum=1)})
+
+    assert A.get_subschema('#/properties/b/properties/c') == {'type': 'integer', 'minimum': 1}
+    assert not load_default.called
+    assert A.get_subschema('#/properties/heavy_list/items/properties/value') == {
+        'type': 'string', 'default': 'x'}
+    assert load_default.call_count == 1
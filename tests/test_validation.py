@@ -0,0 +1,163 @@
+# coding: utf-8
+import io
+import json
+
+import jsonschema
+import pytest
+
+from jsl import (Document, StringField, IntField, NumberField, BooleanField, ArrayField,
+                 DictField, DocumentField, OneOfField, AnyOfField, AllOfField, NotField,
+                 NullField, Var, ValidationError)
+from jsl.validation import Validator, get_validator, iter_array_errors
+
+
+class Address(Document):
+    class Options(object):
+        definition_id = 'address'
+
+    street = StringField(required=True, min_length=1, max_length=20)
+    zip = StringField(pattern=r'^\d{5}$')
+
+
+class User(Document):
+    class Options(object):
+        definition_id = 'user'
+
+    id = IntField(required=True, minimum=1)
+    login = Var({'request': StringField(required=True)}, default=StringField())
+    score = NumberField(maximum=10, exclusive_maximum=True, multiple_of=0.5)
+    kind = StringField(enum=['a', 'b'])
+    active = BooleanField()
+    tags = ArrayField(StringField(), unique_items=True, max_items=2)
+    address = DocumentField(Address, as_ref=True)
+    friends = ArrayField(DocumentField('self'))
+    extra = DictField(pattern_properties={'^x-': IntField()}, additional_properties=False)
+    value = OneOfField([IntField(), StringField()])
+    other = AnyOfField([NullField(), BooleanField()])
+    both = AllOfField([NumberField(minimum=0), IntField()])
+    not_string = NotField(StringField())
+    pair = ArrayField([IntField(), StringField()], additional_items=False)
+
+
+INSTANCES = [
+    {'id': 1},
+    {'id': 0},
+    {'id': True},
+    {'login': 'x'},
+    {'id': 1, 'score': 9.5},
+    {'id': 1, 'score': 10},
+    {'id': 1, 'score': 1.25},
+    {'id': 1, 'kind': 'c'},
+    {'id': 1, 'tags': ['a', 'a']},
+    {'id': 1, 'tags': ['a', 'b', 'c']},
+    {'id': 1, 'address': {'street': ''}},
+    {'id': 1, 'address': {'street': 'x', 'zip': '1234'}},
+    {'id': 1, 'address': {'zip': '12345', 'unknown': 1}},
+    {'id': 1, 'friends': [{'id': 2}, {'id': 0, 'friends': [{'id': 'x'}]}]},
+    {'id': 1, 'extra': {'x-a': 1, 'x-b': 'b', 'y': 1}},
+    {'id': 1, 'value': 1.5},
+    {'id': 1, 'value': 'x', 'other': None, 'both': 1},
+    {'id': 1, 'other': 1, 'both': 1.5},
+    {'id': 1, 'not_string': 'x'},
+    {'id': 1, 'pair': [1, 'a', 2]},
+    {'id': 1, 'pair': ['a']},
+    [],
+    None,
+]
+
+
+@pytest.mark.parametrize('role', ['default', 'request'])
+def test_validator(role):
+    schema = User.get_schema(role=role)
+    validator = get_validator(User, role=role)
+    assert validator is get_validator(User, role=role)
+    reference = jsonschema.Draft4Validator(schema)
+    for instance in INSTANCES:
+        errors = list(validator.iter_errors(instance))
+        expected = sorted((tuple(e.path), e.validator) for e in reference.iter_errors(instance))
+        assert sorted((e.path, e.keyword) for e in errors) == expected, instance
+        assert validator.is_valid(instance) == (not expected)
+        if expected:
+            with pytest.raises(ValidationError):
+                validator.validate(instance)
+        else:
+            validator.validate(instance)
+
+
+def test_validation_error():
+    validator = get_validator(User)
+    errors = list(validator.iter_errors({'id': 1, 'address': {'street': 'x' * 21}}))
+    assert errors == [ValidationError(u"'{0}' is too long".format('x' * 21),
+                                      ('address', 'street'), 'maxLength')]
+    assert str(errors[0]) == u"address/street: '{0}' is too long".format('x' * 21)
+
+
+def dump(value, whitespace=''):
+    return json.dumps(value, separators=(',' + whitespace, ':'))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 65536])
+def test_iter_array_errors(chunk_size):
+    field = ArrayField(DocumentField(User), min_items=1, max_items=3, unique_items=True)
+    users = [{'id': 1}, {'id': 12345678, 'score': 0.5e1}, {'id': 0}, {'id': 1},
+             {'id': 2, 'address': {'street': u'Улица'}}]
+    data = dump(users, whitespace='\n ').encode('utf-8')
+    errors = list(iter_array_errors(io.BytesIO(data), field, chunk_size=chunk_size))
+    reference = jsonschema.Draft4Validator(Validator.from_field(field).schema)
+    assert (sorted((e.path, e.keyword) for e in errors) ==
+            sorted((tuple(e.path), e.validator) for e in reference.iter_errors(users)))
+
+    for data in [u' [ ] ', u'[1]', u'{}', u'[{"id": 1} ,{"id": 2}]']:
+        errors = list(iter_array_errors(io.StringIO(data), field, chunk_size=chunk_size))
+        instance = json.loads(data)
+        expected = sorted((tuple(e.path), e.validator)
+                          for e in reference.iter_errors(instance))
+        assert sorted((e.path, e.keyword) for e in errors) == expected, data
+
+    for data in [u'[1,]', u'[1 2]', u'[1] 2', u'[{"id": 1}', u'[']:
+        with pytest.raises(ValueError):
+            list(iter_array_errors(io.StringIO(data), field, chunk_size=chunk_size))
+
+
+def test_iter_array_errors_is_lazy():
+    class Stream(object):
+        def __init__(self):
+            self.reads = 0
+
+        def read(self, size):
+            self.reads += 1
+            return b'[1,' if self.reads == 1 else b'{"id": 1},'
+
+    stream = Stream()
+    errors = iter_array_errors(stream, ArrayField(DocumentField(User)), chunk_size=10)
+    error = next(errors)
+    assert error.path == (0,)
+    assert error.keyword == 'type'
+    assert stream.reads < 5
+
+
+def test_iter_array_errors_on_large_malformed_input():
+    class Stream(object):
+        def __init__(self, head, tail):
+            self.head = head
+            self.tail = tail
+            self.size = 0
+
+        def read(self, size):
+            chunk = self.head if not self.size else self.tail * size
+            self.size += len(chunk)
+            return chunk
+
+    field = ArrayField(DocumentField(User))
+    # an endless string
+    stream = Stream(b'[{"id": 1}, {"id": "', b'x')
+    with pytest.raises(ValueError) as e:
+        list(iter_array_errors(stream, field, chunk_size=1024, max_value_size=10000))
+    assert 'longer than 10000 characters' in str(e.value)
+    assert stream.size < 50000
+
+    # a value that can not be fixed by reading more
+    stream = Stream(b'[{"id": 1}, @', b'x')
+    with pytest.raises(ValueError):
+        list(iter_array_errors(stream, field, chunk_size=1024))
+    assert stream.size < 10000